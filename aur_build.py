@@ -0,0 +1,211 @@
+import glob
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from pacman_db import strip_depver
+from storage import cache_dir
+
+AUR_GIT_URL = 'https://aur.archlinux.org/{}.git'
+BUILDER = ('makepkg', '--noconfirm', '--cleanbuild', '--force')
+
+
+def default_build_root():
+    return cache_dir('build')
+
+
+def package_name(path):
+    """pkgname of a built package file (name-pkgver-pkgrel-arch.pkg.tar.*)"""
+    return os.path.basename(path).rsplit('-', 3)[0]
+
+
+def build_dependencies(pkg):
+    return [*(pkg.get('Depends') or ()), *(pkg.get('MakeDepends') or ()), *(pkg.get('CheckDepends') or ())]
+
+
+class BuildError(Exception):
+    pass
+
+
+class AURBuildPlan:
+    """Dependency DAG of a set of AUR packages, grouped by pkgbase"""
+
+    def __init__(self, infos, wanted):
+        self.wanted = set(wanted)
+        self.bases = {}
+        self.names = {}
+        for pkg in infos:
+            base = pkg.get('PackageBase') or pkg['Name']
+            self.bases.setdefault(base, []).append(pkg)
+            self.names[pkg['Name']] = base
+            for provide in pkg.get('Provides') or ():
+                self.names.setdefault(strip_depver(provide), base)
+
+        self.edges = {base: set() for base in self.bases}
+        for base, pkgs in self.bases.items():
+            for pkg in pkgs:
+                for dep in build_dependencies(pkg):
+                    dep_base = self.names.get(strip_depver(dep))
+                    if dep_base and dep_base != base:
+                        self.edges[base].add(dep_base)
+
+    def external_dependencies(self, installed=()):
+        """Dependencies that are neither built by the plan nor in installed, for pacman to provide"""
+        return sorted({
+            strip_depver(dep)
+            for pkgs in self.bases.values() for pkg in pkgs for dep in build_dependencies(pkg)
+            if strip_depver(dep) not in self.names and strip_depver(dep) not in installed
+        })
+
+    def batches(self):
+        """Topological levels: every pkgbase comes after the bases it depends on"""
+        remaining = {base: set(deps) for base, deps in self.edges.items()}
+        levels = []
+        while remaining:
+            ready = sorted(base for base, deps in remaining.items() if not deps)
+            if not ready:
+                raise BuildError(f"Dependency cycle between {', '.join(sorted(remaining))}")
+            levels.append(ready)
+            for base in ready:
+                del remaining[base]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return levels
+
+    def dependents(self, base):
+        """Every pkgbase that needs base, directly or transitively"""
+        found = set()
+        queue = [base]
+        while queue:
+            current = queue.pop()
+            for other, deps in self.edges.items():
+                if current in deps and other not in found:
+                    found.add(other)
+                    queue.append(other)
+        return found
+
+
+class AURBuilder:
+    """Builds AUR packages in parallel over their dependency DAG
+
+    Each pkgbase is cloned (or fast-forwarded) into its own directory under
+    ``build_root`` and built with ``builder`` there, as the calling user.
+    Independent bases of the same topological level build concurrently; the
+    CPU budget is split between them through MAKEFLAGS so the total number
+    of compile jobs stays at ``jobs``. Each finished level is handed to
+    ``install(files, asdeps)`` as a single transaction before the next level
+    starts. ``builder`` may be any program that drops package files into
+    $PKGDEST, which makes the orchestration testable without makepkg.
+    """
+
+    def __init__(self, client, build_root=None, jobs=None, max_parallel=None,
+                 builder=BUILDER, clone_url=AUR_GIT_URL, on_output=print):
+        self.client = client
+        self.build_root = build_root or default_build_root()
+        self.jobs = jobs or os.cpu_count() or 1
+        self.max_parallel = max_parallel or self.jobs
+        self.builder = list(builder)
+        self.clone_url = clone_url
+        self.on_output = on_output
+        self._output_lock = threading.Lock()
+
+    def output(self, base, line):
+        with self._output_lock:
+            self.on_output(f"[{base}] {line}")
+
+    def plan(self, names, installed=(), repo_names=()):
+        """Resolve names and any AUR-only dependencies they are missing into an AURBuildPlan
+
+        installed and repo_names only need to support ``in``; dependencies
+        found in either are left to pacman.
+        """
+        infos = {pkg['Name']: pkg for pkg in self.client.info(names)}
+        missing = [name for name in names if name not in infos]
+        if missing:
+            raise BuildError(f"Not found in the AUR: {', '.join(missing)}")
+
+        checked = set()
+        while True:
+            pending = {
+                strip_depver(dep) for pkg in infos.values() for dep in build_dependencies(pkg)
+            }
+            pending = {
+                name for name in pending
+                if name not in infos and name not in installed and name not in repo_names
+            } - checked
+            if not pending:
+                break
+            checked |= pending
+            for pkg in self.client.info(sorted(pending)):
+                infos[pkg['Name']] = pkg
+        return AURBuildPlan(infos.values(), names)
+
+    def run(self, plan, install):
+        """Build and install every level of plan; returns (built, failed, skipped) pkgbase lists"""
+        built, failed, skipped = [], [], set()
+        for level in plan.batches():
+            level = [base for base in level if base not in skipped]
+            if not level:
+                continue
+            parallel = max(1, min(len(level), self.max_parallel))
+            makeflags = f"-j{max(1, self.jobs // parallel)}"
+            with ThreadPoolExecutor(max_workers=parallel) as pool:
+                results = list(zip(level, pool.map(lambda base: self._build(base, makeflags), level)))
+
+            files, dep_files = [], []
+            for base, outcome in results:
+                if isinstance(outcome, Exception):
+                    self.output(base, f"Build failed: {outcome}")
+                    failed.append(base)
+                    skipped |= plan.dependents(base)
+                    continue
+                built.append(base)
+                for path in outcome:
+                    name = package_name(path)
+                    if name in plan.wanted:
+                        files.append(path)
+                    elif name in plan.names:
+                        dep_files.append(path)
+            if dep_files:
+                install(dep_files, True)
+            if files:
+                install(files, False)
+        return built, failed, sorted(skipped)
+
+    def _build(self, base, makeflags):
+        try:
+            workdir = self._checkout(base)
+            pkgdest = os.path.join(self.build_root, 'packages', base)
+            os.makedirs(pkgdest, exist_ok=True)
+            for stale in glob.glob(os.path.join(pkgdest, '*.pkg.tar*')):
+                os.unlink(stale)
+            env = dict(os.environ, MAKEFLAGS=makeflags, PKGDEST=pkgdest)
+            self._run(base, self.builder, workdir, env)
+            packages = sorted(
+                path for path in glob.glob(os.path.join(pkgdest, '*.pkg.tar*')) if not path.endswith('.sig')
+            )
+            if not packages:
+                raise BuildError("builder produced no packages")
+            return packages
+        except (OSError, subprocess.CalledProcessError, BuildError) as e:
+            return e
+
+    def _checkout(self, base):
+        workdir = os.path.join(self.build_root, base)
+        if os.path.isdir(os.path.join(workdir, '.git')):
+            self._run(base, ['git', 'pull', '--ff-only'], workdir)
+        else:
+            os.makedirs(self.build_root, exist_ok=True)
+            self._run(base, ['git', 'clone', '--depth=1', self.clone_url.format(base), workdir], self.build_root)
+        return workdir
+
+    def _run(self, base, cmd, cwd, env=None):
+        process = subprocess.Popen(
+            cmd, cwd=cwd, env=env, stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1
+        )
+        for line in process.stdout:
+            self.output(base, line.rstrip('\n'))
+        if process.wait() != 0:
+            raise subprocess.CalledProcessError(process.returncode, cmd)
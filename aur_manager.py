@@ -1,19 +1,164 @@
 import sys
 import os
+import html
+import json
+import shutil
 import subprocess
 import time
-from threading import Thread, Event
+from threading import Thread, Event, Semaphore, Lock
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QLineEdit, QTreeWidget, QTreeWidgetItem, QLabel,
-    QTabWidget, QCheckBox, QTextEdit, QDialog, QScrollArea,
-    QMessageBox, QFrame
+    QPushButton, QLineEdit, QTableView, QHeaderView, QLabel,
+    QTabWidget, QCheckBox, QPlainTextEdit, QDialog,
+    QMessageBox, QFrame, QSplitter, QTextBrowser
+)
+from PyQt6.QtCore import Qt, pyqtSignal, QEvent, QFileSystemWatcher, QObject, QThread, QTimer
+from PyQt6.QtGui import QFont
+from pacman_db import DEFAULT_CONF, DEFAULT_DBPATH, LocalDatabase, SyncDatabase, strip_depver, vercmp
+from aur_rpc import AUR_RPC_URL, AURClient, AURError
+from aur_updates import AURUpdateChecker
+from aur_snapshot import AURSnapshot
+from package_model import PackageTableModel, create_proxy
+from records import PackageRecord, RootRecord, UpdateRecord
+from updates import PackagePrefetcher, UpdateEngine
+from scheduler import JobScheduler
+from depgraph import DependencyGraph
+from resolver import InstallResolver
+from aur_build import AURBuilder, BuildError
+from package_info import AUR_SOURCE, PackageInfoStore, format_date, format_size
+from catalog import CatalogSnapshot, database_stamps
+from helpers import HelperRegistry
+from roots import RootInspector, make_target
+from storage import cache_dir
+from privileged import (
+    ASKPASS_FLAG, HELPER_FLAG, AskpassServer, AuthenticationError, PrivilegedSession, askpass, safe_env, serve
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QObject, QThread, QTimer
-from PyQt6.QtGui import QFont, QIcon
 
-class OutputSignals(QObject):
-    output = pyqtSignal(str)
+class StartupTrace(QObject):
+    """Records time to first paint and time to interactive for benchmarks/startup.py
+
+    Enabled by setting ORACLE_STARTUP_TRACE to a file path. Marks are wall
+    clock times so the launcher can measure from before the process was
+    spawned; once the event loop is idle after the first paint the marks are
+    written as JSON and the window is closed.
+    """
+
+    def __init__(self, window, path):
+        super().__init__(window)
+        self.path = path
+        self.marks = {}
+        window.installEventFilter(self)
+
+    def mark(self, name):
+        self.marks.setdefault(name, time.time())
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint and 'first_paint' not in self.marks:
+            self.mark('first_paint')
+            QTimer.singleShot(0, self.interactive)
+        return False
+
+    def interactive(self):
+        self.mark('interactive')
+        with open(self.path, 'w') as f:
+            json.dump(self.marks, f)
+        self.parent().close()
+
+def default_transcript_dir():
+    return cache_dir('logs')
+
+class LogSink(QObject):
+    """Thread-safe terminal log with bounded memory
+
+    Lines from any thread are buffered and flushed to a QPlainTextEdit at
+    most once per frame. The widget keeps only the last max_blocks lines and
+    shows at most max_lines_per_flush lines per frame, so a flood of output
+    costs a bounded amount of GUI time; the full transcript is appended to a
+    log file on disk.
+    """
+    _wake = pyqtSignal()
+
+    def __init__(self, widget, max_blocks=5000, max_lines_per_flush=500, interval=16,
+                 transcript_dir=None, keep_transcripts=10, parent=None):
+        super().__init__(parent)
+        self.widget = widget
+        self.widget.setMaximumBlockCount(max_blocks)
+        self.max_lines_per_flush = max_lines_per_flush
+        self.transcript_dir = transcript_dir or default_transcript_dir()
+        self.keep_transcripts = keep_transcripts
+        self.transcript_path = None
+        self._transcript = None
+        self._pending = []
+        self._scheduled = False
+        self._lock = Lock()
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.flush)
+        self._wake.connect(self._timer.start)
+
+    def write(self, text):
+        """Queue text for display; safe to call from worker threads"""
+        with self._lock:
+            self._pending.append(text)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._wake.emit()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+            self._scheduled = False
+        if not pending:
+            return
+
+        text = '\n'.join(pending)
+        self._write_transcript(text)
+
+        lines = text.split('\n')
+        if len(lines) > self.max_lines_per_flush:
+            skipped = len(lines) - self.max_lines_per_flush
+            lines = [f"[... {skipped} lines omitted, full log: {self.transcript_path}]",
+                     *lines[-self.max_lines_per_flush:]]
+        scrollbar = self.widget.verticalScrollBar()
+        follow = scrollbar.value() >= scrollbar.maximum() - 4
+        self.widget.appendPlainText('\n'.join(lines))
+        if follow:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def pending(self):
+        """Number of writes waiting for the next flush"""
+        with self._lock:
+            return len(self._pending)
+
+    def _write_transcript(self, text):
+        try:
+            if self._transcript is None:
+                os.makedirs(self.transcript_dir, exist_ok=True)
+                self._prune_transcripts()
+                self.transcript_path = os.path.join(
+                    self.transcript_dir, time.strftime('terminal-%Y%m%d-%H%M%S.log')
+                )
+                self._transcript = open(self.transcript_path, 'a', encoding='utf-8')
+            self._transcript.write(text + '\n')
+            self._transcript.flush()
+        except OSError:
+            pass
+
+    def _prune_transcripts(self):
+        logs = sorted(
+            name for name in os.listdir(self.transcript_dir)
+            if name.startswith('terminal-') and name.endswith('.log')
+        )
+        for name in logs[:max(0, len(logs) - self.keep_transcripts + 1)]:
+            os.unlink(os.path.join(self.transcript_dir, name))
+
+    def close(self):
+        self.flush()
+        if self._transcript:
+            self._transcript.close()
+            self._transcript = None
 
 class PasswordDialog(QDialog):
     def __init__(self, parent=None):
@@ -125,19 +270,54 @@ class PackageWorker(QThread):
     error = pyqtSignal(str)
     output = pyqtSignal(str)
     sudo_command = pyqtSignal(list, dict)
-    package_found = pyqtSignal(dict)
+    packages_found = pyqtSignal(list)
     sudo_response = None
     sudo_event = None
 
+    BATCH_SIZE = 500
+    BATCH_WINDOW = 0.05
+    MAX_PENDING_BATCHES = 4
+    MAX_AUTH_ATTEMPTS = 3
+
     def __init__(self, function, parent=None):
         super().__init__(parent)
         self.function = function
+        self.privileged_session = getattr(parent, 'privileged_session', None) or PrivilegedSession()
         self.sudo_event = Event()
         self.sudo_response = None
         self._is_running = False
+        self._cancelled = False
         self._cleanup_lock = Event()
+        self._batch = []
+        self._batch_started = 0
+        self._pending_batches = Semaphore(self.MAX_PENDING_BATCHES)
+
+    def found(self, record):
+        """Queue a record for the GUI, emitting a batch once it is full or old enough"""
+        if not self._batch:
+            self._batch_started = time.monotonic()
+        self._batch.append(record)
+        if (len(self._batch) >= self.BATCH_SIZE or
+                time.monotonic() - self._batch_started >= self.BATCH_WINDOW):
+            self.flush_found()
+
+    def flush_found(self):
+        """Emit the queued records, waiting while the GUI is still behind on earlier batches"""
+        if not self._batch:
+            return
+        while not self._pending_batches.acquire(timeout=0.1):
+            if not self._is_running:
+                self._batch = []
+                return
+        batch, self._batch = self._batch, []
+        self.packages_found.emit(batch)
 
-    def run_sudo_command(self, cmd, **kwargs):
+    def batch_consumed(self):
+        """Called on the GUI thread once a packages_found batch has been handled"""
+        self._pending_batches.release()
+
+    def request_gui(self, cmd, **kwargs):
+        """Ask the GUI thread to handle cmd (a dialog or password prompt) and wait for its reply"""
         self.sudo_command.emit(cmd, kwargs)
         self.sudo_event.wait()
         self.sudo_event.clear()
@@ -145,16 +325,106 @@ class PackageWorker(QThread):
             raise self.sudo_response
         return self.sudo_response
 
+    def run_sudo_command(self, cmd, **kwargs):
+        """Run cmd as root on this thread, streaming its output as it is produced
+
+        Commands go through the window's privileged session, which is only
+        (re)started when it has expired; the GUI thread is involved just for
+        the password prompt.
+        """
+        session = self.privileged_session
+        if not session.is_alive():
+            for attempt in range(self.MAX_AUTH_ATTEMPTS):
+                password = self.request_gui(['authenticate'])
+                if password is None:
+                    raise subprocess.CalledProcessError(1, cmd, "Authentication cancelled by user")
+                try:
+                    session.start(password)
+                    break
+                except AuthenticationError as e:
+                    self.request_gui(['forget_password'])
+                    if "incorrect password" not in str(e).lower() and "try again" not in str(e).lower():
+                        self.output.emit(f"Sudo verification failed: {e}")
+                        raise subprocess.CalledProcessError(1, cmd, str(e))
+                    self.output.emit("Incorrect password, please try again")
+            else:
+                self.output.emit("Maximum authentication attempts reached")
+                raise subprocess.CalledProcessError(1, cmd, "Maximum authentication attempts reached")
+
+        self.output.emit(f"Running: sudo {' '.join(cmd)}")
+        try:
+            return session.run(cmd, self.output.emit, env=kwargs.get('env'))
+        except subprocess.CalledProcessError as e:
+            self.output.emit(f"Command failed with error: {e.output}")
+            raise
+
+    def run_helper_command(self, cmd, env=None):
+        """Run an AUR helper as the user on this thread, streaming its output
+
+        Helpers refuse to run as root and call sudo themselves; their
+        password prompts are answered through SUDO_ASKPASS with the same
+        password dialog and cache as run_sudo_command.
+        """
+        cancelled = []
+
+        def password():
+            answer = self.request_gui(['authenticate'])
+            if answer is None:
+                cancelled.append(True)
+            return answer
+
+        self.output.emit(f"Running: {' '.join(cmd)}")
+        lines = []
+        process_env = {**os.environ, **{key: str(value) for key, value in (env or {}).items()}}
+        with AskpassServer(password, lambda: self.request_gui(['forget_password']),
+                           search_path=process_env.get('PATH')) as askpass_server:
+            process_env.update(askpass_server.env())
+            try:
+                process = subprocess.Popen(
+                    cmd,
+                    stdin=subprocess.DEVNULL,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    bufsize=1,
+                    env=process_env,
+                    # Without a controlling terminal sudo asks SUDO_ASKPASS instead of a tty
+                    start_new_session=True
+                )
+            except OSError as e:
+                raise subprocess.CalledProcessError(127, cmd, str(e))
+            for line in process.stdout:
+                line = line.rstrip('\n')
+                lines.append(line)
+                self.output.emit(line)
+            returncode = process.wait()
+
+        if cancelled:
+            raise subprocess.CalledProcessError(returncode or 1, cmd, "Authentication cancelled by user")
+        if returncode != 0:
+            error_msg = '\n'.join(lines[-20:]) or "Unknown error occurred"
+            self.output.emit(f"Command failed with error: {error_msg}")
+            raise subprocess.CalledProcessError(returncode, cmd, error_msg)
+        return '\n'.join(lines)
+
     def set_sudo_response(self, response):
         self.sudo_response = response
         self.sudo_event.set()
 
+    def cancel(self):
+        """Ask the job to stop without waiting; a job cancelled while still queued never runs"""
+        self._cancelled = True
+        self._is_running = False
+
     def run(self):
         try:
+            if self._cancelled:
+                return
             self._is_running = True
             self._cleanup_lock.clear()
             if self.function:
                 self.function(self)
+                self.flush_found()
             else:
                 self.error.emit("Function is not set.")
         except Exception as e:
@@ -167,6 +437,7 @@ class PackageWorker(QThread):
 
     def stop(self):
         """Safely stop the worker thread"""
+        self._cancelled = True
         if self._is_running:
             self._is_running = False
             self.sudo_event.set()
@@ -178,21 +449,65 @@ class PackageWorker(QThread):
         self.stop()
 
 class AURManager(QMainWindow):
-    def __init__(self):
+    # Downloads above this get a warning before the transaction starts
+    LARGE_DOWNLOAD = 1 << 30
+
+    def __init__(self, dbpath=DEFAULT_DBPATH, conf=DEFAULT_CONF, aur_url=AUR_RPC_URL):
         super().__init__()
         self.setup_ui()
         
-        self.installed_packages = self.get_installed_packages()
-        
-        self.output_signals = OutputSignals()
-        self.output_signals.output.connect(self.log_to_terminal)
-
-        self.current_worker = None
-        self._worker_lock = Event()
+        self.local_db = LocalDatabase(dbpath)
+        self.sync_db = SyncDatabase(dbpath, conf)
+        self.aur = AURClient(aur_url)
+        self.aur_snapshot = AURSnapshot()
+        self.aur_updates = AURUpdateChecker(self.aur)
+        self.update_engine = UpdateEngine(self.local_db, dbpath, conf, session=self.aur.session)
+        self.package_prefetcher = PackagePrefetcher(self.update_engine.sync_db, conf, session=self.aur.session)
+        self.dep_graph = DependencyGraph(self.local_db)
+        self.resolver = InstallResolver(self.sync_db, self.local_db)
+        self.info_store = PackageInfoStore(
+            self.local_db, self.sync_db, self.aur, self.aur_snapshot, self.dep_graph
+        )
+        self.catalog = CatalogSnapshot(dbpath=dbpath)
+        self.helpers = HelperRegistry()
+        self._announced_helper = None
+        self.catalog_current = False
+        self.databases_loaded = False
+        self.installed_packages = {}
+
+        self.scheduler = JobScheduler(dbpath=dbpath, parent=self)
+        self.scheduler.waiting_for_lock.connect(self.waiting_for_lock)
+        self.update_worker = None
+        self.details_worker = None
+        self.prefetch_worker = None
+        self.download_worker = None
+        self.database_worker = None
+        self.roots_worker = None
+        self.resolve_worker = None
+        self.removal_worker = None
+
+        self.search_worker = None
+        self._last_search = None
+        self._snapshot_search = False
 
         self.sudo_password = None
         self.sudo_timestamp = None
         self.sudo_timeout = 300
+        self.privileged_session = PrivilegedSession(idle_timeout=self.sudo_timeout)
+
+        # Transactions made outside Oracle show up as changes to the database directories
+        self.database_refresh_timer = QTimer(self)
+        self.database_refresh_timer.setSingleShot(True)
+        self.database_refresh_timer.setInterval(1000)
+        self.database_refresh_timer.timeout.connect(self.refresh_databases)
+        self.database_watcher = QFileSystemWatcher(self)
+        for path in (self.local_db.path, self.sync_db.path):
+            if os.path.isdir(path):
+                self.database_watcher.addPath(path)
+        self.database_watcher.directoryChanged.connect(self.database_refresh_timer.start)
+
+        # Nothing is parsed before the first paint; the snapshot and databases load in the background
+        QTimer.singleShot(0, self.load_catalog)
 
     def setup_ui(self):
         self.setWindowTitle("Oracle - AUR Helper Wrapper")
@@ -218,15 +533,15 @@ class AURManager(QMainWindow):
             QTabBar::tab:selected {
                 background-color: #0066cc;
             }
-            QTreeWidget {
+            QTableView {
                 background-color: #1e1e1e;
                 alternate-background-color: #262626;
                 border: none;
             }
-            QTreeWidget::item {
+            QTableView::item {
                 padding: 4px;
             }
-            QTreeWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #0066cc;
             }
             QPushButton {
@@ -244,7 +559,7 @@ class AURManager(QMainWindow):
                 border: 1px solid #555555;
                 border-radius: 4px;
             }
-            QTextEdit {
+            QPlainTextEdit {
                 background-color: #1e1e1e;
                 border: none;
                 font-family: 'Consolas', monospace;
@@ -256,11 +571,15 @@ class AURManager(QMainWindow):
         main_layout = QVBoxLayout(central_widget)
 
         self.tab_widget = QTabWidget()
+        self.tab_widget.currentChanged.connect(self.build_tab)
         main_layout.addWidget(self.tab_widget)
 
+        # Only the visible tab is built before the first paint, the rest when first opened
+        self._tab_builders = {}
         self.setup_search_tab()
-        self.setup_updates_tab()
-        self.setup_about_tab()
+        self.add_deferred_tab("Updates", self.setup_updates_tab)
+        self.add_deferred_tab("Roots", self.setup_roots_tab)
+        self.add_deferred_tab("About", self.setup_about_tab)
 
         self.setup_terminal_output()
 
@@ -276,21 +595,56 @@ class AURManager(QMainWindow):
         self.search_input = QLineEdit()
         self.search_input.setPlaceholderText("Search packages...")
         self.search_input.returnPressed.connect(self.search_packages)
+        self.search_input.textChanged.connect(self.schedule_search)
         search_layout.addWidget(self.search_input)
 
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(250)
+        self.search_timer.timeout.connect(self.search_packages)
+
         search_button = QPushButton("Search")
         search_button.clicked.connect(self.search_packages)
         search_layout.addWidget(search_button)
+
+        self.offline_aur_checkbox = QCheckBox("Offline AUR")
+        self.offline_aur_checkbox.setToolTip(
+            "Search and check AUR updates against the local AUR metadata snapshot"
+        )
+        search_layout.addWidget(self.offline_aur_checkbox)
         layout.addLayout(search_layout)
 
-        self.package_tree = QTreeWidget()
-        self.package_tree.setHeaderLabels(["Status", "Name", "Version", "Source", "Description"])
-        self.package_tree.setAlternatingRowColors(True)
+        self.package_model = PackageTableModel(
+            PackageRecord._fields,
+            ["Status", "Name", "Version", "Source", "Description"],
+            self
+        )
+        self.package_tree = self.create_package_view(self.package_model)
         self.package_tree.setColumnWidth(0, 30)
         self.package_tree.setColumnWidth(1, 200)
         self.package_tree.setColumnWidth(2, 120)
         self.package_tree.setColumnWidth(3, 100)
-        layout.addWidget(self.package_tree)
+        self.package_tree.selectionModel().currentRowChanged.connect(self.show_package_details)
+
+        self.details_view = QTextBrowser()
+        self.details_view.setOpenExternalLinks(True)
+        self.details_view.setPlaceholderText("Select a package to see its details")
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        splitter.addWidget(self.package_tree)
+        splitter.addWidget(self.details_view)
+        splitter.setStretchFactor(0, 3)
+        splitter.setStretchFactor(1, 1)
+        layout.addWidget(splitter)
+
+        # Fetch AUR details for the rows around the viewport once scrolling settles
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(150)
+        self.prefetch_timer.timeout.connect(self.prefetch_details)
+        self.package_tree.verticalScrollBar().valueChanged.connect(self.prefetch_timer.start)
+        self.package_model.rowsInserted.connect(self.prefetch_timer.start)
+        self.package_model.layoutChanged.connect(self.prefetch_timer.start)
 
         button_layout = QHBoxLayout()
         install_button = QPushButton("Install")
@@ -306,8 +660,18 @@ class AURManager(QMainWindow):
 
         self.tab_widget.addTab(search_widget, "Search")
 
-    def setup_updates_tab(self):
-        updates_widget = QWidget()
+    def add_deferred_tab(self, title, setup):
+        widget = QWidget()
+        self._tab_builders[widget] = setup
+        self.tab_widget.addTab(widget, title)
+
+    def build_tab(self, index):
+        widget = self.tab_widget.widget(index)
+        setup = self._tab_builders.pop(widget, None)
+        if setup:
+            setup(widget)
+
+    def setup_updates_tab(self, updates_widget):
         layout = QVBoxLayout(updates_widget)
 
         title_label = QLabel("System Updates")
@@ -322,22 +686,103 @@ class AURManager(QMainWindow):
         update_all_button = QPushButton("Update All")
         update_all_button.clicked.connect(self.update_all)
         button_layout.addWidget(update_all_button)
+
+        self.devel_checkbox = QCheckBox("Check VCS (-git) packages")
+        button_layout.addWidget(self.devel_checkbox)
+
+        self.download_checkbox = QCheckBox("Prefetch updates in background")
+        self.download_checkbox.setToolTip(
+            "Download pending repository updates at low priority as soon as they are found"
+        )
+        self.download_checkbox.setChecked(True)
+        button_layout.addWidget(self.download_checkbox)
+
+        self.parallel_build_checkbox = QCheckBox("Build AUR updates in parallel")
+        self.parallel_build_checkbox.setToolTip(
+            "Build AUR updates with makepkg over their dependency graph instead of the AUR helper.\n"
+            "PGP keys listed in validpgpkeys must already be in your keyring."
+        )
+        self.parallel_build_checkbox.setEnabled(shutil.which('makepkg') is not None)
+        button_layout.addWidget(self.parallel_build_checkbox)
+
+        refresh_snapshot_button = QPushButton("Refresh AUR Snapshot")
+        refresh_snapshot_button.clicked.connect(self.refresh_aur_snapshot)
+        button_layout.addWidget(refresh_snapshot_button)
         
         button_layout.addStretch()
         layout.addLayout(button_layout)
 
-        self.updates_tree = QTreeWidget()
-        self.updates_tree.setHeaderLabels(["Name", "Current Version", "New Version", "Source"])
-        self.updates_tree.setAlternatingRowColors(True)
+        self.updates_model = PackageTableModel(
+            UpdateRecord._fields,
+            ["Name", "Current Version", "New Version", "Source"],
+            self
+        )
+        self.updates_tree = self.create_package_view(self.updates_model)
         self.updates_tree.setColumnWidth(0, 200)
         self.updates_tree.setColumnWidth(1, 200)
         self.updates_tree.setColumnWidth(2, 200)
         layout.addWidget(self.updates_tree)
 
-        self.tab_widget.addTab(updates_widget, "Updates")
+    def setup_roots_tab(self, roots_widget):
+        layout = QVBoxLayout(roots_widget)
+
+        title_label = QLabel("System Roots")
+        title_label.setFont(QFont("", 12, QFont.Weight.Bold))
+        layout.addWidget(title_label)
+
+        input_layout = QHBoxLayout()
+        self.roots_input = QLineEdit()
+        self.roots_input.setPlaceholderText("Roots to inspect, e.g. / /var/lib/archbuild/extra-x86_64/root")
+        self.roots_input.setText("/")
+        self.roots_input.returnPressed.connect(self.inspect_roots)
+        input_layout.addWidget(self.roots_input)
+
+        inspect_button = QPushButton("Inspect")
+        inspect_button.clicked.connect(self.inspect_roots)
+        input_layout.addWidget(inspect_button)
 
-    def setup_about_tab(self):
-        about_widget = QWidget()
+        self.roots_sync_checkbox = QCheckBox("Refresh databases")
+        self.roots_sync_checkbox.setToolTip(
+            "Download each root's sync databases into its private copy before comparing"
+        )
+        self.roots_sync_checkbox.setChecked(True)
+        input_layout.addWidget(self.roots_sync_checkbox)
+        layout.addLayout(input_layout)
+
+        self.roots_model = PackageTableModel(
+            RootRecord._fields,
+            ["Root", "Installed", "Updates", "Orphans", "Status"],
+            self
+        )
+        self.roots_tree = self.create_package_view(self.roots_model)
+        self.roots_tree.setColumnWidth(0, 350)
+        layout.addWidget(self.roots_tree)
+
+    def create_package_view(self, model):
+        """Create a sortable view that only lays out and renders the rows in its viewport"""
+        view = QTableView()
+        view.setModel(create_proxy(model, view))
+        view.setShowGrid(False)
+        view.setWordWrap(False)
+        view.setAlternatingRowColors(True)
+        view.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        view.setSelectionMode(QTableView.SelectionMode.ExtendedSelection)
+        view.verticalHeader().setVisible(False)
+        view.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        view.verticalHeader().setDefaultSectionSize(view.fontMetrics().height() + 10)
+        view.horizontalHeader().setStretchLastSection(True)
+        view.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        view.setSortingEnabled(True)
+        return view
+
+    def selected_packages(self, view):
+        """Return the records behind the selected rows of a package view"""
+        proxy = view.model()
+        rows = sorted({proxy.mapToSource(index).row() for index in view.selectionModel().selectedRows()})
+        model = proxy.sourceModel()
+        return [model.record(row) for row in rows]
+
+    def setup_about_tab(self, about_widget):
         layout = QVBoxLayout(about_widget)
         layout.setSpacing(20)
         layout.setContentsMargins(20, 20, 20, 20)
@@ -361,8 +806,6 @@ class AURManager(QMainWindow):
 
         layout.addStretch()
 
-        self.tab_widget.addTab(about_widget, "About")
-
     def setup_terminal_output(self):
         toggle_layout = QHBoxLayout()
         self.terminal_checkbox = QCheckBox("Show Terminal Output")
@@ -375,10 +818,11 @@ class AURManager(QMainWindow):
         self.terminal_frame.setVisible(False)
         terminal_layout = QVBoxLayout(self.terminal_frame)
 
-        self.terminal_output = QTextEdit()
+        self.terminal_output = QPlainTextEdit()
         self.terminal_output.setReadOnly(True)
         self.terminal_output.setMinimumHeight(150)
         terminal_layout.addWidget(self.terminal_output)
+        self.log_sink = LogSink(self.terminal_output, parent=self)
 
         self.centralWidget().layout().addWidget(self.terminal_frame)
 
@@ -386,27 +830,79 @@ class AURManager(QMainWindow):
         self.terminal_frame.setVisible(state == Qt.CheckState.Checked.value)
 
     def log_to_terminal(self, text):
-        self.terminal_output.append(text)
-        self.terminal_output.verticalScrollBar().setValue(
-            self.terminal_output.verticalScrollBar().maximum()
+        """Append text to the terminal; safe to call from worker threads"""
+        self.log_sink.write(text)
+
+    def load_catalog(self):
+        """Show the previous session's installed set and repo catalog, then load the real databases behind it"""
+        def load_task(worker):
+            worker.loaded = self.catalog.load()
+            worker.current = worker.loaded and self.catalog.is_current()
+
+        worker = PackageWorker(load_task, self)
+        worker.output.connect(self.log_to_terminal, Qt.ConnectionType.DirectConnection)
+        worker.finished.connect(lambda w=worker: self.catalog_loaded(w))
+        self.scheduler.submit(worker)
+
+    def catalog_loaded(self, worker):
+        if getattr(worker, 'loaded', False) and not self.databases_loaded:
+            self.catalog_current = worker.current
+            self.apply_installed(self.catalog.installed)
+            if not worker.current:
+                self.log_to_terminal("Package databases changed since the last session, refreshing...")
+        self.refresh_databases()
+
+    def refresh_databases(self):
+        """Parse the local and sync databases in the background and correct whatever the window shows"""
+        if self.database_worker:
+            self.database_refresh_timer.start()
+            return
+
+        def refresh_task(worker):
+            stamps = database_stamps(self.local_db.dbpath)
+            worker.installed = self.get_installed_packages()
+            self.sync_db.refresh()
+            if not self.catalog.is_current(stamps):
+                try:
+                    self.catalog.save(self.local_db, self.sync_db, stamps)
+                except OSError as e:
+                    worker.output.emit(f"Could not save the package snapshot: {e}")
+
+        worker = PackageWorker(refresh_task, self)
+        worker.output.connect(self.log_to_terminal, Qt.ConnectionType.DirectConnection)
+        worker.error.connect(lambda e: self.log_to_terminal(f"Error loading package databases: {e}"))
+        worker.finished.connect(lambda w=worker: self.databases_refreshed(w))
+        self.database_worker = worker
+        self.scheduler.submit(worker)
+
+    def databases_refreshed(self, worker):
+        if worker is self.database_worker:
+            self.database_worker = None
+        if not hasattr(worker, 'installed'):
+            return
+        self.databases_loaded = True
+        self.apply_installed(worker.installed)
+        # Results answered from an outdated snapshot may list the wrong versions or packages
+        searching = self.search_worker is not None and self.search_worker.from_snapshot
+        if (self._snapshot_search or searching) and not self.catalog_current:
+            self._last_search = None
+            self.search_packages()
+        self._snapshot_search = False
+        self.catalog_current = True
+
+    def apply_installed(self, installed):
+        """Switch to a new installed set, fixing the status of rows already on screen"""
+        self.installed_packages = installed
+        self.package_model.update_column(
+            PackageRecord._fields.index('status'),
+            lambda record: "✓" if record['name'] in installed else ""
         )
 
     def get_installed_packages(self):
-        try:
-            result = subprocess.run(
-                ["pacman", "-Q"],
-                capture_output=True,
-                text=True,
-                check=True
-            )
-            packages = {}
-            for line in result.stdout.splitlines():
-                if line.strip():
-                    name, version = line.split()
-                    packages[name] = version
-            return packages
-        except subprocess.CalledProcessError:
-            return {}
+        """Read installed packages from the local pacman database, reparsing only changed entries"""
+        self.local_db.refresh()
+        self.dep_graph.sync()
+        return self.local_db.installed()
 
     def get_cached_sudo_password(self):
         """Check if we have a valid cached sudo password"""
@@ -425,114 +921,9 @@ class AURManager(QMainWindow):
         self.sudo_password = password
         self.sudo_timestamp = time.time()
 
-    def run_sudo_command(self, cmd, **kwargs):
-        """Run a command with sudo using GUI password prompt"""
-        max_retries = 3
-        attempt = 0
-        
-        while attempt < max_retries:
-            try:
-                password = self.get_cached_sudo_password()
-                
-                if password is None:
-                    dialog = PasswordDialog(self)
-                    result = dialog.get_password()
-                    
-                    if result[0] is None:
-                        self.log_to_terminal("Authentication cancelled by user")
-                        raise subprocess.CalledProcessError(1, cmd, "Authentication cancelled by user")
-                        
-                    password = result[0]
-                    if result[1]:
-                        self.cache_sudo_password(password)
-                
-                verify_process = subprocess.Popen(
-                    ["sudo", "-S", "true"],
-                    stdin=subprocess.PIPE,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True
-                )
-                
-                verify_stdout, verify_stderr = verify_process.communicate(input=password + "\n")
-                
-                if verify_process.returncode != 0:
-                    if "incorrect password" in verify_stderr.lower():
-                        self.sudo_password = None
-                        self.sudo_timestamp = None
-                        self.log_to_terminal("Incorrect password, please try again")
-                        attempt += 1
-                        continue
-                    else:
-                        self.log_to_terminal(f"Sudo verification failed: {verify_stderr}")
-                        raise subprocess.CalledProcessError(verify_process.returncode, cmd, verify_stderr)
-                
-                safe_env = {
-                    'PATH': '/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin',
-                    'HOME': os.environ.get('HOME', ''),
-                    'USER': os.environ.get('USER', ''),
-                    'LANG': os.environ.get('LANG', 'C.UTF-8'),
-                    'DISPLAY': os.environ.get('DISPLAY', ''),
-                    'XAUTHORITY': os.environ.get('XAUTHORITY', '')
-                }
-                
-                if 'env' in kwargs:
-                    safe_env.update(kwargs.pop('env'))
-                
-                process = subprocess.Popen(
-                    ["sudo", "-S"] + cmd,
-                    stdin=subprocess.PIPE,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                    text=True,
-                    env=safe_env,
-                    **kwargs
-                )
-                
-                self.log_to_terminal(f"Running: sudo {' '.join(cmd)}")
-                stdout, stderr = process.communicate(input=password + "\n")
-                
-                if stdout:
-                    self.log_to_terminal(stdout)
-                if stderr:
-                    self.log_to_terminal(stderr)
-                
-                if process.returncode != 0:
-                    error_msg = stderr if stderr else stdout if stdout else "Unknown error occurred"
-                    self.log_to_terminal(f"Command failed with error: {error_msg}")
-                    raise subprocess.CalledProcessError(process.returncode, cmd, error_msg)
-                
-                return stdout
-                
-            except subprocess.CalledProcessError as e:
-                if "incorrect password" in str(e).lower() and attempt < max_retries - 1:
-                    self.sudo_password = None
-                    self.sudo_timestamp = None
-                    attempt += 1
-                    self.log_to_terminal("Incorrect password, please try again")
-                    continue
-                raise
-            except Exception as e:
-                self.log_to_terminal(f"Error in sudo command: {str(e)}")
-                raise
-            
-        if attempt >= max_retries:
-            self.log_to_terminal("Maximum authentication attempts reached")
-            raise subprocess.CalledProcessError(1, cmd, "Maximum authentication attempts reached")
-
     def run_with_output(self, cmd, **kwargs):
         """Run a command and capture output to terminal"""
-        safe_env = {
-            'PATH': '/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin',
-            'HOME': os.environ.get('HOME', ''),
-            'USER': os.environ.get('USER', ''),
-            'LANG': os.environ.get('LANG', 'C.UTF-8')
-        }
-        
-        if 'env' in kwargs:
-            safe_env.update(kwargs.pop('env'))
-            
-        kwargs['env'] = safe_env
+        kwargs['env'] = safe_env(kwargs.pop('env', None))
         
         try:
             process = subprocess.Popen(
@@ -550,7 +941,7 @@ class AURManager(QMainWindow):
                 if output == '' and process.poll() is not None:
                     break
                 if output:
-                    self.output_signals.output.emit(output.strip())
+                    self.log_to_terminal(output.rstrip())
             
             return process.poll()
             
@@ -558,137 +949,176 @@ class AURManager(QMainWindow):
             self.log_to_terminal(f"Error in command execution: {str(e)}")
             raise
 
+    def schedule_search(self, text):
+        """Debounce keystrokes so a search only starts once typing pauses"""
+        if len(text.strip()) >= 2:
+            self.search_timer.start()
+        else:
+            self.search_timer.stop()
+
     def search_packages(self):
-        query = self.search_input.text()
+        self.search_timer.stop()
+        query = self.search_input.text().strip()
         if not query:
             return
+        offline_aur = self.offline_aur_checkbox.isChecked()
+
+        # A query extending the last completed one can only narrow its results
+        previous = self._last_search
+        if previous and previous[1] == offline_aur and query.lower().startswith(previous[0].lower()):
+            self.refine_search(query, offline_aur, previous[2])
+            return
 
         def search_task(worker):
             worker.output.emit(f"\nSearching for: {query}")
+            complete = True
             
             # Search official repositories
             try:
                 worker.output.emit("Searching official repositories...")
-                repo_results = subprocess.run(
-                    ["pacman", "-Ss", query],
-                    capture_output=True,
-                    text=True
-                )
-                
-                if repo_results.returncode == 0:
-                    lines = repo_results.stdout.strip().split('\n')
-                    for i in range(0, len(lines), 2):
-                        if i + 1 >= len(lines):
-                            break
-                            
-                        pkg_line = lines[i]
-                        desc_line = lines[i + 1]
-                        
-                        try:
-                            parts = pkg_line.split()
-                            repo_name = parts[0]
-                            repo, name = repo_name.split('/')
-                            version = parts[1]
-                            description = desc_line.strip()
-                            
-                            worker.package_found.emit({
-                                'status': "✓" if name in self.installed_packages else "",
-                                'name': name,
-                                'version': version,
-                                'source': repo,
-                                'description': description
-                            })
-                        except Exception as e:
-                            worker.output.emit(f"Warning: Could not parse package line: {pkg_line}")
-
-            except subprocess.CalledProcessError as e:
+                if not self.databases_loaded and self.catalog.packages:
+                    # Still parsing in the background; answer from the last session's catalog
+                    worker.from_snapshot = True
+                    packages = self.catalog.search(query)
+                else:
+                    reloaded = self.sync_db.refresh()
+                    if reloaded:
+                        worker.output.emit(f"Loaded sync databases: {', '.join(sorted(reloaded))}")
+                    packages = self.sync_db.search(query)
+
+                for pkg in packages:
+                    if not worker._is_running:
+                        return
+                    name = pkg['name']
+                    record = PackageRecord(
+                        "✓" if name in self.installed_packages else "",
+                        name,
+                        pkg['version'],
+                        pkg['repo'],
+                        pkg.get('desc', '')
+                    )
+                    keywords = [strip_depver(p) for p in pkg.get('provides', ())] + pkg.get('groups', [])
+                    worker.results.append((record, self._search_haystack(record, keywords)))
+                    worker.found(record)
+                worker.flush_found()
+
+            except Exception as e:
+                complete = False
                 worker.output.emit(f"Error searching repositories: {str(e)}")
 
+            if not worker._is_running:
+                return
+
             # Search AUR
             try:
-                aur_helper = self.detect_aur_helper()
-                if aur_helper:
+                if offline_aur:
+                    worker.output.emit("Searching offline AUR snapshot...")
+                    if self.aur_snapshot.is_empty():
+                        worker.output.emit("AUR snapshot is empty, use Refresh AUR Snapshot in the Updates tab")
+                    aur_source = self.aur_snapshot
+                else:
                     worker.output.emit("Searching AUR...")
-                    result = subprocess.run(
-                        [*aur_helper, '-Ss', query],
-                        capture_output=True,
-                        text=True
+                    aur_source = self.aur
+                    # The RPC refuses single-character queries, so there is nothing to refine from
+                    if max(len(term) for term in query.split()) < 2:
+                        complete = False
+
+                for pkg in aur_source.search(query):
+                    if not worker._is_running:
+                        return
+                    name = pkg['Name']
+                    record = PackageRecord(
+                        "✓" if name in self.installed_packages else "",
+                        name,
+                        pkg['Version'],
+                        "AUR",
+                        pkg.get('Description') or ""
                     )
-                    
-                    if result.returncode == 0 and result.stdout.strip():
-                        lines = result.stdout.strip().split('\n')
-                        i = 0
-                        while i < len(lines):
-                            line = lines[i].strip()
-                            if not line:
-                                i += 1
-                                continue
-                                
-                            try:
-                                # Handle different AUR helper output formats
-                                if aur_helper[0] == 'yay':
-                                    if line.startswith('aur/'):
-                                        parts = line.split()
-                                        name = parts[0].split('/')[1]
-                                        version = parts[1]
-                                        description = lines[i + 1].strip() if i + 1 < len(lines) else ""
-                                        i += 2
-                                    else:
-                                        i += 1
-                                        continue
-                                else:  # Generic format for other helpers
-                                    parts = line.split()
-                                    if len(parts) >= 2:
-                                        name = parts[0].split('/')[-1]
-                                        version = parts[1]
-                                        description = lines[i + 1].strip() if i + 1 < len(lines) else ""
-                                        i += 2
-                                    else:
-                                        i += 1
-                                        continue
-                                
-                                worker.package_found.emit({
-                                    'status': "✓" if name in self.installed_packages else "",
-                                    'name': name,
-                                    'version': version,
-                                    'source': "AUR",
-                                    'description': description
-                                })
-                            except Exception as e:
-                                worker.output.emit(f"Warning: Could not parse AUR package line: {line}")
-                                i += 1
+                    worker.results.append((record, self._search_haystack(record)))
+                    worker.found(record)
 
             except Exception as e:
+                complete = False
                 worker.output.emit(f"Error searching AUR: {str(e)}")
 
-        self.package_tree.clear()
+            worker.search_complete = complete and worker._is_running
+
+        self.cancel_search()
+        self.package_model.clear()
         worker = PackageWorker(search_task, self)
-        worker.output.connect(self.log_to_terminal)
-        worker.package_found.connect(self.add_package_to_tree)
+        worker.results = []
+        worker.search_complete = False
+        worker.from_snapshot = False
+        worker.output.connect(self.log_to_terminal, Qt.ConnectionType.DirectConnection)
+        worker.packages_found.connect(lambda batch, w=worker: self.search_results_found(w, batch))
         worker.error.connect(lambda e: QMessageBox.critical(self, "Error", f"Search failed: {e}"))
-        
-        self.start_worker(worker)
-
-    def add_package_to_tree(self, package_info):
-        """Add a package to the appropriate tree view"""
-        item = QTreeWidgetItem()
-        
-        if 'new_version' in package_info:
-            item.setText(0, package_info['name'])
-            item.setText(1, package_info['current_version'])
-            item.setText(2, package_info['new_version'])
-            item.setText(3, package_info['source'])
-            self.updates_tree.addTopLevelItem(item)
+        worker.finished.connect(lambda w=worker, q=query: self.search_finished(w, q, offline_aur))
+
+        self.search_worker = worker
+        self.scheduler.submit(worker)
+
+    def _search_haystack(self, record, keywords=()):
+        return '\n'.join([record.name, record.description, *keywords]).lower()
+
+    def refine_search(self, query, offline_aur, results):
+        """Filter the previous result set instead of running a new search"""
+        self.cancel_search()
+        terms = query.lower().split()
+        installed = self.installed_packages
+        results = [
+            (record._replace(status="✓" if record.name in installed else ""), haystack)
+            for record, haystack in results
+            if all(term in haystack for term in terms)
+        ]
+        self.package_model.clear()
+        self.add_packages_to_tree([record for record, _ in results])
+        self._last_search = (query, offline_aur, results)
+        self.log_to_terminal(f"\nRefined search for: {query} ({len(results)} results)")
+
+    def cancel_search(self):
+        """Supersede the in-flight search without waiting for its thread"""
+        worker = self.search_worker
+        if worker:
+            worker.cancel()
+            self.search_worker = None
+
+    def search_results_found(self, worker, batch):
+        try:
+            if worker is self.search_worker:
+                self.add_packages_to_tree(batch)
+        finally:
+            worker.batch_consumed()
+
+    def search_finished(self, worker, query, offline_aur):
+        if worker is self.search_worker:
+            self.search_worker = None
+            self._snapshot_search = worker.from_snapshot
+            if worker.search_complete:
+                self._last_search = (query, offline_aur, worker.results)
+
+    def add_packages_to_tree(self, records):
+        """Add a batch of PackageRecords, UpdateRecords or RootRecords to the matching view's model"""
+        if not records:
+            return
+        if isinstance(records[0], UpdateRecord):
+            self.updates_model.add_rows(records)
+        elif isinstance(records[0], RootRecord):
+            self.roots_model.add_rows(records)
         else:
-            item.setText(0, package_info['status'])
-            item.setText(1, package_info['name'])
-            item.setText(2, package_info['version'])
-            item.setText(3, package_info['source'])
-            item.setText(4, package_info['description'])
-            self.package_tree.addTopLevelItem(item)
+            self.package_model.add_rows(records)
+
+    def worker_results_found(self, worker, batch):
+        try:
+            if worker is self.update_worker or worker is self.roots_worker:
+                self.add_packages_to_tree(batch)
+        finally:
+            worker.batch_consumed()
 
     def handle_sudo_command(self, cmd, kwargs):
-        """Handle sudo commands from worker threads"""
+        """Handle dialog and password requests from worker threads"""
+        worker = self.sender()
+        if not isinstance(worker, PackageWorker):
+            return
         try:
             if cmd[0] == 'show_dialog':
                 reply = QMessageBox.question(
@@ -698,31 +1128,168 @@ class AURManager(QMainWindow):
                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
                     QMessageBox.StandardButton.No if kwargs.get('default_no') else QMessageBox.StandardButton.Yes
                 )
-                if self.current_worker:
-                    self.current_worker.set_sudo_response(reply == QMessageBox.StandardButton.Yes)
+                worker.set_sudo_response(reply == QMessageBox.StandardButton.Yes)
+            elif cmd[0] == 'authenticate':
+                password = self.get_cached_sudo_password()
+                if password is None:
+                    password, remember = PasswordDialog(self).get_password()
+                    if password is None:
+                        self.log_to_terminal("Authentication cancelled by user")
+                    elif remember:
+                        self.cache_sudo_password(password)
+                worker.set_sudo_response(password)
+            elif cmd[0] == 'forget_password':
+                self.sudo_password = None
+                self.sudo_timestamp = None
+                worker.set_sudo_response(True)
             else:
-                self.log_to_terminal(f"\nExecuting sudo command: {' '.join(cmd)}")
-                result = self.run_sudo_command(cmd, **kwargs)
-                if self.current_worker:
-                    self.current_worker.set_sudo_response(result)
-        except subprocess.CalledProcessError as e:
-            self.log_to_terminal(f"Sudo command failed: {str(e)}")
-            if self.current_worker:
-                self.current_worker.set_sudo_response(e)
+                worker.set_sudo_response(ValueError(f"Unknown request: {cmd[0]}"))
         except Exception as e:
             self.log_to_terminal(f"Unexpected error in sudo command: {str(e)}")
-            if self.current_worker:
-                self.current_worker.set_sudo_response(e)
+            worker.set_sudo_response(e)
+
+    def show_package_details(self, current, previous=None):
+        """Show the current row's details, fetching them on a worker only if they are not cached"""
+        if not current.isValid():
+            self.details_view.clear()
+            return
+        record = self.package_model.record(self.package_tree.model().mapToSource(current).row())
+        name, source = record['name'], record['source']
+        info = self.info_store.get(name, source)
+        if info is not None:
+            self.details_view.setHtml(self.render_package_details(info))
+            return
+        self.details_view.setHtml(f"<i>Loading details for {html.escape(name)}...</i>")
+
+        offline = self.offline_aur_checkbox.isChecked()
+
+        def details_task(worker):
+            worker.details = self.info_store.details(name, source, offline)
+
+        if self.details_worker:
+            self.details_worker.cancel()
+        worker = PackageWorker(details_task, self)
+        worker.details = None
+        worker.finished.connect(lambda w=worker, n=name: self.details_finished(w, n))
+        self.details_worker = worker
+        self.scheduler.submit(worker)
+
+    def details_finished(self, worker, name):
+        if worker is self.details_worker:
+            self.details_worker = None
+            if worker.details:
+                self.details_view.setHtml(self.render_package_details(worker.details))
+            else:
+                self.details_view.setHtml(f"<i>No details available for {html.escape(name)}</i>")
+
+    def prefetch_details(self):
+        """Batch-fetch AUR details for the rows in and around the viewport"""
+        if self.prefetch_worker:
+            self.prefetch_timer.start()
+            return
+        view = self.package_tree
+        proxy = view.model()
+        rows = proxy.rowCount()
+        if not rows:
+            return
+        top = max(view.rowAt(0), 0)
+        bottom = view.rowAt(view.viewport().height() - 1)
+        bottom = rows - 1 if bottom < 0 else bottom
+        margin = bottom - top + 1
+        entries = []
+        for row in range(max(top - margin, 0), min(bottom + margin, rows - 1) + 1):
+            record = self.package_model.record(proxy.mapToSource(proxy.index(row, 0)).row())
+            if record['source'] == AUR_SOURCE:
+                entries.append((record['name'], record['source']))
+        names = self.info_store.missing(entries)
+        if not names:
+            return
+
+        offline = self.offline_aur_checkbox.isChecked()
+
+        def prefetch_task(worker):
+            self.info_store.fetch(names, offline)
+
+        worker = PackageWorker(prefetch_task, self)
+        worker.finished.connect(lambda w=worker: self.prefetch_finished(w))
+        self.prefetch_worker = worker
+        self.scheduler.submit(worker, background=True)
+
+    def prefetch_finished(self, worker):
+        if worker is self.prefetch_worker:
+            self.prefetch_worker = None
+
+    def render_package_details(self, info):
+        def text(value):
+            return html.escape(str(value)) if value not in (None, '', []) else "None"
+
+        def items(values):
+            return "<br>".join(html.escape(value) for value in values) if values else "None"
+
+        url = info.get('url')
+        rows = [
+            ("Version", text(info['version'])),
+            ("Installed", text(info['installed_version'])),
+            ("Repository", text(info['repo'])),
+            ("URL", f'<a href="{html.escape(url)}">{html.escape(url)}</a>' if url else "None"),
+            ("Licenses", text(', '.join(info['licenses']))),
+            ("Depends On", items(info['depends'])),
+            ("Optional Deps", items(info['optdepends'])),
+            ("Provides", text(', '.join(info['provides']))),
+            ("Conflicts With", text(', '.join(info['conflicts']))),
+            ("Required By", text(', '.join(info['required_by']))),
+            ("Optional For", text(', '.join(info['optional_for']))),
+            ("Download Size", text(format_size(info['download_size']))),
+            ("Installed Size", text(format_size(info['installed_size']))),
+            ("Maintainer" if info['repo'] == AUR_SOURCE else "Packager", text(info['packager'])),
+            ("Last Modified" if info['repo'] == AUR_SOURCE else "Build Date", text(format_date(info['build_date']))),
+            ("Install Date", text(format_date(info['install_date'])))
+        ]
+        body = "".join(
+            f'<tr><td style="padding-right: 12px;"><b>{label}</b></td><td>{value}</td></tr>'
+            for label, value in rows
+        )
+        return (
+            f"<h3>{html.escape(info['name'])}</h3>"
+            f"<p>{html.escape(info['description'])}</p>"
+            f"<table>{body}</table>"
+        )
 
     def install_package(self):
-        selected_items = self.package_tree.selectedItems()
-        if not selected_items:
+        selected = self.selected_packages(self.package_tree)
+        if not selected:
             QMessageBox.warning(self, "Warning", "Please select a package to install")
             return
 
-        item = selected_items[0]
-        package_name = item.text(1)
-        source = item.text(3)
+        names = list(dict.fromkeys(record['name'] for record in selected))
+
+        # Refreshing the databases and building the resolver's index can take a
+        # while, so the preview is worked out on a read-only job
+        def resolve_task(worker):
+            self.sync_db.refresh()
+            self.local_db.refresh()
+            worker.preview = self.resolver.resolve(names)
+
+        if self.resolve_worker:
+            self.resolve_worker.cancel()
+        worker = PackageWorker(resolve_task, self)
+        worker.error.connect(lambda e: QMessageBox.critical(self, "Error", f"Could not resolve packages: {e}"))
+        worker.finished.connect(lambda w=worker: self.install_resolved(w, names))
+        self.resolve_worker = worker
+        self.scheduler.submit(worker)
+
+    def install_resolved(self, worker, names):
+        if worker is not self.resolve_worker:
+            return
+        self.resolve_worker = None
+        preview = getattr(worker, 'preview', None)
+        if preview is None or worker._cancelled:
+            return
+        if self.confirm_install(names, preview):
+            self.start_install(names)
+
+    def start_install(self, names):
+        label = ', '.join(names)
 
         def install_task(worker):
             try:
@@ -734,34 +1301,40 @@ class AURManager(QMainWindow):
                         worker.output.emit("\nInstallation cancelled: Authentication required for database update")
                         return
                     worker.output.emit(f"\nWarning: Failed to update package database: {str(e)}")
-                    worker.sudo_command.emit(
+                    proceed = worker.request_gui(
                         ['show_dialog'],
-                        {
-                            'title': "Database Update Failed",
-                            'message': "Failed to update package database. Do you want to continue with installation anyway?",
-                            'default_no': True
-                        }
+                        title="Database Update Failed",
+                        message="Failed to update package database. Do you want to continue with installation anyway?",
+                        default_no=True
                     )
-                    worker.sudo_event.wait()
-                    worker.sudo_event.clear()
-                    if not worker.sudo_response:
+                    if not proceed:
                         worker.output.emit("\nInstallation cancelled by user")
                         return
 
-                check_official = subprocess.run(
-                    ['pacman', '-Si', package_name],
-                    capture_output=True,
-                    text=True
-                )
-                
-                is_official = check_official.returncode == 0
-                
-                if is_official:
-                    worker.output.emit(f"\nInstalling {package_name} from official repositories...")
+                repo_packages, aur_packages = self.split_by_source(names)
+                if aur_packages:
+                    try:
+                        found = {pkg['Name'] for pkg in self.aur.info(aur_packages)}
+                    except AURError as e:
+                        worker.output.emit(f"\nWarning: Could not resolve AUR packages up front: {str(e)}")
+                        found = set(aur_packages)
+                    missing = [name for name in aur_packages if name not in found]
+                    if missing:
+                        raise Exception(f"Packages not found in the repositories or the AUR: {', '.join(missing)}")
+
+                aur_helper = None
+                if aur_packages:
+                    aur_helper = self.detect_aur_helper()
+                    if not aur_helper:
+                        raise Exception("No AUR helper found. Please install yay, paru, or another AUR helper.")
+
+                if repo_packages:
+                    worker.output.emit(
+                        f"\nInstalling {len(repo_packages)} package(s) from official repositories: "
+                        f"{', '.join(repo_packages)}"
+                    )
                     try:
-                        result = worker.run_sudo_command(['pacman', '-S', '--noconfirm', package_name])
-                        if result:
-                            worker.output.emit(result)
+                        worker.run_sudo_command(['pacman', '-S', '--noconfirm', *repo_packages])
                     except subprocess.CalledProcessError as e:
                         if "Authentication cancelled" in str(e):
                             worker.output.emit("\nInstallation cancelled: Authentication required")
@@ -772,17 +1345,14 @@ class AURManager(QMainWindow):
                     except Exception as e:
                         worker.output.emit(f"\nError installing package: {str(e)}")
                         raise
-                else:
-                    aur_helper = self.detect_aur_helper()
-                    if not aur_helper:
-                        raise Exception("No AUR helper found. Please install yay, paru, or another AUR helper.")
-                        
-                    worker.output.emit(f"\nInstalling {package_name} using {aur_helper[0]}...")
+
+                if aur_packages:
+                    worker.output.emit(
+                        f"\nInstalling {len(aur_packages)} AUR package(s) using {aur_helper.name}: "
+                        f"{', '.join(aur_packages)}"
+                    )
                     try:
-                        if aur_helper[0] == 'pamac':
-                            worker.run_sudo_command(['pamac', 'install', '--no-confirm', package_name])
-                        else:
-                            worker.run_sudo_command([*aur_helper, '-S', '--noconfirm', package_name])
+                        worker.run_helper_command(aur_helper.install_command(aur_packages))
                     except subprocess.CalledProcessError as e:
                         if "Authentication cancelled" in str(e):
                             worker.output.emit("\nInstallation cancelled: Authentication required")
@@ -793,23 +1363,64 @@ class AURManager(QMainWindow):
                         worker.output.emit(f"\nError installing package: {str(e)}")
                         raise
 
-                worker.output.emit(f"\n{package_name} installed successfully!")
+                worker.output.emit(f"\n{label} installed successfully!")
 
             except Exception as e:
                 worker.output.emit(f"\nError during installation: {str(e)}")
                 raise
 
         worker = PackageWorker(install_task, self)
-        worker.output.connect(self.log_to_terminal)
+        worker.output.connect(self.log_to_terminal, Qt.ConnectionType.DirectConnection)
         worker.error.connect(lambda e: QMessageBox.critical(self, "Error", f"Installation failed: {e}"))
         worker.sudo_command.connect(self.handle_sudo_command)
-        worker.finished.connect(lambda: self.installation_finished(package_name))
+        worker.finished.connect(lambda: self.installation_finished(label))
         
-        self.start_worker(worker)
+        self.scheduler.submit(worker, mutating=True)
+
+    def confirm_install(self, names, preview):
+        """Show what installing names would pull in (a Resolution) and ask to proceed"""
+
+        def listing(items, limit=30):
+            shown = ', '.join(items[:limit])
+            return shown + (f" and {len(items) - limit} more" if len(items) > limit else "")
+
+        lines = [f"Install {', '.join(names)}?", ""]
+        if preview.dependencies:
+            lines.append(f"New dependencies ({len(preview.dependencies)}): {listing(preview.dependencies)}")
+        if preview.upgrades:
+            lines.append(f"Upgraded along the way ({len(preview.upgrades)}): {listing(preview.upgrades)}")
+        if preview.foreign:
+            lines.append(f"From the AUR (not included in the sizes): {listing(preview.foreign)}")
+        lines.append(f"Download size: {format_size(preview.download_size)}")
+        delta = preview.installed_size_delta
+        lines.append(f"Installed size change: {'+' if delta >= 0 else '-'}{format_size(abs(delta))}")
+        if preview.conflicts:
+            lines.append("")
+            lines.append("Conflicts: " + ', '.join(f"{a} and {b}" for a, b in preview.conflicts))
+        if preview.missing:
+            lines.append("")
+            lines.append("Unresolvable dependencies: " + ', '.join(f"{dep} (for {pkg})" for pkg, dep in preview.missing))
+
+        large = preview.download_size >= self.LARGE_DOWNLOAD
+        ask = QMessageBox.warning if (large or preview.conflicts or preview.missing) else QMessageBox.question
+        reply = ask(
+            self,
+            "Large Installation" if large else "Confirm Installation",
+            '\n'.join(lines),
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        return reply == QMessageBox.StandardButton.Yes
+
+    def split_by_source(self, names):
+        """Split package names into (repo, AUR) groups using the sync databases"""
+        self.sync_db.refresh()
+        repo_packages = [name for name in names if name in self.sync_db]
+        aur_packages = [name for name in names if name not in self.sync_db]
+        return repo_packages, aur_packages
 
     def installation_finished(self, package_name):
         """Handle post-installation tasks"""
-        self.installed_packages = self.get_installed_packages()
+        self.apply_installed(self.get_installed_packages())
         self.log_to_terminal(f"\n{package_name} installed successfully")
         
         QMessageBox.information(
@@ -819,219 +1430,156 @@ class AURManager(QMainWindow):
             "You can check for updates manually using the Updates tab."
         )
 
-    def safe_check_updates(self):
-        """Safely check for updates after ensuring previous workers are cleaned up"""
-        if self.current_worker and self.current_worker._is_running:
-            QTimer.singleShot(1000, self.safe_check_updates)
-            return
-        
-        self.current_worker = None
-        
-        self.check_updates()
-
     def installation_error(self, package_name, error):
         self.log_to_terminal(f"\nError: {error}")
         QMessageBox.critical(self, "Error", f"Failed to install package: {error}")
 
     def remove_package(self):
-        selected_items = self.package_tree.selectedItems()
-        if not selected_items:
+        selected = self.selected_packages(self.package_tree)
+        if not selected:
             QMessageBox.warning(self, "Warning", "Please select a package to remove")
             return
 
-        item = selected_items[0]
-        package_name = item.text(1)
+        names = list(dict.fromkeys(record['name'] for record in selected))
+
+        # Before the databases are loaded this is a full local DB parse and
+        # graph build, so the impact is worked out on a read-only job
+        def preview_task(worker):
+            self.local_db.refresh()
+            self.dep_graph.sync()
+            installed = [name for name in names if self.local_db.get(name)]
+            targets = set(installed)
+            dependents = sorted(self.dep_graph.removal_closure(targets) - targets)
+            orphans = sorted(self.dep_graph.orphans_after(targets | set(dependents)))
+            worker.preview = (installed, dependents, orphans)
+
+        if self.removal_worker:
+            self.removal_worker.cancel()
+        worker = PackageWorker(preview_task, self)
+        worker.error.connect(lambda e: QMessageBox.critical(self, "Error", f"Could not check dependents: {e}"))
+        worker.finished.connect(lambda w=worker: self.removal_resolved(w, names))
+        self.removal_worker = worker
+        self.scheduler.submit(worker)
+
+    def removal_resolved(self, worker, names):
+        if worker is not self.removal_worker:
+            return
+        self.removal_worker = None
+        preview = getattr(worker, 'preview', None)
+        if preview is None or worker._cancelled:
+            return
+        installed, dependents, orphans = preview
+        if not installed:
+            QMessageBox.warning(self, "Warning", f"{', '.join(names)} is not installed")
+            return
+        label = ', '.join(installed)
 
-        try:
-            result = subprocess.run(
-                ["sudo", "pacman", "-Qi", package_name],
-                capture_output=True,
-                text=True,
-                check=True
+        if dependents:
+            title = "Dependencies Found"
+            message = (
+                f"{label} is required by other packages. Removing it will also remove:\n\n"
+                f"{', '.join(dependents)}\n\nDo you want to remove it and its dependents?"
             )
-            
-            required_by = []
-            for line in result.stdout.splitlines():
-                if line.startswith("Required By"):
-                    deps = line.split(":")[1].strip()
-                    if deps and deps != "None":
-                        required_by = deps.split()
-                    break
-
-            if required_by:
-                reply = QMessageBox.question(
-                    self,
-                    "Dependencies Found",
-                    f"{package_name} is required by other packages:\n\n{', '.join(required_by)}\n\n"
-                    "Do you want to remove it and its dependents?",
-                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-                )
-                
-                if reply == QMessageBox.StandardButton.Yes:
-                    try:
-                        self.log_to_terminal(f"\nRemoving {package_name} and its dependents...")
-                        self.run_sudo_command(["pacman", "-Rc", "--noconfirm", package_name])
-                        self.log_to_terminal(f"\n{package_name} and dependents removed successfully")
-                        self.installed_packages = self.get_installed_packages()
-                        self.search_packages()
-                    except Exception as e:
-                        self.log_to_terminal(f"\nError: {str(e)}")
-                        QMessageBox.critical(self, "Error", f"Failed to remove package: {str(e)}")
+        else:
+            title = "Confirm Removal"
+            message = f"Are you sure you want to remove {label}?"
+        if orphans:
+            message += f"\n\nThese dependencies would no longer be needed:\n\n{', '.join(orphans)}"
+
+        box = QMessageBox(QMessageBox.Icon.Question, title, message, parent=self)
+        remove_button = box.addButton("Remove", QMessageBox.ButtonRole.AcceptRole)
+        orphans_button = None
+        if orphans:
+            orphans_button = box.addButton("Remove Unneeded Dependencies Too", QMessageBox.ButtonRole.AcceptRole)
+        box.addButton(QMessageBox.StandardButton.Cancel)
+        box.exec()
+
+        clicked = box.clickedButton()
+        if clicked is not None and clicked in (remove_button, orphans_button):
+            self.start_removal(installed, cascade=bool(dependents), recursive=clicked is orphans_button)
+
+    def start_removal(self, names, cascade=False, recursive=False):
+        """Remove packages in one transaction on a worker thread, streaming pacman's output to the terminal"""
+        label = ', '.join(names)
+        flags = "-R" + ("c" if cascade else "") + ("s" if recursive else "")
+
+        def remove_task(worker):
+            if cascade:
+                worker.output.emit(f"\nRemoving {label} and dependents...")
+                worker.run_sudo_command(["pacman", flags, "--noconfirm", *names])
+                worker.output.emit(f"\n{label} and dependents removed successfully")
             else:
-                reply = QMessageBox.question(
-                    self,
-                    "Confirm Removal",
-                    f"Are you sure you want to remove {package_name}?",
-                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-                )
+                worker.output.emit(f"\nRemoving {label}...")
+                worker.run_sudo_command(["pacman", flags, "--noconfirm", *names])
+                worker.output.emit(f"\n{label} removed successfully")
 
-                if reply == QMessageBox.StandardButton.Yes:
-                    try:
-                        self.log_to_terminal(f"\nRemoving {package_name}...")
-                        self.run_sudo_command(["pacman", "-R", "--noconfirm", package_name])
-                        self.log_to_terminal(f"\n{package_name} removed successfully")
-                        self.installed_packages = self.get_installed_packages()
-                        self.search_packages()
-                    except Exception as e:
-                        self.log_to_terminal(f"\nError: {str(e)}")
-                        QMessageBox.critical(self, "Error", f"Failed to remove package: {str(e)}")
+        worker = PackageWorker(remove_task, self)
+        worker.output.connect(self.log_to_terminal, Qt.ConnectionType.DirectConnection)
+        worker.error.connect(self.removal_error)
+        worker.sudo_command.connect(self.handle_sudo_command)
+        worker.finished.connect(self.removal_finished)
 
-        except subprocess.CalledProcessError as e:
-            reply = QMessageBox.question(
-                self,
-                "Confirm Removal",
-                f"Are you sure you want to remove {package_name}?",
-                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-            )
+        self.scheduler.submit(worker, mutating=True)
 
-            if reply == QMessageBox.StandardButton.Yes:
-                try:
-                    self.log_to_terminal(f"\nRemoving {package_name}...")
-                    self.run_sudo_command(["pacman", "-R", "--noconfirm", package_name])
-                    self.log_to_terminal(f"\n{package_name} removed successfully")
-                    self.installed_packages = self.get_installed_packages()
-                    self.search_packages()
-                except Exception as e:
-                    self.log_to_terminal(f"\nError: {str(e)}")
-                    QMessageBox.critical(self, "Error", f"Failed to remove package: {str(e)}")
+    def removal_finished(self):
+        self.apply_installed(self.get_installed_packages())
+        self.search_packages()
+
+    def removal_error(self, error):
+        self.log_to_terminal(f"\nError: {error}")
+        QMessageBox.critical(self, "Error", f"Failed to remove package: {error}")
 
     def detect_aur_helper(self):
-        """Detect installed AUR helpers and return the preferred one"""
-        aur_helpers = [
-            ('yay', ['yay']),
-            ('paru', ['paru']),
-            ('pamac', ['pamac']),
-            ('aurman', ['aurman']),
-            ('pikaur', ['pikaur'])
-        ]
-        
-        for helper_name, helper_cmd in aur_helpers:
-            try:
-                result = subprocess.run(
-                    ['which', helper_name],
-                    capture_output=True,
-                    text=True
-                )
-                if result.returncode == 0:
-                    self.log_to_terminal(f"Found AUR helper: {helper_name}")
-                    return helper_cmd
-            except Exception:
-                continue
-        
-        return None
+        """Return the backend of the preferred installed AUR helper, or None"""
+        backend = self.helpers.preferred()
+        if backend is not None and backend.path != self._announced_helper:
+            self._announced_helper = backend.path
+            self.log_to_terminal(f"Found AUR helper: {backend.name} ({backend.version or 'unknown version'})")
+        return backend
 
     def check_updates(self):
         if not hasattr(self, 'updates_tree'):
             return
         
-        self.updates_tree.clear()
+        if self.update_worker:
+            self.update_worker.cancel()
+        if self.download_worker:
+            self.download_worker.cancel()
+        self.updates_model.clear()
         self.log_to_terminal("\nChecking for updates...")
+        offline_aur = self.offline_aur_checkbox.isChecked()
+        devel = self.devel_checkbox.isChecked()
 
         def check_updates_task(worker):
             if not worker._is_running:
                 return
             
             try:
-                aur_helper = self.detect_aur_helper()
-                if not aur_helper:
-                    worker.output.emit("No AUR helper found. Cannot check for updates.")
+                worker.output.emit("Refreshing private copy of the sync databases...")
+                for repo, error in self.update_engine.refresh().items():
+                    worker.output.emit(f"Warning: Could not refresh {repo}: {error}")
+
+                found = 0
+                worker.repo_updates = []
+                for name, current_version, new_version, repo in self.update_engine.repo_updates():
+                    if not worker._is_running:
+                        return
+                    worker.repo_updates.append(name)
+                    worker.found(UpdateRecord(name, current_version, new_version, "System"))
+                    worker.output.emit(f"Found update: {name} ({current_version} → {new_version})")
+                    found += 1
+                worker.flush_found()
+
+                foreign = self.update_engine.foreign_packages()
+                if not worker._is_running:
                     return
-                
-                worker.output.emit(f"Using {aur_helper[0]} to check updates...")
-                
-                safe_env = {
-                    'PATH': '/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin',
-                    'HOME': os.environ.get('HOME', ''),
-                    'USER': os.environ.get('USER', ''),
-                    'LANG': os.environ.get('LANG', 'C.UTF-8'),
-                    'DISPLAY': os.environ.get('DISPLAY', ''),
-                    'XAUTHORITY': os.environ.get('XAUTHORITY', '')
-                }
-                
-                if aur_helper[0] == 'pamac':
-                    cmd = ['pamac', 'checkupdates', '-a']
-                elif aur_helper[0] == 'yay':
-                    worker.output.emit("Syncing package databases...")
-                    try:
-                        worker.run_sudo_command(['pacman', '-Sy'])
-                    except subprocess.CalledProcessError as e:
-                        if "Authentication cancelled" in str(e):
-                            worker.output.emit("\nUpdate check cancelled: Authentication required")
-                            return
-                        worker.output.emit(f"\nWarning: Database sync failed: {str(e)}")
-                    
-                    cmd = ['yay', '-Qu', '--devel', '--needed']
+                if offline_aur:
+                    found += self.emit_snapshot_updates(worker, foreign)
                 else:
-                    cmd = [*aur_helper, '-Qu']
-                
-                try:
-                    result = subprocess.run(
-                        cmd,
-                        capture_output=True,
-                        text=True,
-                        env=safe_env
-                    )
-                    
-                    if (result.returncode == 0 or 
-                        (aur_helper[0] == 'yay' and result.returncode == 1 and not result.stderr.strip())):
-                        
-                        if result.stdout.strip():
-                            for line in result.stdout.strip().split('\n'):
-                                if not worker._is_running:
-                                    return
-                                if line.strip():
-                                    try:
-                                        parts = line.split()
-                                        name = parts[0]
-                                        current_version = parts[1]
-                                        new_version = parts[3] if len(parts) > 3 else parts[-1]
-                                        
-                                        source = "AUR" if name in self.get_foreign_packages() else "System"
-                                        
-                                        if worker._is_running:
-                                            worker.package_found.emit({
-                                                'name': name,
-                                                'current_version': current_version,
-                                                'new_version': new_version,
-                                                'source': source
-                                            })
-                                            worker.output.emit(f"Found update: {name} ({current_version} → {new_version})")
-                                    except (ValueError, IndexError) as e:
-                                        worker.output.emit(f"Warning: Could not parse update line: {line} ({str(e)})")
-                                        continue
-                        else:
-                            worker.output.emit("No updates found")
-                    elif result.returncode != 0:
-                        if result.stderr.strip():
-                            worker.output.emit(f"Error output: {result.stderr}")
-                        else:
-                            worker.output.emit("No updates found")
-                        
-                except subprocess.CalledProcessError as e:
-                    worker.output.emit(f"Error checking updates: {str(e)}")
-                    if e.stderr:
-                        worker.output.emit(f"Error output: {e.stderr}")
-                    raise
+                    found += self.emit_aur_updates(worker, foreign, devel)
+
+                if not found and worker._is_running:
+                    worker.output.emit("No updates found")
                 
                 if worker._is_running:
                     worker.output.emit("\nUpdate check complete!")
@@ -1043,22 +1591,150 @@ class AURManager(QMainWindow):
                     worker._cleanup_lock.set()
                     raise
 
-            worker.sudo_command.connect(self.handle_sudo_command)  
-
         try:
             worker = PackageWorker(check_updates_task, self)
-            worker.output.connect(self.log_to_terminal)
-            worker.package_found.connect(self.add_package_to_tree)
+            worker.output.connect(self.log_to_terminal, Qt.ConnectionType.DirectConnection)
+            worker.packages_found.connect(lambda batch, w=worker: self.worker_results_found(w, batch))
             worker.error.connect(lambda e: QMessageBox.critical(self, "Error", f"Update check failed: {e}"))
-            worker.sudo_command.connect(self.handle_sudo_command)
-            
-            self.start_worker(worker)
+            worker.finished.connect(lambda w=worker: self.update_check_finished(w))
+
+            self.update_worker = worker
+            self.scheduler.submit(worker)
         except Exception as e:
             self.log_to_terminal(f"Failed to start update check: {str(e)}")
             QMessageBox.critical(self, "Error", f"Failed to start update check: {str(e)}")
 
+    def update_check_finished(self, worker):
+        if worker is self.update_worker:
+            self.update_worker = None
+            names = getattr(worker, 'repo_updates', None)
+            if names and not worker._cancelled and self.download_checkbox.isChecked():
+                self.download_updates(names)
+
+    def inspect_roots(self):
+        """Inspect every listed root concurrently and list them side by side"""
+        if not hasattr(self, 'roots_tree'):
+            return
+        paths = self.roots_input.text().split()
+        if not paths:
+            return
+        if self.roots_worker:
+            self.roots_worker.cancel()
+        self.roots_model.clear()
+        targets = [make_target(path) for path in paths]
+        inspector = RootInspector(sync=self.roots_sync_checkbox.isChecked())
+        self.log_to_terminal(f"\nInspecting {len(targets)} root(s)...")
+
+        def inspect_roots_task(worker):
+            def report(result):
+                if not worker._is_running:
+                    return
+                root = result.target.root
+                if result.error:
+                    worker.found(RootRecord(root, 0, 0, 0, result.error))
+                    worker.output.emit(f"{root}: {result.error}")
+                    return
+                for repo, error in result.failures.items():
+                    worker.output.emit(f"{root}: Warning: Could not refresh {repo}: {error}")
+                status = f"{len(result.failures)} repo(s) not refreshed" if result.failures else "OK"
+                worker.found(RootRecord(
+                    root, len(result.installed), len(result.updates), len(result.orphans), status
+                ))
+                for name, current_version, new_version, _ in result.updates:
+                    worker.output.emit(f"{root}: {name} ({current_version} → {new_version})")
+                if result.orphans:
+                    worker.output.emit(f"{root}: Orphans: {' '.join(result.orphans)}")
+                worker.flush_found()
+
+            inspector.inspect(targets, report)
+            if worker._is_running:
+                worker.output.emit("\nRoot inspection complete!")
+
+        worker = PackageWorker(inspect_roots_task, self)
+        worker.output.connect(self.log_to_terminal, Qt.ConnectionType.DirectConnection)
+        worker.packages_found.connect(lambda batch, w=worker: self.worker_results_found(w, batch))
+        worker.error.connect(lambda e: QMessageBox.critical(self, "Error", f"Root inspection failed: {e}"))
+        worker.finished.connect(lambda w=worker: self.roots_inspected(w))
+        self.roots_worker = worker
+        self.scheduler.submit(worker, background=True)
+
+    def roots_inspected(self, worker):
+        if worker is self.roots_worker:
+            self.roots_worker = None
+
+    def download_updates(self, names):
+        """Prefetch the package files of pending repository updates on a low priority read-only job"""
+        def download_task(worker):
+            worker.output.emit(f"\nPrefetching {len(names)} update(s) in the background...")
+            fetched, cached, failed = self.package_prefetcher.prefetch(
+                names, worker.output.emit, lambda: worker._cancelled or not worker._is_running
+            )
+            if worker._is_running:
+                worker.output.emit(
+                    f"Prefetch complete: {len(fetched)} downloaded, {len(cached)} already cached, "
+                    f"{len(failed)} failed"
+                )
+
+        worker = PackageWorker(download_task, self)
+        worker.output.connect(self.log_to_terminal, Qt.ConnectionType.DirectConnection)
+        worker.error.connect(lambda e: self.log_to_terminal(f"Prefetch failed: {e}"))
+        worker.finished.connect(lambda w=worker: self.download_finished(w))
+        self.download_worker = worker
+        self.scheduler.submit(worker, background=True)
+
+    def download_finished(self, worker):
+        if worker is self.download_worker:
+            self.download_worker = None
+
+    def emit_aur_updates(self, worker, foreign, devel):
+        """Check foreign packages against the AUR with batched multiinfo requests"""
+        worker.output.emit(f"Checking {len(foreign)} foreign packages against the AUR...")
+        if devel:
+            worker.output.emit("Checking VCS packages for new commits...")
+        updates = self.aur_updates.check(self.local_db.installed(), foreign, devel=devel)
+        for name, current_version, new_version in updates:
+            if not worker._is_running:
+                break
+            worker.found(UpdateRecord(name, current_version, new_version, "AUR"))
+            worker.output.emit(f"Found update: {name} ({current_version} → {new_version})")
+        return len(updates)
+
+    def emit_snapshot_updates(self, worker, foreign):
+        """Compare installed foreign packages against the offline AUR snapshot"""
+        if self.aur_snapshot.is_empty():
+            worker.output.emit("AUR snapshot is empty, use Refresh AUR Snapshot to enable offline AUR updates")
+            return 0
+
+        installed = self.local_db.installed()
+        found = 0
+        for pkg in self.aur_snapshot.info(foreign):
+            name = pkg['Name']
+            if vercmp(pkg['Version'], installed[name]) > 0:
+                worker.found(UpdateRecord(name, installed[name], pkg['Version'], "AUR"))
+                worker.output.emit(f"Found update: {name} ({installed[name]} → {pkg['Version']})")
+                found += 1
+        return found
+
+    def refresh_aur_snapshot(self):
+        def refresh_task(worker):
+            worker.output.emit("\nRefreshing AUR metadata snapshot...")
+            stats = self.aur_snapshot.refresh(session=self.aur.session)
+            if stats is None:
+                worker.output.emit("AUR snapshot is already up to date")
+            else:
+                added, updated, removed = stats
+                worker.output.emit(
+                    f"AUR snapshot refreshed: {added} added, {updated} updated, {removed} removed"
+                )
+
+        worker = PackageWorker(refresh_task, self)
+        worker.output.connect(self.log_to_terminal, Qt.ConnectionType.DirectConnection)
+        worker.error.connect(lambda e: QMessageBox.critical(self, "Error", f"AUR snapshot refresh failed: {e}"))
+        
+        self.scheduler.submit(worker, background=True)
+
     def update_all(self):
-        if self.updates_tree.topLevelItemCount() == 0:
+        if self.updates_model.total_rows() == 0:
             QMessageBox.information(self, "Info", "No updates available")
             return
 
@@ -1070,31 +1746,43 @@ class AURManager(QMainWindow):
         )
 
         if reply == QMessageBox.StandardButton.Yes:
+            aur_names = [
+                record['name'] for record in map(self.updates_model.record, range(self.updates_model.total_rows()))
+                if record['source'] == "AUR"
+            ]
+            parallel_builds = (self.parallel_build_checkbox.isChecked() and
+                               shutil.which('makepkg') is not None)
+            if self.download_worker:
+                self.download_worker.cancel()
+            cachedir_args = self.package_prefetcher.pacman_args()
+
             def update_task(worker):
                 try:
-                    aur_helper = self.detect_aur_helper()
-                    if not aur_helper:
-                        worker.output.emit("No AUR helper found. Cannot proceed with updates.")
-                        return
+                    aur_helper = None
+                    if not parallel_builds:
+                        aur_helper = self.detect_aur_helper()
+                        if not aur_helper:
+                            worker.output.emit("No AUR helper found. Cannot proceed with updates.")
+                            return
 
                     worker.output.emit("\nUpdating official packages...")
                     try:
-                        worker.run_sudo_command(['pacman', '-Syu', '--noconfirm'])
+                        worker.run_sudo_command(['pacman', '-Syu', '--noconfirm', *cachedir_args])
                     except subprocess.CalledProcessError as e:
                         if "Authentication cancelled" in str(e):
                             worker.output.emit("\nUpdate cancelled: Authentication required")
                             return
                         worker.output.emit(f"\nWarning: Error updating official packages: {str(e)}")
                     
-                    worker.output.emit(f"\nUpdating AUR packages using {aur_helper[0]}...")
+                    if parallel_builds:
+                        if aur_names:
+                            self.build_aur_packages(worker, aur_names)
+                        worker.output.emit("\nUpdate process completed successfully!")
+                        return
+
+                    worker.output.emit(f"\nUpdating AUR packages using {aur_helper.name}...")
                     try:
-                        if aur_helper[0] == 'pamac':
-                            worker.run_sudo_command(['pamac', 'upgrade', '-a', '--no-confirm'])
-                        else:
-                            if aur_helper[0] in ['yay', 'paru']:
-                                worker.run_sudo_command([*aur_helper, '-Sua', '--noconfirm'])
-                            else:
-                                worker.run_sudo_command([*aur_helper, '-Su', '--noconfirm'])
+                        worker.run_helper_command(aur_helper.upgrade_command())
                     except subprocess.CalledProcessError as e:
                         if "Authentication cancelled" in str(e):
                             worker.output.emit("\nUpdate cancelled: Authentication required")
@@ -1109,47 +1797,74 @@ class AURManager(QMainWindow):
                     raise
 
             worker = PackageWorker(update_task, self)
-            worker.output.connect(self.log_to_terminal)
+            worker.output.connect(self.log_to_terminal, Qt.ConnectionType.DirectConnection)
             worker.error.connect(lambda e: QMessageBox.critical(self, "Error", f"Update failed: {e}"))
             worker.sudo_command.connect(self.handle_sudo_command)
             worker.finished.connect(self.check_updates)
             
-            self.start_worker(worker)
+            self.scheduler.submit(worker, mutating=True)
 
-    def get_foreign_packages(self):
-        """Get list of foreign (AUR) packages"""
-        try:
-            result = subprocess.run(
-                ['pacman', '-Qm'],
-                capture_output=True,
-                text=True
-            )
-            if result.returncode == 0:
-                return [line.split()[0] for line in result.stdout.splitlines()]
-        except Exception:
-            pass
-        return []
+    def waiting_for_lock(self, waiting):
+        if waiting:
+            self.log_to_terminal("\nWaiting for another package manager to release the pacman database lock...")
+        else:
+            self.log_to_terminal("Pacman database lock released")
+
+    def build_aur_packages(self, worker, names):
+        """Build AUR packages with makepkg in parallel over their dependency DAG and install them level by level"""
+        worker.output.emit(f"\nBuilding {len(names)} AUR package(s) in parallel...")
+        self.local_db.refresh()
+        installed = set(self.local_db.packages)
+        for pkg in self.local_db.packages.values():
+            installed.update(strip_depver(provide) for provide in pkg.get('provides', ()))
+        self.sync_db.refresh()
+
+        builder = AURBuilder(self.aur, on_output=worker.output.emit)
+        plan = builder.plan(names, installed, self.sync_db)
+        batches = plan.batches()
+        worker.output.emit(
+            f"Build order: {' -> '.join(', '.join(level) for level in batches)} "
+            f"({builder.jobs} jobs)"
+        )
+
+        external = plan.external_dependencies(installed)
+        if external:
+            worker.output.emit(f"Installing build dependencies: {', '.join(external)}")
+            worker.run_sudo_command(['pacman', '-S', '--needed', '--asdeps', '--noconfirm', *external])
+
+        def install(files, asdeps):
+            worker.run_sudo_command(['pacman', '-U', '--noconfirm', *(['--asdeps'] if asdeps else []), *files])
+
+        built, failed, skipped = builder.run(plan, install)
+        worker.output.emit(f"\nBuilt {len(built)} package base(s)")
+        if failed:
+            message = f"Failed to build: {', '.join(failed)}"
+            if skipped:
+                message += f"; skipped dependents: {', '.join(skipped)}"
+            raise BuildError(message)
 
     def closeEvent(self, event):
         """Handle cleanup when closing the application"""
-        if self.current_worker and self.current_worker._is_running:
-            self.current_worker.stop()
-            self._worker_lock.wait()
+        self.scheduler.shutdown()
+        self.privileged_session.close()
+        self.log_sink.close()
         event.accept()
 
-    def start_worker(self, worker):
-        """Safely start a new worker thread"""
-        if self.current_worker and self.current_worker._is_running:
-            self.current_worker.stop()
-            self._worker_lock.wait()
-        
-        self._worker_lock.clear()
-        self.current_worker = worker
-        worker.finished.connect(self._worker_lock.set)
-        worker.start()
-
-if __name__ == "__main__":
-    app = QApplication(sys.argv)
+def main(argv=None):
+    """Run the GUI"""
+    imported = time.time()
+    app = QApplication(sys.argv if argv is None else [sys.argv[0], *argv])
     window = AURManager()
+    if os.environ.get('ORACLE_STARTUP_TRACE'):
+        trace = StartupTrace(window, os.environ['ORACLE_STARTUP_TRACE'])
+        trace.marks['imported'] = imported
+        trace.mark('constructed')
     window.show()
-    sys.exit(app.exec()) 
\ No newline at end of file
+    return app.exec()
+
+if __name__ == "__main__":
+    if HELPER_FLAG in sys.argv[1:2]:
+        sys.exit(serve())
+    if ASKPASS_FLAG in sys.argv[1:2]:
+        sys.exit(askpass())
+    sys.exit(main())
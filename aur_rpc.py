@@ -0,0 +1,206 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from storage import atomic_write, cache_dir
+
+AUR_RPC_URL = 'https://aur.archlinux.org/rpc/'
+RPC_VERSION = 5
+USER_AGENT = 'oracle-aur-manager'
+# aurweb rejects request URIs much longer than this
+MAX_URL_LENGTH = 4000
+
+
+def default_cache_dir():
+    return cache_dir('aur-rpc')
+
+
+class AURError(Exception):
+    pass
+
+
+class ResponseCache:
+    """On-disk cache of RPC responses keyed by request URL
+
+    Every distinct URL (each search prefix, each info chunk) gets a file, so
+    the directory is pruned on the first store and every ``PRUNE_EVERY``
+    stores after: entries untouched for ``max_age`` go, then the least
+    recently refreshed beyond ``max_entries``.
+    """
+
+    PRUNE_EVERY = 100
+
+    def __init__(self, path, max_age=7 * 24 * 3600, max_entries=2000):
+        self.path = path
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self._stores = 0
+
+    def _file(self, url):
+        return os.path.join(self.path, hashlib.sha1(url.encode()).hexdigest() + '.json')
+
+    def load(self, url):
+        try:
+            with open(self._file(url), encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get('url') == url else None
+
+    def store(self, url, entry):
+        entry['url'] = url
+        try:
+            with atomic_write(self._file(url)) as f:
+                json.dump(entry, f)
+        except OSError:
+            pass
+        self._stores += 1
+        if self._stores % self.PRUNE_EVERY == 1:
+            self.prune()
+
+    def prune(self):
+        """Remove expired entries and the oldest ones beyond max_entries"""
+        entries = []
+        try:
+            with os.scandir(self.path) as it:
+                for entry in it:
+                    try:
+                        entries.append((entry.stat().st_mtime, entry.path))
+                    except OSError:
+                        continue
+        except OSError:
+            return
+        entries.sort(reverse=True)
+        cutoff = time.time() - self.max_age
+        for index, (mtime, path) in enumerate(entries):
+            if index >= self.max_entries or mtime < cutoff:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+
+
+class AURClient:
+    """Client for the AUR RPC v5 interface over a persistent keep-alive session
+
+    Responses are cached on disk for ``ttl`` seconds; after that they are
+    revalidated with If-None-Match / If-Modified-Since so an unchanged result
+    costs a 304 instead of a full body. A stale entry is served when the AUR
+    cannot be reached.
+    """
+
+    def __init__(self, base_url=AUR_RPC_URL, cache_dir=None, ttl=300, timeout=15, pool_size=8):
+        self.base_url = base_url
+        self.ttl = ttl
+        self.timeout = timeout
+        self.cache = ResponseCache(cache_dir or default_cache_dir()) if ttl else None
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def close(self):
+        self.session.close()
+
+    def search(self, query, by='name-desc'):
+        """Search the AUR, returning result dicts whose name or description contain every term"""
+        terms = query.lower().split()
+        if not terms:
+            return []
+        # The RPC takes a single argument, so query the most selective term and filter locally
+        arg = max(terms, key=len)
+        if len(arg) < 2:
+            return []
+        results = self.request({'type': 'search', 'by': by, 'arg': arg})
+        if len(terms) == 1:
+            return results
+        return [
+            pkg for pkg in results
+            if all(term in pkg['Name'].lower() or term in (pkg.get('Description') or '').lower()
+                   for term in terms)
+        ]
+
+    def info(self, names):
+        """Return multiinfo result dicts for the given package names"""
+        return self.multiinfo(names, max_age=None)
+
+    def info_chunks(self, names):
+        """Split names into groups whose info request stays under MAX_URL_LENGTH"""
+        base = len(self.base_url) + len(f'?v={RPC_VERSION}&type=info')
+        chunks = []
+        chunk = []
+        length = base
+        for name in names:
+            arg = len('&arg%5B%5D=') + len(quote(name, safe=''))
+            if chunk and length + arg > MAX_URL_LENGTH:
+                chunks.append(chunk)
+                chunk = []
+                length = base
+            chunk.append(name)
+            length += arg
+        if chunk:
+            chunks.append(chunk)
+        return chunks
+
+    def multiinfo(self, names, max_workers=4, max_age=0):
+        """Fetch info for any number of names as concurrent URL-length-bounded requests"""
+        chunks = self.info_chunks(sorted(set(names)))
+        if len(chunks) <= 1:
+            return self.request({'type': 'info', 'arg[]': chunks[0]}, max_age) if chunks else []
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            responses = pool.map(
+                lambda chunk: self.request({'type': 'info', 'arg[]': chunk}, max_age), chunks
+            )
+            return [pkg for results in responses for pkg in results]
+
+    def request(self, params, max_age=None):
+        """Perform an RPC request; max_age overrides the cache TTL for this call"""
+        params = {'v': RPC_VERSION, **params}
+        url = requests.Request('GET', self.base_url, params=params).prepare().url
+        ttl = self.ttl if max_age is None else max_age
+
+        entry = self.cache.load(url) if self.cache else None
+        if entry and time.time() - entry['fetched'] < ttl:
+            return self._results(entry['body'])
+
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and entry:
+                entry['fetched'] = time.time()
+                self.cache.store(url, entry)
+                return self._results(entry['body'])
+            response.raise_for_status()
+            body = response.json()
+        except (requests.RequestException, ValueError) as e:
+            if entry:
+                return self._results(entry['body'])
+            raise AURError(f"AUR request failed: {e}") from e
+
+        results = self._results(body)
+        if self.cache:
+            self.cache.store(url, {
+                'fetched': time.time(),
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'body': body
+            })
+        return results
+
+    def _results(self, body):
+        if body.get('type') == 'error':
+            raise AURError(body.get('error') or "Unknown AUR error")
+        return body.get('results') or []
@@ -0,0 +1,271 @@
+import gzip
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+import requests
+
+from aur_rpc import USER_AGENT
+from storage import cache_dir, sibling_temp
+
+SNAPSHOT_URL = 'https://aur.archlinux.org/packages-meta-ext-v1.json.gz'
+
+# Dependency-style fields kept verbatim as JSON alongside the indexed columns
+META_FIELDS = (
+    'Depends', 'MakeDepends', 'CheckDepends', 'OptDepends', 'Provides',
+    'Conflicts', 'Replaces', 'Groups', 'License', 'Keywords'
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS packages (
+    name TEXT PRIMARY KEY,
+    base TEXT,
+    version TEXT NOT NULL,
+    description TEXT,
+    url TEXT,
+    popularity REAL,
+    votes INTEGER,
+    out_of_date INTEGER,
+    maintainer TEXT,
+    last_modified INTEGER,
+    meta TEXT
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+COLUMNS = (
+    'name, base, version, description, url, popularity, votes, '
+    'out_of_date, maintainer, last_modified, meta'
+)
+
+
+def default_snapshot_path():
+    return cache_dir('aur-snapshot.sqlite')
+
+
+def iter_json_array(stream, chunk_size=1 << 16):
+    """Yield the elements of a top-level JSON array from a text stream one at a time"""
+    decoder = json.JSONDecoder()
+    buf = ''
+    pos = 0
+    opened = False
+    eof = False
+    while True:
+        while pos < len(buf) and buf[pos] in ' \t\r\n,':
+            pos += 1
+        if pos < len(buf):
+            if not opened:
+                if buf[pos] != '[':
+                    raise ValueError("Expected a JSON array")
+                opened = True
+                pos += 1
+                continue
+            if buf[pos] == ']':
+                return
+            try:
+                obj, end = decoder.raw_decode(buf, pos)
+            except ValueError:
+                if eof:
+                    raise
+            else:
+                # Complete only once the delimiter after it has arrived: a number
+                # cut at the buffer edge ("2." of "2.5") still decodes
+                after = end
+                while after < len(buf) and buf[after] in ' \t\r\n':
+                    after += 1
+                if after < len(buf) and buf[after] in ',]' or eof:
+                    yield obj
+                    pos = end
+                    continue
+                if after < len(buf) and buf[end:].strip('0123456789.eE+-'):
+                    raise ValueError("Expected ',' or ']' after an array element")
+        elif eof:
+            raise ValueError("Unterminated JSON array")
+
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            eof = True
+        buf = buf[pos:] + chunk
+        pos = 0
+
+
+def _row(pkg):
+    meta = {field: pkg[field] for field in META_FIELDS if pkg.get(field)}
+    return (
+        pkg['Name'], pkg.get('PackageBase'), pkg['Version'], pkg.get('Description'),
+        pkg.get('URL'), pkg.get('Popularity'), pkg.get('NumVotes'), pkg.get('OutOfDate'),
+        pkg.get('Maintainer'), pkg.get('LastModified'), json.dumps(meta) if meta else None
+    )
+
+
+def _record(row):
+    """Turn a stored row back into the RPC result shape used by AURClient"""
+    name, base, version, description, url, popularity, votes, out_of_date, maintainer, \
+        last_modified, meta = row
+    pkg = {
+        'Name': name,
+        'PackageBase': base,
+        'Version': version,
+        'Description': description,
+        'URL': url,
+        'Popularity': popularity,
+        'NumVotes': votes,
+        'OutOfDate': out_of_date,
+        'Maintainer': maintainer,
+        'LastModified': last_modified
+    }
+    if meta:
+        pkg.update(json.loads(meta))
+    return pkg
+
+
+class AURSnapshot:
+    """Local SQLite copy of the AUR metadata dump for offline search and update checks
+
+    The dump is downloaded with conditional requests and then streamed from
+    disk into the store, rewriting only packages whose LastModified changed
+    and deleting packages that disappeared from the AUR.
+    """
+
+    def __init__(self, path=None, url=SNAPSHOT_URL, timeout=60):
+        self.path = path or default_snapshot_path()
+        self.url = url
+        self.timeout = timeout
+
+    def _connect(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.executescript(SCHEMA)
+        return conn
+
+    def _state(self, conn, key):
+        row = conn.execute("SELECT value FROM state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def is_empty(self):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT 1 FROM packages LIMIT 1").fetchone() is None
+
+    def age(self):
+        """Seconds since the snapshot was last refreshed, or None if it never was"""
+        with closing(self._connect()) as conn:
+            fetched = self._state(conn, 'fetched')
+        return time.time() - float(fetched) if fetched else None
+
+    def refresh(self, session=None):
+        """Download the dump if it changed and ingest it; returns (added, updated, removed) or None if unchanged"""
+        with closing(self._connect()) as conn:
+            etag = self._state(conn, 'etag')
+            last_modified = self._state(conn, 'last_modified')
+            empty = conn.execute("SELECT 1 FROM packages LIMIT 1").fetchone() is None
+
+        headers = {'User-Agent': USER_AGENT}
+        if not empty:
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+
+        tmp = sibling_temp(self.path, '.download')
+        http = session or requests
+        try:
+            with http.get(self.url, headers=headers, stream=True, timeout=self.timeout) as response:
+                if response.status_code == 304:
+                    self._touch()
+                    return None
+                response.raise_for_status()
+                with open(tmp, 'wb') as f:
+                    for chunk in response.raw.stream(1 << 16, decode_content=False):
+                        f.write(chunk)
+                new_etag = response.headers.get('ETag')
+                new_last_modified = response.headers.get('Last-Modified')
+
+            stats = self.ingest(tmp)
+        finally:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+
+        with closing(self._connect()) as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO state (key, value) VALUES (?, ?)",
+                [('etag', new_etag), ('last_modified', new_last_modified)]
+            )
+        self._touch()
+        return stats
+
+    def _touch(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO state (key, value) VALUES ('fetched', ?)",
+                (str(time.time()),)
+            )
+
+    def ingest(self, dump_path):
+        """Stream a packages-meta-ext-v1.json(.gz) file into the store"""
+        opener = gzip.open if self._is_gzip(dump_path) else open
+        added = updated = 0
+        with closing(self._connect()) as conn, conn:
+            stale = dict(conn.execute("SELECT name, last_modified FROM packages"))
+            with opener(dump_path, 'rt', encoding='utf-8') as stream:
+                batch = []
+                for pkg in iter_json_array(stream):
+                    name = pkg.get('Name')
+                    if not name or not pkg.get('Version'):
+                        continue
+                    if name in stale:
+                        if stale.pop(name) == pkg.get('LastModified'):
+                            continue
+                        updated += 1
+                    else:
+                        added += 1
+                    batch.append(_row(pkg))
+                    if len(batch) >= 1000:
+                        conn.executemany(f"INSERT OR REPLACE INTO packages ({COLUMNS}) "
+                                         "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+                        batch = []
+                if batch:
+                    conn.executemany(f"INSERT OR REPLACE INTO packages ({COLUMNS}) "
+                                     "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch)
+            conn.executemany("DELETE FROM packages WHERE name = ?", ((name,) for name in stale))
+        return added, updated, len(stale)
+
+    def _is_gzip(self, path):
+        with open(path, 'rb') as f:
+            return f.read(2) == b'\x1f\x8b'
+
+    def search(self, query):
+        """Return packages whose name or description contain every query term"""
+        terms = query.lower().split()
+        if not terms:
+            return []
+        where = ' AND '.join(
+            "(instr(lower(name), ?) OR instr(lower(coalesce(description, '')), ?))"
+            for _ in terms
+        )
+        params = [term for term in terms for _ in (0, 1)]
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                f"SELECT {COLUMNS} FROM packages WHERE {where} ORDER BY name", params
+            ).fetchall()
+        return [_record(row) for row in rows]
+
+    def info(self, names):
+        """Return records for the given package names, in the RPC info result shape"""
+        names = list(names)
+        results = []
+        with closing(self._connect()) as conn:
+            for i in range(0, len(names), 500):
+                chunk = names[i:i + 500]
+                placeholders = ', '.join('?' * len(chunk))
+                rows = conn.execute(
+                    f"SELECT {COLUMNS} FROM packages WHERE name IN ({placeholders})", chunk
+                ).fetchall()
+                results.extend(_record(row) for row in rows)
+        return results
@@ -0,0 +1,144 @@
+import json
+import os
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from pacman_db import vercmp
+from storage import atomic_write, cache_dir
+
+SRCINFO_URL = 'https://aur.archlinux.org/cgit/aur.git/plain/.SRCINFO'
+DEVEL_VERSION = 'latest-commit'
+
+
+def default_devel_cache():
+    return cache_dir('devel.json')
+
+
+def parse_srcinfo_sources(text):
+    """Return (url, ref) for the git sources of a .SRCINFO, ref being None for HEAD"""
+    sources = []
+    for line in text.splitlines():
+        key, _, value = line.strip().partition(' = ')
+        if key.startswith('pkgname'):
+            break
+        if not key.startswith('source') or 'git+' not in value:
+            continue
+        url = value.split('::', 1)[-1]
+        if not url.startswith('git+'):
+            continue
+        url, _, fragment = url[4:].partition('#')
+        url = url.split('?', 1)[0]
+        kind, _, name = fragment.partition('=')
+        if kind in ('tag', 'commit'):
+            continue
+        sources.append((url, f'refs/heads/{name}' if kind == 'branch' else None))
+    return sources
+
+
+def ls_remote(url, ref=None, timeout=20):
+    """Return the commit a remote ref points at, or None if it cannot be resolved"""
+    env = dict(os.environ, GIT_TERMINAL_PROMPT='0')
+    try:
+        result = subprocess.run(
+            ['git', 'ls-remote', url, ref or 'HEAD'],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+            env=env
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0 or not result.stdout.strip():
+        return None
+    return result.stdout.split()[0]
+
+
+class AURUpdateChecker:
+    """Native AUR update detection over batched, concurrent multiinfo requests
+
+    The optional devel stage handles VCS (-git) packages the way yay --devel
+    does: the remote commit of each git source is recorded next to the
+    installed version and an update is reported once the remote moves on while
+    the installed version stays the same. Sources come from the package's
+    .SRCINFO and are cached until the AUR entry's LastModified changes.
+    """
+
+    def __init__(self, client, devel_cache=None, max_workers=8, srcinfo_url=SRCINFO_URL):
+        self.client = client
+        self.devel_cache = devel_cache or default_devel_cache()
+        self.max_workers = max_workers
+        self.srcinfo_url = srcinfo_url
+        self._cache_lock = threading.Lock()
+
+    def check(self, installed, foreign, devel=False):
+        """Return (name, installed, available) for foreign packages with a newer AUR version"""
+        infos = self.client.multiinfo(foreign, max_workers=self.max_workers)
+        updates = []
+        for pkg in infos:
+            name = pkg['Name']
+            if name in installed and vercmp(pkg['Version'], installed[name]) > 0:
+                updates.append((name, installed[name], pkg['Version']))
+
+        if devel:
+            outdated = {name for name, _, _ in updates}
+            vcs = [pkg for pkg in infos if pkg['Name'].endswith('-git') and pkg['Name'] not in outdated]
+            updates.extend(self.devel_updates(vcs, installed))
+        return sorted(updates)
+
+    def devel_updates(self, infos, installed):
+        """Check git sources of VCS packages in parallel against the recorded commits"""
+        cache = self._load_cache()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            results = list(pool.map(lambda pkg: self._check_vcs(pkg, installed, cache), infos))
+        self._save_cache(cache)
+        return [update for update in results if update]
+
+    def _check_vcs(self, pkg, installed, cache):
+        name = pkg['Name']
+        with self._cache_lock:
+            entry = dict(cache.get(name) or {})
+
+        if entry.get('last_modified') != pkg.get('LastModified') or 'sources' not in entry:
+            try:
+                entry['sources'] = self._fetch_sources(pkg.get('PackageBase') or name)
+            except requests.RequestException:
+                return None
+            entry['last_modified'] = pkg.get('LastModified')
+
+        heads = {url: ls_remote(url, ref) for url, ref in entry['sources']}
+        update = None
+        if entry.get('version') == installed[name] and entry.get('commits'):
+            if any(head and entry['commits'].get(url) not in (None, head) for url, head in heads.items()):
+                update = (name, installed[name], DEVEL_VERSION)
+        else:
+            # First sighting or rebuilt since: the installed package matches the current remote
+            entry['version'] = installed[name]
+            entry['commits'] = heads
+
+        with self._cache_lock:
+            cache[name] = entry
+        return update
+
+    def _fetch_sources(self, pkgbase):
+        response = self.client.session.get(
+            self.srcinfo_url, params={'h': pkgbase}, timeout=self.client.timeout
+        )
+        response.raise_for_status()
+        return parse_srcinfo_sources(response.text)
+
+    def _load_cache(self):
+        try:
+            with open(self.devel_cache, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self, cache):
+        try:
+            with atomic_write(self.devel_cache) as f:
+                json.dump(cache, f)
+        except OSError:
+            pass
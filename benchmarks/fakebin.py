@@ -0,0 +1,178 @@
+"""Stand-in pacman, yay and sudo for the benchmarks
+
+The executables in benchmarks/bin dispatch here. They print output shaped
+like the real programs' at a controlled rate:
+
+    ORACLE_BENCH_LINES   number of progress lines a transaction prints (default 1000)
+    ORACLE_BENCH_RATE    lines per second, 0 for as fast as possible (default 0)
+    ORACLE_BENCH_PASSWORD  the only password the fake sudo accepts (default "bench")
+
+Nothing is installed, removed or downloaded.
+"""
+import os
+import subprocess
+import sys
+import time
+
+PACMAN_VERSION = '6.1.0'
+
+
+def emit(lines):
+    """Print lines, paced to ORACLE_BENCH_RATE lines per second"""
+    rate = float(os.environ.get('ORACLE_BENCH_RATE') or 0)
+    start = time.monotonic()
+    for i, line in enumerate(lines):
+        if rate:
+            delay = start + i / rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        print(line, flush=bool(rate))
+    sys.stdout.flush()
+
+
+def line_count():
+    return int(os.environ.get('ORACLE_BENCH_LINES') or 1000)
+
+
+# pacman options that take a value
+VALUE_OPTIONS = ('--dbpath', '--root', '--config', '--cachedir', '--sysroot')
+
+
+def targets(args):
+    names = []
+    args = iter(args)
+    for arg in args:
+        if arg in VALUE_OPTIONS:
+            next(args, None)
+        elif not arg.startswith('-'):
+            names.append(arg)
+    return names
+
+
+def transaction(names, verb):
+    count = line_count()
+    names = names or [f"pkg{i:05d}" for i in range(max(1, count // 4))]
+    yield "resolving dependencies..."
+    yield "looking for conflicting packages..."
+    yield ""
+    yield f"Packages ({len(names)}) " + '  '.join(f"{name}-1.0-1" for name in names[:20])
+    yield ""
+    yield ":: Proceed with installation? [Y/n] "
+    for i in range(count):
+        name = names[i % len(names)]
+        yield f"({i % len(names) + 1}/{len(names)}) {verb} {name}" + ' ' * 20 + f"[{'#' * (i % 22):<22}] {i % 101}%"
+    yield ":: Running post-transaction hooks..."
+    yield "(1/1) Arming ConditionNeedsUpdate..."
+
+
+def pacman(args):
+    if not args or args[0] in ('-V', '--version'):
+        emit([f" .--.                  Pacman v{PACMAN_VERSION} - libalpm v14.0.0"])
+        return 0
+    op = args[0]
+    if op.startswith('-Q'):
+        # -Qu and friends exit with 1 when they have nothing to report
+        return 1 if 'u' in op or 'm' in op or 'dt' in op else 0
+    if op.startswith('-S') and 'y' in op:
+        emit([":: Synchronizing package databases...",
+              " core is up to date", " extra is up to date"])
+    if op.startswith('-S') or op.startswith('-U'):
+        emit(transaction(targets(args[1:]), 'upgrading' if 'u' in op else 'installing'))
+        return 0
+    if op.startswith('-R'):
+        emit(transaction(targets(args[1:]), 'removing'))
+        return 0
+    print(f"error: invalid option '{op}'", file=sys.stderr)
+    return 1
+
+
+def yay(args):
+    if not args or args[0] in ('-V', '--version'):
+        emit(["yay v12.3.5 - libalpm v14.0.0"])
+        return 0
+    op = args[0]
+    if op.startswith('-Q'):
+        return 1
+    if op.startswith('-Ss'):
+        terms = targets(args[1:])
+        emit(line for i in range(line_count() // 2) for line in (
+            f"aur/{'-'.join(terms) or 'pkg'}{i:05d} 1.0-1 (+{i % 100} {i % 10 / 10:.2f}) ",
+            "    Synthetic AUR package"))
+        return 0
+    if op.startswith('-S'):
+        names = targets(args[1:]) or ['aurpkg']
+        count = line_count()
+        lines = []
+        for name in names:
+            lines += [f":: ({names.index(name) + 1}/{len(names)}) Downloaded PKGBUILD: {name}",
+                      f"==> Making package: {name} 1.0-1 ({time.strftime('%c')})",
+                      "==> Checking runtime dependencies...", "==> Starting build()..."]
+            lines += [f"[{i * 100 // count:3d}%] Building C object CMakeFiles/{name}.dir/src/file{i}.c.o"
+                      for i in range(count // len(names))]
+            lines += [f"==> Finished making: {name} 1.0-1 ({time.strftime('%c')})"]
+        emit(lines)
+        # Like the real helper: build as the user, then escalate for the install
+        sudoflags = [flag for arg in args if arg.startswith('--sudoflags=')
+                     for flag in arg.split('=', 1)[1].split()]
+        if subprocess.run(['sudo', *sudoflags, 'true']).returncode != 0:
+            print("error: sudo authentication failed", file=sys.stderr)
+            return 1
+        emit(transaction(names, 'installing'))
+        return 0
+    print(f"error: unknown operation '{op}'", file=sys.stderr)
+    return 1
+
+
+def sudo(args):
+    """Accept -S, -A and -p like sudo, check the password and exec the command
+
+    The password is read from stdin with -S. Like the real sudo without a
+    terminal, SUDO_ASKPASS is used only with -A or when DISPLAY is set.
+    """
+    stdin = askpass = False
+    while args and args[0].startswith('-'):
+        option = args.pop(0)
+        if option == '-p':
+            args.pop(0)
+        elif option == '-S':
+            stdin = True
+        elif option == '-A':
+            askpass = True
+    expected = os.environ.get('ORACLE_BENCH_PASSWORD', 'bench')
+    if stdin:
+        # Read byte by byte so nothing after the password line is taken from the command's stdin
+        password = b''
+        while True:
+            ch = os.read(0, 1)
+            if not ch or ch == b'\n':
+                break
+            password += ch
+        if password.decode() != expected:
+            print("Sorry, try again.", file=sys.stderr)
+            return 1
+    elif os.environ.get('SUDO_ASKPASS') and (askpass or os.environ.get('DISPLAY')):
+        # Like sudo: three attempts, each running the askpass program afresh
+        for _ in range(3):
+            result = subprocess.run([os.environ['SUDO_ASKPASS'], '[sudo] password: '], capture_output=True)
+            if result.returncode != 0:
+                print("sudo: no password was provided", file=sys.stderr)
+                return 1
+            if result.stdout.rstrip(b'\n').decode() == expected:
+                break
+            print("Sorry, try again.", file=sys.stderr)
+        else:
+            print("sudo: 3 incorrect password attempts", file=sys.stderr)
+            return 1
+    else:
+        print("sudo: a terminal is required to read the password", file=sys.stderr)
+        return 1
+    if not args:
+        return 0
+    os.execvp(args[0], args)
+
+
+PROGRAMS = {'pacman': pacman, 'yay': yay, 'sudo': sudo}
+
+
+def main(name, args):
+    return PROGRAMS[name](list(args))
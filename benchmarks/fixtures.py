@@ -0,0 +1,223 @@
+"""Synthetic pacman systems and an AUR RPC stand-in for the benchmarks
+
+make_system() writes a dbpath with a local database and gzip'd sync
+databases, a file:// mirror carrying newer copies of the sync databases (so
+update checks find a known share of upgrades without any network) and a
+pacman.conf pointing at it. The AUR fixture is a JSON list of RPC result
+dicts, served by AURFixtureServer with the same query semantics as aurweb.
+Everything is derived from a seed, so the same size always produces the
+same system.
+"""
+import io
+import json
+import os
+import random
+import tarfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+REPOS = ('core', 'extra')
+ARCH = 'x86_64'
+WORDS = (
+    'library', 'tool', 'utility', 'daemon', 'client', 'server', 'python', 'bindings', 'font',
+    'theme', 'plugin', 'network', 'audio', 'video', 'image', 'graphics', 'terminal', 'editor',
+    'compiler', 'runtime', 'framework', 'driver', 'firmware', 'kernel', 'module', 'data',
+    'documentation', 'headers', 'git', 'rust', 'qt', 'gtk', 'wayland', 'x11', 'system', 'fast',
+)
+
+
+def _desc(fields):
+    """Render a dict into pacman's %SECTION% desc format"""
+    parts = []
+    for key, value in fields.items():
+        values = value if isinstance(value, list) else [value]
+        if values:
+            parts.append(f"%{key}%\n" + '\n'.join(map(str, values)) + '\n')
+    return '\n'.join(parts) + '\n'
+
+
+def _write_sync_db(path, packages):
+    with tarfile.open(path, 'w:gz') as tar:
+        for pkg in packages:
+            data = _desc({
+                'FILENAME': f"{pkg['name']}-{pkg['version']}-{ARCH}.pkg.tar.zst",
+                'NAME': pkg['name'],
+                'VERSION': pkg['version'],
+                'DESC': pkg['desc'],
+                'CSIZE': pkg['csize'],
+                'ISIZE': pkg['isize'],
+                'DEPENDS': pkg['depends'],
+                'PROVIDES': pkg['provides'],
+            }).encode()
+            info = tarfile.TarInfo(f"{pkg['name']}-{pkg['version']}/desc")
+            info.size = len(data)
+            info.mtime = 0
+            tar.addfile(info, io.BytesIO(data))
+
+
+def make_system(root, packages, seed=0, installed_share=0.2, update_share=0.05, foreign_share=0.05):
+    """Write a synthetic system under root; returns a dict describing it
+
+    ``packages`` repo packages are split over REPOS. A share of them is
+    installed, a share of the installed ones has a newer version on the
+    mirror, and some extra installed packages only exist in the AUR fixture
+    (half of those with a newer AUR version).
+    """
+    rng = random.Random(seed)
+    dbpath = os.path.join(root, 'db')
+    mirror = os.path.join(root, 'mirror')
+    os.makedirs(os.path.join(dbpath, 'local'), exist_ok=True)
+    os.makedirs(os.path.join(dbpath, 'sync'), exist_ok=True)
+
+    repo_packages = []
+    for i in range(packages):
+        name = f"pkg{i:05d}-{rng.choice(WORDS)}"
+        repo_packages.append({
+            'name': name,
+            'version': f"{rng.randint(0, 9)}.{rng.randint(0, 30)}.{rng.randint(0, 9)}-1",
+            'repo': REPOS[i % len(REPOS)],
+            'desc': ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 9))).capitalize(),
+            'csize': rng.randint(10_000, 50_000_000),
+            'isize': rng.randint(50_000, 200_000_000),
+            'depends': sorted({repo_packages[rng.randrange(i)]['name'] for _ in range(rng.randint(0, 4))})
+            if i else [],
+            'provides': [f"lib{name}.so=1-64"] if rng.random() < 0.1 else [],
+        })
+
+    installed = rng.sample(repo_packages, int(packages * installed_share))
+    upgraded = {pkg['name'] for pkg in rng.sample(installed, int(len(installed) * update_share))}
+    installdate = int(time.time())
+    for pkg in installed:
+        _write_local(dbpath, pkg, installdate, reason=rng.choice(('0', '1')))
+
+    aur = []
+    foreign = max(1, int(len(installed) * foreign_share))
+    for i in range(foreign):
+        name = f"aur{i:05d}-{rng.choice(WORDS)}"
+        version = f"{rng.randint(1, 5)}.{rng.randint(0, 9)}-1"
+        _write_local(dbpath, {'name': name, 'version': version, 'desc': "AUR package", 'isize': 1000},
+                     installdate, reason='0')
+        aur.append(_rpc_result(name, f"{version[:-2]}.1-1" if i % 2 else version, "AUR package", i))
+    for i in range(packages):
+        name = f"aurextra{i:05d}-{rng.choice(WORDS)}"
+        desc = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 9))).capitalize()
+        aur.append(_rpc_result(name, f"{rng.randint(0, 9)}.{rng.randint(0, 9)}-1", desc, i))
+
+    for repo in REPOS:
+        current = [pkg for pkg in repo_packages if pkg['repo'] == repo]
+        _write_sync_db(os.path.join(dbpath, 'sync', f'{repo}.db'), current)
+        newer = [
+            dict(pkg, version=f"{pkg['version'][:-2]}.1-1") if pkg['name'] in upgraded else pkg
+            for pkg in current
+        ]
+        repo_dir = os.path.join(mirror, repo, 'os', ARCH)
+        os.makedirs(repo_dir, exist_ok=True)
+        _write_sync_db(os.path.join(repo_dir, f'{repo}.db'), newer)
+        # The mirror copy must look newer than the system's for If-Modified-Since style checks
+        later = time.time() + 60
+        os.utime(os.path.join(repo_dir, f'{repo}.db'), (later, later))
+
+    conf = os.path.join(root, 'pacman.conf')
+    with open(conf, 'w') as f:
+        f.write(f"[options]\nArchitecture = {ARCH}\n")
+        for repo in REPOS:
+            f.write(f"\n[{repo}]\nServer = file://{mirror}/$repo/os/$arch\n")
+
+    aur_path = os.path.join(root, 'aur.json')
+    with open(aur_path, 'w') as f:
+        json.dump(aur, f)
+
+    return {
+        'root': root,
+        'dbpath': dbpath,
+        'conf': conf,
+        'aur': aur_path,
+        'packages': packages,
+        'installed': len(installed) + foreign,
+        'repo_updates': len(upgraded),
+        'aur_updates': foreign // 2,
+    }
+
+
+def _write_local(dbpath, pkg, installdate, reason):
+    entry = os.path.join(dbpath, 'local', f"{pkg['name']}-{pkg['version']}")
+    os.makedirs(entry, exist_ok=True)
+    with open(os.path.join(entry, 'desc'), 'w') as f:
+        f.write(_desc({
+            'NAME': pkg['name'],
+            'VERSION': pkg['version'],
+            'DESC': pkg['desc'],
+            'INSTALLDATE': installdate,
+            'SIZE': pkg['isize'],
+            'REASON': reason,
+            'DEPENDS': pkg.get('depends', []),
+            'PROVIDES': pkg.get('provides', []),
+        }))
+
+
+def _rpc_result(name, version, desc, i):
+    return {
+        'ID': i, 'Name': name, 'PackageBase': name, 'Version': version, 'Description': desc,
+        'URL': None, 'NumVotes': i % 100, 'Popularity': (i % 100) / 10, 'OutOfDate': None,
+        'Maintainer': 'bench', 'FirstSubmitted': 0, 'LastModified': 0,
+        'Depends': [], 'MakeDepends': [], 'License': ['MIT'],
+    }
+
+
+class AURFixtureServer:
+    """Local HTTP server answering AUR RPC v5 search and info requests from a fixture file
+
+    ``latency`` adds a fixed delay per request to model the round trip to aurweb.
+    """
+
+    def __init__(self, fixture, latency=0.0):
+        with open(fixture) as f:
+            self.packages = {pkg['Name']: pkg for pkg in json.load(f)}
+        self.latency = latency
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                body = json.dumps(server.answer(query)).encode()
+                if server.latency:
+                    time.sleep(server.latency)
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/rpc/"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def answer(self, query):
+        kind = (query.get('type') or [''])[0]
+        if kind == 'info':
+            results = [self.packages[name] for name in query.get('arg[]', []) if name in self.packages]
+        elif kind == 'search':
+            arg = (query.get('arg') or [''])[0].lower()
+            by = (query.get('by') or ['name-desc'])[0]
+            results = [
+                pkg for pkg in self.packages.values()
+                if arg in pkg['Name'].lower() or (by == 'name-desc' and arg in pkg['Description'].lower())
+            ]
+        else:
+            return {'version': 5, 'type': 'error', 'resultcount': 0, 'results': [],
+                    'error': "Incorrect request type specified."}
+        return {'version': 5, 'type': 'multiinfo' if kind == 'info' else kind,
+                'resultcount': len(results), 'results': results}
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
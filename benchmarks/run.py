@@ -0,0 +1,227 @@
+"""Benchmark suite: search latency, update checks, view ingestion and log throughput
+
+Generates a synthetic system per size (see fixtures.py), serves the AUR
+fixture over a local RPC stand-in and drives a real AURManager under Qt's
+offscreen platform. Privileged commands go through the stand-in sudo and
+pacman/yay in benchmarks/bin, so nothing needs root or the network.
+
+    python benchmarks/run.py
+    python benchmarks/run.py --sizes 1000 10000 50000 --repeat 5 --output results.json
+
+Results are JSON: one entry per metric and size with the median, min, max
+and raw samples, so a CI job can compare them against a previous run.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+BIN_DIR = os.path.join(BENCH_DIR, 'bin')
+sys.path.insert(0, ROOT)
+
+from fixtures import AURFixtureServer, make_system
+
+SEARCHES = {'name': 'pkg00042', 'word': 'library', 'two_terms': 'audio plugin'}
+LOG_LINES = 100_000
+STREAMED_LINES = 20_000
+
+
+class Suite:
+    def __init__(self, app, repeat, timeout):
+        self.app = app
+        self.repeat = repeat
+        self.timeout = timeout
+        self.results = []
+
+    def wait_until(self, condition):
+        deadline = time.monotonic() + self.timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                raise TimeoutError("benchmark step did not finish in time")
+            self.app.processEvents()
+            time.sleep(0.0005)
+
+    def record(self, name, size, unit, samples, **extra):
+        self.results.append({
+            'name': name,
+            'size': size,
+            'unit': unit,
+            'median': statistics.median(samples),
+            'min': min(samples),
+            'max': max(samples),
+            'samples': samples,
+            **extra
+        })
+        print(f"{name:<32} {'' if size is None else size:>6} {statistics.median(samples):>12.4f} {unit}",
+              file=sys.stderr)
+
+    def run_job(self, window, task, mutating=False):
+        """Run task on a PackageWorker through the window's scheduler and wait for it"""
+        from aur_manager import PackageWorker
+
+        done = []
+        worker = PackageWorker(task, window)
+        worker.output.connect(window.log_to_terminal)
+        worker.sudo_command.connect(window.handle_sudo_command)
+        worker.finished.connect(lambda: done.append(True))
+        window.scheduler.submit(worker, mutating=mutating)
+        self.wait_until(lambda: done)
+
+    def model_settled(self, model):
+        return model.total_rows() == model.rowCount()
+
+    def bench_search(self, window, size):
+        for label, query in SEARCHES.items():
+            samples = []
+            for _ in range(self.repeat):
+                window._last_search = None
+                window.search_input.blockSignals(True)
+                window.search_input.setText(query)
+                window.search_input.blockSignals(False)
+                start = time.perf_counter()
+                window.search_packages()
+                self.wait_until(lambda: window.search_worker is None and self.model_settled(window.package_model))
+                samples.append(time.perf_counter() - start)
+            self.record(f'search/{label}', size, 's', samples, rows=window.package_model.rowCount())
+
+    def bench_updates(self, window, size, expected):
+        window.tab_widget.setCurrentIndex(1)
+        window.download_checkbox.setChecked(False)
+        samples = []
+        for _ in range(self.repeat + 1):
+            start = time.perf_counter()
+            window.check_updates()
+            self.wait_until(lambda: window.update_worker is None and self.model_settled(window.updates_model))
+            samples.append(time.perf_counter() - start)
+        found = window.updates_model.rowCount()
+        # The first check copies the mirror databases into the private sync DB
+        self.record('updates/first_check', size, 's', samples[:1], found=found, expected=expected)
+        self.record('updates/check', size, 's', samples[1:], found=found, expected=expected)
+        window.tab_widget.setCurrentIndex(0)
+
+    def bench_view(self, window, size):
+        from aur_manager import PackageWorker
+        from records import PackageRecord
+
+        records = [
+            PackageRecord("", f"pkg{i:05d}", "1.0-1", "extra", "Synthetic package for the view benchmark")
+            for i in range(size)
+        ]
+        samples = []
+        for _ in range(self.repeat):
+            window.package_model.clear()
+            start = time.perf_counter()
+            for i in range(0, len(records), PackageWorker.BATCH_SIZE):
+                window.add_packages_to_tree(records[i:i + PackageWorker.BATCH_SIZE])
+                self.app.processEvents()
+            self.wait_until(lambda: self.model_settled(window.package_model))
+            self.app.processEvents()
+            samples.append(size / (time.perf_counter() - start))
+        window.package_model.clear()
+        self.record('view/rows_per_second', size, 'rows/s', samples)
+
+    def bench_log(self, window):
+        samples = []
+        for _ in range(self.repeat):
+            start = time.perf_counter()
+            writer = threading.Thread(
+                target=lambda: [window.log_to_terminal(f"log line {i}") for i in range(LOG_LINES)]
+            )
+            writer.start()
+            self.wait_until(lambda: not writer.is_alive() and window.log_sink.pending() == 0)
+            samples.append(LOG_LINES / (time.perf_counter() - start))
+        self.record('log/lines_per_second', None, 'lines/s', samples)
+
+    def bench_streamed(self, window):
+        from helpers import YayBackend
+        from privileged import PrivilegedSession
+
+        session = PrivilegedSession(sudo=[os.path.join(BIN_DIR, 'sudo')], search_path=BIN_DIR)
+        session.start('bench')
+        window.privileged_session = session
+        # The AUR helper runs as the user and gets the password through SUDO_ASKPASS
+        window.cache_sudo_password('bench')
+        env = {'ORACLE_BENCH_LINES': STREAMED_LINES}
+        helper_env = {**env, 'PATH': f"{BIN_DIR}{os.pathsep}{os.environ.get('PATH', '')}"}
+        upgrade = YayBackend(os.path.join(BIN_DIR, 'yay')).upgrade_command()
+        for name, run in (
+            ('pacman', lambda worker: worker.run_sudo_command(['pacman', '-Syu', '--noconfirm'], env=env)),
+            ('yay', lambda worker: worker.run_helper_command(upgrade, env=helper_env)),
+        ):
+            samples = []
+            for _ in range(self.repeat):
+                start = time.perf_counter()
+                self.run_job(window, run, mutating=True)
+                self.wait_until(lambda: window.log_sink.pending() == 0)
+                samples.append(STREAMED_LINES / (time.perf_counter() - start))
+            self.record(f'log/streamed_{name}_lines_per_second', None, 'lines/s', samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=600)
+    parser.add_argument('--aur-latency', type=float, default=0.0, help="seconds added to every AUR request")
+    parser.add_argument('--output', help="write the JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+    from PyQt6.QtCore import QT_VERSION_STR
+    from PyQt6.QtWidgets import QApplication
+    app = QApplication([sys.argv[0]])
+    suite = Suite(app, args.repeat, args.timeout)
+
+    with tempfile.TemporaryDirectory(prefix='oracle-bench-') as workdir:
+        for index, size in enumerate(args.sizes):
+            root = os.path.join(workdir, str(size))
+            start = time.perf_counter()
+            system = make_system(root, size)
+            suite.record('fixtures/generate', size, 's', [time.perf_counter() - start])
+            # Every size gets its own caches: RPC responses, snapshots, private sync DB, logs
+            os.environ['XDG_CACHE_HOME'] = os.path.join(root, 'cache')
+
+            from aur_manager import AURManager
+            with AURFixtureServer(system['aur'], args.aur_latency) as server:
+                start = time.perf_counter()
+                window = AURManager(system['dbpath'], system['conf'], server.url)
+                window.show()
+                suite.wait_until(lambda: window.databases_loaded)
+                suite.record('startup/databases_loaded', size, 's', [time.perf_counter() - start])
+
+                suite.bench_search(window, size)
+                suite.bench_updates(window, size, system['repo_updates'] + system['aur_updates'])
+                suite.bench_view(window, size)
+                if index == 0:
+                    suite.bench_log(window)
+                    suite.bench_streamed(window)
+                window.close()
+                window.deleteLater()
+                app.processEvents()
+
+    result = {
+        'suite': 'oracle',
+        'python': platform.python_version(),
+        'qt': QT_VERSION_STR,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'repeat': args.repeat,
+        'results': suite.results,
+    }
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
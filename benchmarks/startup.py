@@ -0,0 +1,91 @@
+"""Startup benchmark: time to first paint and time to interactive
+
+Launches Oracle repeatedly with ORACLE_STARTUP_TRACE set and reads back the
+marks it records (see StartupTrace in aur_manager.py). Every time is measured
+from just before the process is spawned, so interpreter start-up, bundle
+extraction and imports are included. Runs use the offscreen Qt platform by
+default so results do not depend on a compositor.
+
+    python benchmarks/startup.py --runs 10
+    python benchmarks/startup.py --command dist/oracle/oracle --output startup.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MARKS = ('imported', 'constructed', 'first_paint', 'interactive')
+
+
+def launch(command, env, timeout):
+    """Run one start-up and return {mark: seconds since spawn}"""
+    fd, trace = tempfile.mkstemp(prefix='oracle-startup-', suffix='.json')
+    os.close(fd)
+    try:
+        env = dict(env, ORACLE_STARTUP_TRACE=trace)
+        start = time.time()
+        subprocess.run(command, env=env, timeout=timeout, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        with open(trace) as f:
+            marks = json.load(f)
+        return {name: marks[name] - start for name in MARKS if name in marks}
+    finally:
+        os.unlink(trace)
+
+
+def summarize(samples):
+    summary = {}
+    for name in MARKS:
+        values = [sample[name] for sample in samples if name in sample]
+        if values:
+            summary[name] = {
+                'min': min(values),
+                'median': statistics.median(values),
+                'max': max(values),
+            }
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--command', nargs='+', default=[sys.executable, os.path.join(ROOT, 'oracle.py')],
+                        help="program to start (default: oracle.py with this interpreter)")
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1, help="untimed runs to warm the page cache first")
+    parser.add_argument('--platform', default='offscreen', help="QT_QPA_PLATFORM for the launched process")
+    parser.add_argument('--timeout', type=float, default=60)
+    parser.add_argument('--output', help="write the JSON results here instead of stdout")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ, QT_QPA_PLATFORM=args.platform)
+    for _ in range(args.warmup):
+        launch(args.command, env, args.timeout)
+    samples = [launch(args.command, env, args.timeout) for _ in range(args.runs)]
+
+    result = {
+        'benchmark': 'startup',
+        'command': args.command,
+        'platform': args.platform,
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'runs': args.runs,
+        'warmup': args.warmup,
+        'samples': samples,
+        'summary': summarize(samples),
+    }
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
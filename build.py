@@ -1,11 +1,28 @@
 import PyInstaller.__main__
-import os
+import sys
+
+# Python modules that end up in the analysis but are never imported at runtime
+EXCLUDES = [
+    'tkinter',
+    'PyQt6.QtNetwork',
+    'PyQt6.QtQml',
+    'PyQt6.QtQuick',
+    'PyQt6.QtSql',
+    'PyQt6.QtTest',
+]
+
+# --fast builds a one-folder bundle (dist/oracle/oracle): nothing is unpacked
+# to a temporary directory on launch, so it starts noticeably quicker than the
+# single-file release binary.
+fast = '--fast' in sys.argv[1:]
 
 PyInstaller.__main__.run([
-    'aur_manager.py',
+    'oracle.py',
     '--name=oracle',
-    '--onefile',
+    '--onedir' if fast else '--onefile',
     '--windowed',
     '--clean',
     '--noupx',
-]) 
\ No newline at end of file
+    '--noconfirm',
+    *(f'--exclude-module={module}' for module in EXCLUDES),
+])
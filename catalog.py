@@ -0,0 +1,107 @@
+import json
+import os
+
+from pacman_db import DEFAULT_DBPATH, package_tokens
+from storage import atomic_write, cache_dir
+
+CATALOG_VERSION = 1
+
+
+def default_catalog_path():
+    return cache_dir('catalog.json')
+
+
+def database_stamps(dbpath=DEFAULT_DBPATH):
+    """(mtime_ns, size) of the local database directory and of every sync database
+
+    pacman adds and removes an entry directory under local/ for every
+    package it installs, upgrades or removes, so the directory's mtime moves
+    with each transaction; sync databases are replaced whole on -Sy.
+    """
+    stamps = {}
+    try:
+        st = os.stat(os.path.join(dbpath, 'local'))
+        stamps['local'] = [st.st_mtime_ns, st.st_size]
+    except OSError:
+        pass
+    try:
+        with os.scandir(os.path.join(dbpath, 'sync')) as it:
+            for entry in it:
+                if entry.name.endswith('.db') and entry.is_file():
+                    st = entry.stat()
+                    stamps[f'sync/{entry.name}'] = [st.st_mtime_ns, st.st_size]
+    except OSError:
+        pass
+    return stamps
+
+
+class CatalogSnapshot:
+    """The installed set and repo catalog as of the previous session
+
+    Loading the snapshot is a single JSON read, so the window can show
+    installed markers and answer repo searches right away while the real
+    databases are parsed in the background. The database stamps stored with
+    it tell whether anything changed since it was written.
+    """
+
+    def __init__(self, path=None, dbpath=DEFAULT_DBPATH):
+        self.path = path or default_catalog_path()
+        self.dbpath = dbpath
+        self.stamps = {}
+        self.installed = {}
+        self.packages = []
+
+    def load(self):
+        """Read the snapshot; returns False when there is none or it cannot be used"""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(data, dict) or data.get('version') != CATALOG_VERSION:
+            return False
+        self.stamps = data['stamps']
+        self.installed = data['installed']
+        self.packages = [
+            {'name': name, 'version': version, 'repo': repo, 'desc': desc,
+             'provides': provides, 'groups': groups}
+            for repo, rows in data['repos'].items()
+            for name, version, desc, provides, groups in rows
+        ]
+        return True
+
+    def is_current(self, stamps=None):
+        """Whether the databases are unchanged since the snapshot was saved"""
+        return bool(self.stamps) and self.stamps == (stamps or database_stamps(self.dbpath))
+
+    def save(self, local_db, sync_db, stamps):
+        """Write the parsed databases out; stamps must be taken before they were refreshed"""
+        repos = {
+            name: [
+                [pkg['name'], pkg['version'], pkg.get('desc', ''),
+                 pkg.get('provides', []), pkg.get('groups', [])]
+                for pkg in repo.packages
+            ]
+            for name, repo in sync_db.repos.items()
+        }
+        data = {
+            'version': CATALOG_VERSION,
+            'stamps': stamps,
+            'installed': local_db.installed(),
+            'repos': repos
+        }
+        with atomic_write(self.path) as f:
+            json.dump(data, f, separators=(',', ':'))
+        self.stamps = stamps
+
+    def search(self, query):
+        """Same matching as SyncDatabase.search, as a scan over the snapshot"""
+        terms = query.lower().split()
+        if not terms:
+            return []
+        results = []
+        for pkg in self.packages:
+            tokens = set(package_tokens(pkg))
+            if all(any(term in token for token in tokens) for term in terms):
+                results.append(pkg)
+        return results
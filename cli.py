@@ -0,0 +1,293 @@
+"""Headless command line interface over the same package engine as the GUI
+
+Nothing here imports Qt. Modules that are slow to import (requests, for the
+AUR and mirror code) are only imported by the commands that need them, so
+``oracle check-updates`` on a host without a display starts as fast as the
+interpreter does.
+
+With --json every result is written as one JSON object per line and flushed
+immediately, so a caller can consume the stream while the command runs.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from pacman_db import DEFAULT_CONF, DEFAULT_DBPATH, local_versions, root_paths
+
+COMMANDS = ('search', 'check-updates', 'install', 'inspect-roots')
+
+# check-updates exit status when nothing is out of date, like checkupdates(8)
+NO_UPDATES = 2
+
+
+class Output:
+    """Writes events as JSON lines or as plain text"""
+
+    def __init__(self, as_json, stream=None):
+        self.as_json = as_json
+        self.stream = stream or sys.stdout
+
+    def emit(self, kind, text=None, **fields):
+        if self.as_json:
+            self.stream.write(json.dumps({'type': kind, **fields}) + '\n')
+            self.stream.flush()
+        elif text is not None:
+            print(text, file=sys.stderr if kind in ('warning', 'error') else self.stream, flush=True)
+
+
+def _repo_search(args):
+    from catalog import CatalogSnapshot
+
+    # The GUI's snapshot answers as well as the real databases while they are unchanged
+    catalog = CatalogSnapshot(dbpath=args.dbpath)
+    if catalog.load() and catalog.is_current():
+        return catalog.search(' '.join(args.query))
+
+    from pacman_db import SyncDatabase
+    sync_db = SyncDatabase(args.dbpath, args.config)
+    sync_db.refresh()
+    return sync_db.search(' '.join(args.query))
+
+
+def search(args, out):
+    installed = local_versions(args.dbpath)
+    found = 0
+    for pkg in _repo_search(args):
+        found += 1
+        current = installed.get(pkg['name'])
+        out.emit(
+            'package',
+            f"{pkg['repo']}/{pkg['name']} {pkg['version']}{' [installed]' if current else ''}\n"
+            f"    {pkg.get('desc', '')}",
+            name=pkg['name'], version=pkg['version'], source=pkg['repo'],
+            description=pkg.get('desc', ''), installed=current
+        )
+
+    if not args.repo_only:
+        if args.offline:
+            from aur_snapshot import AURSnapshot
+            results = AURSnapshot().search(' '.join(args.query))
+        else:
+            from aur_rpc import AURClient, AURError
+            try:
+                results = AURClient().search(' '.join(args.query))
+            except AURError as e:
+                out.emit('error', f"error: {e}", message=str(e))
+                return 1
+        for pkg in results:
+            found += 1
+            current = installed.get(pkg['Name'])
+            out.emit(
+                'package',
+                f"aur/{pkg['Name']} {pkg['Version']}{' [installed]' if current else ''}\n"
+                f"    {pkg.get('Description') or ''}",
+                name=pkg['Name'], version=pkg['Version'], source='AUR',
+                description=pkg.get('Description') or '', installed=current
+            )
+    out.emit('summary', None, results=found)
+    return 0 if found else 1
+
+
+def check_updates(args, out):
+    from updates import UpdateEngine
+
+    engine = UpdateEngine(dbpath=args.dbpath, conf=args.config)
+    for repo, error in engine.refresh().items():
+        out.emit('warning', f"warning: could not refresh {repo}: {error}", repo=repo, message=error)
+
+    found = 0
+    for name, current, new, repo in engine.repo_updates():
+        found += 1
+        out.emit('update', f"{name} {current} -> {new}",
+                 name=name, current_version=current, new_version=new, source=repo)
+
+    if not args.no_aur:
+        foreign = engine.foreign_packages()
+        installed = engine.local_db.installed()
+        if args.offline:
+            from aur_snapshot import AURSnapshot
+            from pacman_db import vercmp
+            updates = [
+                (pkg['Name'], installed[pkg['Name']], pkg['Version'])
+                for pkg in AURSnapshot().info(foreign)
+                if vercmp(pkg['Version'], installed[pkg['Name']]) > 0
+            ]
+        else:
+            from aur_rpc import AURClient, AURError
+            from aur_updates import AURUpdateChecker
+            try:
+                updates = AURUpdateChecker(AURClient()).check(installed, foreign, devel=args.devel)
+            except AURError as e:
+                out.emit('error', f"error: {e}", message=str(e))
+                return 1
+        for name, current, new in updates:
+            found += 1
+            out.emit('update', f"{name} {current} -> {new} [AUR]",
+                     name=name, current_version=current, new_version=new, source='AUR')
+
+    out.emit('summary', None, updates=found)
+    return 0 if found else NO_UPDATES
+
+
+def _run(cmd, out):
+    """Run cmd, streaming its combined output; returns the exit status"""
+    out.emit('command', f":: {' '.join(cmd)}", command=cmd)
+    try:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+    except OSError as e:
+        out.emit('error', f"error: {e}", message=str(e))
+        return 127
+    for line in process.stdout:
+        line = line.rstrip('\n')
+        out.emit('output', line, line=line)
+    return process.wait()
+
+
+def _pacman_options(args):
+    options = []
+    if args.root:
+        options += ['--root', args.root]
+    if args.dbpath != DEFAULT_DBPATH:
+        options += ['--dbpath', args.dbpath]
+    if args.config != DEFAULT_CONF:
+        options += ['--config', args.config]
+    return options
+
+
+def install(args, out):
+    from pacman_db import SyncDatabase
+
+    sync_db = SyncDatabase(args.dbpath, args.config)
+    sync_db.refresh()
+    names = list(dict.fromkeys(args.packages))
+    repo_packages = [name for name in names if name in sync_db]
+    aur_packages = [name for name in names if name not in sync_db]
+
+    backend = None
+    if aur_packages and args.root:
+        message = f"AUR packages can only be installed into the live root: {', '.join(aur_packages)}"
+        out.emit('error', f"error: {message}", message=message, packages=aur_packages)
+        return 1
+    if aur_packages:
+        from aur_rpc import AURClient, AURError
+        from helpers import HelperRegistry
+        try:
+            found = {pkg['Name'] for pkg in AURClient().info(aur_packages)}
+        except AURError as e:
+            out.emit('error', f"error: {e}", message=str(e))
+            return 1
+        missing = [name for name in aur_packages if name not in found]
+        if missing:
+            message = f"not found in the repositories or the AUR: {', '.join(missing)}"
+            out.emit('error', f"error: {message}", message=message, packages=missing)
+            return 1
+        backend = HelperRegistry().preferred()
+        if backend is None:
+            message = "no AUR helper found; install yay, paru or another AUR helper"
+            out.emit('error', f"error: {message}", message=message)
+            return 1
+
+    sudo = [] if os.geteuid() == 0 else ['sudo']
+    if repo_packages:
+        rc = _run([*sudo, 'pacman', '-S', '--noconfirm', *_pacman_options(args), *repo_packages], out)
+        if rc:
+            out.emit('error', f"error: pacman exited with status {rc}", message="pacman failed", exit=rc)
+            return rc
+    if aur_packages:
+        # Helpers escalate through sudo themselves and refuse to run as root
+        rc = _run(backend.install_command(aur_packages), out)
+        if rc:
+            out.emit('error', f"error: {backend.name} exited with status {rc}",
+                     message=f"{backend.name} failed", exit=rc)
+            return rc
+    out.emit('summary', None, installed=names)
+    return 0
+
+
+def inspect_roots(args, out):
+    from roots import RootInspector, make_target
+
+    def report(result):
+        target = result.target
+        if result.error:
+            out.emit('error', f"error: {target.root}: {result.error}",
+                     root=target.root, dbpath=target.dbpath, message=result.error)
+            return
+        for repo, error in result.failures.items():
+            out.emit('warning', f"warning: {target.root}: could not refresh {repo}: {error}",
+                     root=target.root, repo=repo, message=error)
+        lines = [f"{target.root}: {len(result.installed)} installed, {len(result.updates)} updates, "
+                 f"{len(result.orphans)} orphans, {len(result.foreign)} foreign"]
+        lines += [f"    {name} {current} -> {new}" for name, current, new, _ in result.updates]
+        if result.orphans:
+            lines.append(f"    orphans: {' '.join(result.orphans)}")
+        out.emit(
+            'root', '\n'.join(lines), root=target.root, dbpath=target.dbpath, config=target.conf,
+            installed=len(result.installed), foreign=result.foreign, orphans=result.orphans,
+            updates=[{'name': name, 'current_version': current, 'new_version': new, 'source': repo}
+                     for name, current, new, repo in result.updates]
+        )
+
+    targets = [make_target(root) for root in args.roots]
+    results = RootInspector(args.jobs, sync=not args.no_sync).inspect(targets, report)
+    failed = [result.target.root for result in results if result.error]
+    out.emit('summary', None, roots=len(results), failed=failed,
+             updates=sum(len(result.updates) for result in results),
+             orphans=sum(len(result.orphans) for result in results))
+    return 1 if failed else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='oracle', description="Search, check and install Arch packages")
+    parser.add_argument('--root', help="installation root to operate on instead of /")
+    parser.add_argument('--dbpath', help=f"pacman database directory (default: {DEFAULT_DBPATH} in the root)")
+    parser.add_argument('--config', help=f"pacman configuration file (default: the root's, else {DEFAULT_CONF})")
+    parser.add_argument('--json', action='store_true', help="write one JSON object per line")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    search_parser = commands.add_parser('search', help="search the repositories and the AUR")
+    search_parser.add_argument('query', nargs='+')
+    search_parser.add_argument('--repo-only', action='store_true', help="do not search the AUR")
+    search_parser.add_argument('--offline', action='store_true', help="search the offline AUR snapshot")
+    search_parser.set_defaults(handler=search)
+
+    updates_parser = commands.add_parser('check-updates', help="list pending repository and AUR updates")
+    updates_parser.add_argument('--no-aur', action='store_true', help="only check the repositories")
+    updates_parser.add_argument('--offline', action='store_true', help="compare against the offline AUR snapshot")
+    updates_parser.add_argument('--devel', action='store_true', help="also check VCS packages for new commits")
+    updates_parser.set_defaults(handler=check_updates)
+
+    install_parser = commands.add_parser('install', help="install packages from the repositories or the AUR")
+    install_parser.add_argument('packages', nargs='+')
+    install_parser.set_defaults(handler=install)
+
+    roots_parser = commands.add_parser(
+        'inspect-roots', help="report installed packages, pending updates and orphans of several roots at once"
+    )
+    roots_parser.add_argument('roots', nargs='+', metavar='root')
+    roots_parser.add_argument('--jobs', type=int, help="roots inspected at the same time (default: CPU count)")
+    roots_parser.add_argument('--no-sync', action='store_true',
+                              help="compare against the last downloaded databases instead of refreshing them")
+    roots_parser.set_defaults(handler=inspect_roots)
+
+    # Global options are also accepted after the subcommand
+    for sub in (search_parser, updates_parser, install_parser, roots_parser):
+        sub.add_argument('--json', action='store_true', default=argparse.SUPPRESS)
+        sub.add_argument('--root', default=argparse.SUPPRESS)
+        sub.add_argument('--dbpath', default=argparse.SUPPRESS)
+        sub.add_argument('--config', default=argparse.SUPPRESS)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.dbpath, args.config = root_paths(args.root or '/', args.dbpath, args.config)
+    out = Output(args.json)
+    try:
+        return args.handler(args, out)
+    except KeyboardInterrupt:
+        return 130
+    except BrokenPipeError:
+        return 0
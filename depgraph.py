@@ -0,0 +1,159 @@
+import threading
+
+from pacman_db import strip_depver
+
+# %REASON% of a package installed as a dependency of another
+REASON_DEPEND = '1'
+
+
+def _tokens(pkg):
+    """Names a package satisfies: its own name and everything it provides"""
+    return {pkg['name'], *(strip_depver(provide) for provide in pkg.get('provides', ()))}
+
+
+class DependencyGraph:
+    """Reverse-dependency index over the local database
+
+    Dependencies are kept as token edges: each package maps to the names it
+    satisfies (itself plus provides) and to the names it needs, and each
+    needed name maps back to the packages that want it. Required-by, the
+    removal closure and orphans are then set lookups. ``sync`` notices
+    changed entries of the LocalDatabase by identity and only re-indexes
+    those, so it is cheap to call before every query.
+    """
+
+    def __init__(self, local_db):
+        self.local_db = local_db
+        self._seen = {}
+        self._provides = {}
+        self._needs = {}
+        self._providers = {}
+        self._wanted_by = {}
+        self._optional_for = {}
+        self._replaced_by = {}
+        self._lock = threading.RLock()
+
+    def sync(self):
+        """Re-index packages that were added, changed or removed since the last call"""
+        with self._lock:
+            packages = self.local_db.packages
+            changed = [name for name, pkg in packages.items() if self._seen.get(name) is not pkg]
+            removed = [name for name in self._seen if name not in packages]
+            for name in removed + changed:
+                self._remove(name)
+            for name in changed:
+                self._add(packages[name])
+            return set(changed) | set(removed)
+
+    def _add(self, pkg):
+        name = pkg['name']
+        self._seen[name] = pkg
+        self._provides[name] = _tokens(pkg)
+        self._needs[name] = {strip_depver(dep) for dep in pkg.get('depends', ())}
+        for token in self._provides[name]:
+            self._providers.setdefault(token, set()).add(name)
+        for token in self._needs[name]:
+            self._wanted_by.setdefault(token, set()).add(name)
+        for dep in pkg.get('optdepends', ()):
+            token = strip_depver(dep.split(':', 1)[0].strip())
+            self._optional_for.setdefault(token, set()).add(name)
+        for replaced in pkg.get('replaces', ()):
+            self._replaced_by.setdefault(strip_depver(replaced), set()).add(name)
+
+    def _remove(self, name):
+        pkg = self._seen.pop(name, None)
+        if pkg is None:
+            return
+        for token in self._provides.pop(name, ()):
+            self._discard(self._providers, token, name)
+        for token in self._needs.pop(name, ()):
+            self._discard(self._wanted_by, token, name)
+        for dep in pkg.get('optdepends', ()):
+            self._discard(self._optional_for, strip_depver(dep.split(':', 1)[0].strip()), name)
+        for replaced in pkg.get('replaces', ()):
+            self._discard(self._replaced_by, strip_depver(replaced), name)
+
+    @staticmethod
+    def _discard(index, token, name):
+        names = index.get(token)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del index[token]
+
+    def required_by(self, name):
+        """Installed packages with a dependency that name satisfies"""
+        with self._lock:
+            result = set()
+            for token in self._provides.get(name, ()):
+                result |= self._wanted_by.get(token, set())
+            result.discard(name)
+            return result
+
+    def optional_for(self, name):
+        with self._lock:
+            result = set()
+            for token in self._provides.get(name, ()):
+                result |= self._optional_for.get(token, set())
+            result.discard(name)
+            return result
+
+    def depends_on(self, name):
+        """Installed packages satisfying name's dependencies"""
+        with self._lock:
+            result = set()
+            for token in self._needs.get(name, ()):
+                result |= self._providers.get(token, set())
+            result.discard(name)
+            return result
+
+    def replaced_by(self, name):
+        with self._lock:
+            return set(self._replaced_by.get(name, ()))
+
+    def removal_closure(self, names):
+        """Every package pacman -Rc would remove along with names
+
+        A dependent goes too only when one of its dependencies loses its
+        last installed provider; a dependency that was already unsatisfied
+        does not count.
+        """
+        with self._lock:
+            removed = set(names)
+            queue = list(removed)
+            while queue:
+                name = queue.pop()
+                for dependent in self.required_by(name):
+                    if dependent in removed:
+                        continue
+                    providers = (self._providers.get(token) for token in self._needs[dependent])
+                    if any(found and found <= removed for found in providers):
+                        removed.add(dependent)
+                        queue.append(dependent)
+            return removed
+
+    def orphans_after(self, removed):
+        """Dependencies that nothing would need any more once removed is gone (what -Rs adds)"""
+        with self._lock:
+            removed = set(removed)
+            orphans = set()
+            queue = list(removed)
+            while queue:
+                for dep in self.depends_on(queue.pop()):
+                    if dep in removed or dep in orphans:
+                        continue
+                    if self._seen[dep].get('reason') != REASON_DEPEND:
+                        continue
+                    if self.required_by(dep) <= removed | orphans:
+                        orphans.add(dep)
+                        queue.append(dep)
+            return orphans
+
+    def orphans(self):
+        """Packages installed as dependencies that nothing requires or optionally uses (pacman -Qdt)"""
+        with self._lock:
+            return {
+                name for name, pkg in self._seen.items()
+                if pkg.get('reason') == REASON_DEPEND
+                and not self.required_by(name) and not self.optional_for(name)
+            }
@@ -0,0 +1,194 @@
+import os
+import shutil
+import subprocess
+import threading
+
+
+class HelperBackend:
+    """Adapter for one AUR helper with a pacman-style command line
+
+    Commands are returned as argument lists starting with the helper's name.
+    Everything runs as the invoking user: helpers refuse to run as root and
+    escalate through sudo (or polkit, for pamac) only for the pacman step.
+    """
+    name = None
+    capabilities = frozenset({'search', 'info', 'install', 'upgrade'})
+    # Exit codes that mean "nothing found" rather than an error
+    empty_returncodes = ()
+
+    def __init__(self, path):
+        self.path = path
+        self.stamp = _stamp(path)
+        self._version = None
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        """First line of ``--version``, probed once per binary"""
+        with self._lock:
+            if self._version is None:
+                try:
+                    result = subprocess.run(
+                        [self.path, '--version'], capture_output=True, text=True, timeout=5
+                    )
+                    lines = result.stdout.strip().splitlines()
+                    self._version = lines[0] if lines else ''
+                except (OSError, subprocess.TimeoutExpired):
+                    self._version = ''
+            return self._version
+
+    def search_command(self, query):
+        return [self.name, '-Ss', *query.split()]
+
+    def info_command(self, names):
+        return [self.name, '-Si', *names]
+
+    def install_command(self, names):
+        return [self.name, '-S', '--noconfirm', *names]
+
+    def upgrade_command(self):
+        return [self.name, '-Su', '--noconfirm']
+
+    def query(self, cmd, timeout=60):
+        """Run an unprivileged search or info command and return its output"""
+        result = subprocess.run([self.path, *cmd[1:]], capture_output=True, text=True, timeout=timeout)
+        if result.returncode in self.empty_returncodes and not result.stdout.strip():
+            return ''
+        if result.returncode != 0:
+            raise subprocess.CalledProcessError(result.returncode, cmd, result.stdout, result.stderr)
+        return result.stdout
+
+    def search(self, query):
+        return self.query(self.search_command(query))
+
+    def info(self, names):
+        return self.query(self.info_command(names))
+
+
+class YayBackend(HelperBackend):
+    """-a limits an operation to the AUR; a search without results exits with 1"""
+    name = 'yay'
+    capabilities = HelperBackend.capabilities | {'aur-only'}
+    empty_returncodes = (1,)
+
+    def search_command(self, query):
+        return [self.name, '-Ssa', *query.split()]
+
+    def info_command(self, names):
+        return [self.name, '-Sia', *names]
+
+    # --sudoloop keeps sudo's timestamp fresh so a long build asks for the
+    # password once; -A makes sudo ask SUDO_ASKPASS even without a display
+    SUDO_OPTIONS = ('--sudoloop', '--sudoflags=-A')
+
+    def install_command(self, names):
+        return [self.name, '-S', '--noconfirm', *self.SUDO_OPTIONS, *names]
+
+    def upgrade_command(self):
+        return [self.name, '-Sua', '--noconfirm', *self.SUDO_OPTIONS]
+
+
+class PamacBackend(HelperBackend):
+    """pamac uses subcommands; AUR packages are built with ``pamac build``"""
+    name = 'pamac'
+    capabilities = HelperBackend.capabilities | {'aur-only'}
+    empty_returncodes = (1,)
+
+    def search_command(self, query):
+        return ['pamac', 'search', '-a', *query.split()]
+
+    def info_command(self, names):
+        return ['pamac', 'info', '-a', *names]
+
+    def install_command(self, names):
+        return ['pamac', 'build', '--no-confirm', *names]
+
+    def upgrade_command(self):
+        return ['pamac', 'upgrade', '-a', '--no-confirm']
+
+
+class ParuBackend(YayBackend):
+    name = 'paru'
+
+
+class AurmanBackend(HelperBackend):
+    name = 'aurman'
+
+
+class PikaurBackend(HelperBackend):
+    name = 'pikaur'
+
+
+# In order of preference
+BACKENDS = {
+    backend.name: backend
+    for backend in (YayBackend, ParuBackend, PamacBackend, AurmanBackend, PikaurBackend)
+}
+
+
+def _stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+class HelperRegistry:
+    """The AUR helpers found on PATH, looked up in-process and cached
+
+    The lookup is redone only when PATH changes, when a PATH directory
+    changes (a helper was installed or removed) or when one of the found
+    binaries changes (it was upgraded), so asking for the preferred helper
+    before every operation costs a handful of stat calls.
+    """
+
+    def __init__(self, backends=BACKENDS, path=None):
+        self.backend_types = dict(backends)
+        self.path = path
+        self._key = None
+        self._backends = []
+        self._lock = threading.Lock()
+
+    def _search_path(self):
+        return self.path if self.path is not None else os.environ.get('PATH', os.defpath)
+
+    def _current_key(self, search_path):
+        dirs = tuple((d, _stamp(d)) for d in search_path.split(os.pathsep) if d)
+        binaries = tuple((backend.path, _stamp(backend.path)) for backend in self._backends)
+        return search_path, dirs, binaries
+
+    def backends(self):
+        """Backends of every installed helper, in order of preference"""
+        with self._lock:
+            search_path = self._search_path()
+            key = self._current_key(search_path)
+            if key != self._key:
+                # Unchanged binaries keep their backend, and with it the probed version
+                previous = {backend.path: backend for backend in self._backends}
+                found = []
+                for name, backend_type in self.backend_types.items():
+                    path = shutil.which(name, path=search_path)
+                    if not path:
+                        continue
+                    backend = previous.get(path)
+                    if backend is None or backend.stamp != _stamp(path):
+                        backend = backend_type(path)
+                    found.append(backend)
+                self._backends = found
+                self._key = self._current_key(search_path)
+            return list(self._backends)
+
+    def preferred(self):
+        backends = self.backends()
+        return backends[0] if backends else None
+
+    def get(self, name):
+        for backend in self.backends():
+            if backend.name == name:
+                return backend
+        return None
+
+    def invalidate(self):
+        with self._lock:
+            self._key = None
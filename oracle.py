@@ -0,0 +1,31 @@
+"""Entry point: the headless CLI for known subcommands, the GUI otherwise
+
+The GUI module (and with it PyQt6) is only imported when no CLI
+subcommand was given, so scripted use never pays for Qt.
+"""
+import sys
+
+from privileged import ASKPASS_FLAG, HELPER_FLAG, askpass, serve
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == [HELPER_FLAG]:
+        return serve(argv)
+    if argv[:1] == [ASKPASS_FLAG]:
+        return askpass(argv)
+
+    import cli
+    if any(arg in cli.COMMANDS for arg in argv) or argv[:1] in (['-h'], ['--help']):
+        return cli.main(argv)
+
+    import aur_manager
+    return aur_manager.main(argv)
+
+
+if __name__ == '__main__':
+    if getattr(sys, 'frozen', False):
+        # Root inspection spawns worker processes, which re-enter the frozen binary
+        import multiprocessing
+        multiprocessing.freeze_support()
+    sys.exit(main())
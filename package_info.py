@@ -0,0 +1,179 @@
+import threading
+import time
+from collections import OrderedDict
+
+from aur_rpc import AURError
+
+AUR_SOURCE = 'AUR'
+
+
+def format_size(size):
+    """Human readable size for a byte count, or None"""
+    if size in (None, ''):
+        return None
+    size = float(size)
+    for unit in ('B', 'KiB', 'MiB', 'GiB'):
+        if abs(size) < 1024 or unit == 'GiB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.2f} {unit}"
+        size /= 1024
+
+
+def format_date(timestamp):
+    if timestamp in (None, ''):
+        return None
+    try:
+        return time.strftime('%Y-%m-%d %H:%M', time.localtime(int(timestamp)))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def details_from_desc(pkg, local=None):
+    """Normalise a sync or local desc entry (plus the installed entry, if any) into a details dict"""
+    local = local or {}
+    return {
+        'name': pkg['name'],
+        'version': pkg['version'],
+        'description': pkg.get('desc', ''),
+        'url': pkg.get('url'),
+        'repo': pkg.get('repo') or 'local',
+        'licenses': pkg.get('license', []),
+        'depends': pkg.get('depends', []),
+        'optdepends': pkg.get('optdepends', []),
+        'provides': pkg.get('provides', []),
+        'conflicts': pkg.get('conflicts', []),
+        'packager': pkg.get('packager'),
+        'build_date': _int(pkg.get('builddate')),
+        'download_size': _int(pkg.get('csize')),
+        'installed_size': _int(pkg.get('isize') or pkg.get('size')),
+        'installed_version': local.get('version'),
+        'install_date': _int(local.get('installdate')),
+        'required_by': [],
+        'optional_for': []
+    }
+
+
+def details_from_rpc(pkg, local=None):
+    """Normalise an AUR RPC (or snapshot) result into a details dict"""
+    local = local or {}
+    return {
+        'name': pkg['Name'],
+        'version': pkg['Version'],
+        'description': pkg.get('Description') or '',
+        'url': pkg.get('URL'),
+        'repo': AUR_SOURCE,
+        'licenses': pkg.get('License') or [],
+        'depends': pkg.get('Depends') or [],
+        'optdepends': pkg.get('OptDepends') or [],
+        'provides': pkg.get('Provides') or [],
+        'conflicts': pkg.get('Conflicts') or [],
+        'packager': pkg.get('Maintainer'),
+        'build_date': _int(pkg.get('LastModified')),
+        'download_size': None,
+        'installed_size': _int(local.get('size')),
+        'installed_version': local.get('version'),
+        'install_date': _int(local.get('installdate')),
+        'required_by': [],
+        'optional_for': []
+    }
+
+
+class PackageInfoStore:
+    """Structured package details for the detail pane
+
+    Repository and installed packages are answered straight from the parsed
+    sync and local databases. AUR details come from batched multiinfo
+    requests (falling back to the offline snapshot) and are kept in a bounded
+    LRU cache, so prefetching the rows around the viewport makes a later
+    click free.
+    """
+
+    def __init__(self, local_db, sync_db, aur_client, aur_snapshot=None, graph=None, max_entries=5000):
+        self.local_db = local_db
+        self.graph = graph
+        self.sync_db = sync_db
+        self.aur = aur_client
+        self.aur_snapshot = aur_snapshot
+        self.max_entries = max_entries
+        self._aur = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, name, source=None):
+        """Return details without touching the network, or None if an AUR fetch is needed"""
+        info = self._get(name, source)
+        if info is not None and info['installed_version'] and self.graph is not None:
+            self.graph.sync()
+            info['required_by'] = sorted(self.graph.required_by(name))
+            info['optional_for'] = sorted(self.graph.optional_for(name))
+        return info
+
+    def _get(self, name, source):
+        local = self.local_db.get(name)
+        if source != AUR_SOURCE:
+            repo = self.sync_db.repos.get(source)
+            pkg = (repo.by_name.get(name) if repo else None) or self.sync_db.get(name)
+            if pkg:
+                return details_from_desc(pkg, local)
+            if local:
+                return details_from_desc(local, local)
+        with self._lock:
+            pkg = self._aur.get(name)
+            if pkg is not None:
+                self._aur.move_to_end(name)
+                return details_from_rpc(pkg, local)
+        return None
+
+    def missing(self, entries):
+        """Names among (name, source) pairs whose details would need an AUR request"""
+        names = []
+        for name, source in entries:
+            if name not in self._aur and self.get(name, source) is None:
+                names.append(name)
+        return list(dict.fromkeys(names))
+
+    def fetch(self, names, offline=False):
+        """Fetch AUR details for names in one batched request; returns the names that were found"""
+        with self._lock:
+            names = [name for name in dict.fromkeys(names) if name not in self._aur]
+        if not names:
+            return []
+        results = []
+        if not offline:
+            try:
+                results = self.aur.info(names)
+            except AURError:
+                offline = True
+        if offline and self.aur_snapshot is not None:
+            results = self.aur_snapshot.info(names)
+
+        with self._lock:
+            # Unknown names are remembered as None so prefetching does not ask again
+            for name in names:
+                self._aur.setdefault(name, None)
+            for pkg in results:
+                self._aur[pkg['Name']] = pkg
+                self._aur.move_to_end(pkg['Name'])
+            while len(self._aur) > self.max_entries:
+                self._aur.popitem(last=False)
+        return [pkg['Name'] for pkg in results]
+
+    def details(self, name, source=None, offline=False):
+        """Return details, fetching from the AUR if necessary"""
+        info = self.get(name, source)
+        if info is None:
+            self.fetch([name], offline)
+            info = self.get(name, AUR_SOURCE)
+        return info
+
+    def invalidate(self, names=None):
+        with self._lock:
+            if names is None:
+                self._aur.clear()
+            for name in names or ():
+                self._aur.pop(name, None)
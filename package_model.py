@@ -0,0 +1,191 @@
+from operator import itemgetter
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, QTimer
+
+
+class ColumnStore:
+    """Column-oriented result storage: one list per field instead of a dict per row"""
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self.columns = [[] for _ in self.fields]
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def extend(self, rows):
+        for column, values in zip(self.columns, zip(*rows)):
+            column.extend(values)
+
+    def record(self, row):
+        return {field: column[row] for field, column in zip(self.fields, self.columns)}
+
+    def reorder(self, order):
+        """Permute every column so that new row i is old row order[i]"""
+        take = itemgetter(*order)
+        self.columns = [list(take(column)) for column in self.columns]
+
+    def clear(self):
+        self.columns = [[] for _ in self.fields]
+
+
+class PackageTableModel(QAbstractTableModel):
+    """Table model over a ColumnStore that inserts rows in batches
+
+    Rows added with add_row/add_rows are buffered and appended with a single
+    beginInsertRows/endInsertRows pair per flush, so the view only lays out
+    and paints what is visible once per batch instead of once per package.
+    Once a sort column is set, its keys are cached in store order: a batch is
+    appended and merged in by one linear pass (the store is then a sorted run
+    followed by the batch), and while rows keep arriving that merge happens
+    at most every ``sort_interval`` ms rather than after every flush.
+    """
+
+    def __init__(self, fields, headers, parent=None, flush_interval=30, sort_interval=250):
+        super().__init__(parent)
+        self.store = ColumnStore(fields)
+        self.headers = list(headers)
+        self._pending = []
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(flush_interval)
+        self._flush_timer.timeout.connect(self.flush)
+        self._sort_timer = QTimer(self)
+        self._sort_timer.setSingleShot(True)
+        self._sort_timer.setInterval(sort_interval)
+        self._sort_timer.timeout.connect(self._resort)
+        self._sort_column = -1
+        self._sort_order = Qt.SortOrder.AscendingOrder
+        self._sort_keys = None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.store.fields)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole) and index.isValid():
+            return self.store.columns[index.column()][index.row()]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.headers[section]
+        return None
+
+    def add_row(self, row):
+        self._pending.append(row)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def add_rows(self, rows):
+        self._pending.extend(rows)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self):
+        """Append all buffered rows in one insertion"""
+        self._flush_timer.stop()
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        first = len(self.store)
+        self.beginInsertRows(QModelIndex(), first, first + len(pending) - 1)
+        self.store.extend(pending)
+        self.endInsertRows()
+        if self._sort_column >= 0:
+            if self._sort_keys is not None:
+                self._sort_keys.extend(self._key(row[self._sort_column]) for row in pending)
+            if not self._sort_timer.isActive():
+                self._sort_timer.start()
+
+    @staticmethod
+    def _key(value):
+        # RootRecord has int columns; only text is compared case-insensitively
+        return value if isinstance(value, (int, float)) else (value or '').lower()
+
+    def _resort(self):
+        if self._sort_column >= 0:
+            self.sort(self._sort_column, self._sort_order)
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """Sort the store in place with one key pass per column instead of per-comparison data() calls"""
+        self._sort_timer.stop()
+        if column != self._sort_column:
+            self._sort_keys = None
+        self._sort_column = column
+        self._sort_order = order
+        if column < 0:
+            return
+        keys = self._sort_keys
+        if keys is None:
+            keys = [self._key(value) for value in self.store.columns[column]]
+        # Sorted in both directions, so a previous sort and an appended batch are two runs
+        new_order = sorted(range(len(keys)), key=keys.__getitem__)
+        if order == Qt.SortOrder.DescendingOrder:
+            new_order.reverse()
+        self._sort_keys = [keys[i] for i in new_order]
+        if len(new_order) < 2:
+            return
+        self.layoutAboutToBeChanged.emit()
+        self.store.reorder(new_order)
+        new_rows = [0] * len(new_order)
+        for new_row, old_row in enumerate(new_order):
+            new_rows[old_row] = new_row
+        persistent = self.persistentIndexList()
+        self.changePersistentIndexList(
+            persistent,
+            [self.index(new_rows[index.row()], index.column()) for index in persistent]
+        )
+        self.layoutChanged.emit()
+
+    def clear(self):
+        self._flush_timer.stop()
+        self._sort_timer.stop()
+        self._pending = []
+        self.beginResetModel()
+        self.store.clear()
+        if self._sort_keys is not None:
+            self._sort_keys = []
+        self.endResetModel()
+
+    def update_column(self, column, value):
+        """Recompute one column as value(record) for every row; returns the number of rows that changed"""
+        self.flush()
+        values = self.store.columns[column]
+        changed = []
+        for row in range(len(values)):
+            new = value(self.store.record(row))
+            if new != values[row]:
+                values[row] = new
+                changed.append(row)
+        if changed:
+            self.dataChanged.emit(self.index(changed[0], column), self.index(changed[-1], column))
+            if column == self._sort_column:
+                self._sort_keys = None
+                self.sort(column, self._sort_order)
+        return len(changed)
+
+    def total_rows(self):
+        """Number of rows including those still waiting to be flushed"""
+        return len(self.store) + len(self._pending)
+
+    def record(self, row):
+        return self.store.record(row)
+
+
+class PackageProxyModel(QSortFilterProxyModel):
+    """Filter proxy that hands sorting down to the source model's column store"""
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
+
+def create_proxy(model, parent=None):
+    """Wrap a model in a sort/filter proxy that matches filters against every column"""
+    proxy = PackageProxyModel(parent)
+    proxy.setSourceModel(model)
+    proxy.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+    proxy.setFilterKeyColumn(-1)
+    return proxy
@@ -0,0 +1,451 @@
+import glob
+import io
+import lzma
+import os
+import subprocess
+import tarfile
+import threading
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_DBPATH = '/var/lib/pacman'
+DEFAULT_CONF = '/etc/pacman.conf'
+
+ZSTD_MAGIC = b'\x28\xb5\x2f\xfd'
+# What read_sync_archive raises for a damaged or half-written database
+ARCHIVE_ERRORS = (
+    OSError, EOFError, tarfile.TarError, zlib.error, lzma.LZMAError, subprocess.CalledProcessError,
+    *((zstandard.ZstdError,) if zstandard is not None else ())
+)
+
+# Sections of a desc file that hold one value per line; everything else is scalar
+LIST_FIELDS = {
+    'groups', 'license', 'depends', 'optdepends', 'makedepends', 'checkdepends',
+    'conflicts', 'provides', 'replaces', 'validation', 'xdata'
+}
+
+
+def parse_desc(text):
+    """Parse the %SECTION% format used by pacman desc files into a dict"""
+    pkg = {}
+    key = None
+    for line in text.splitlines():
+        if not line:
+            key = None
+            continue
+        if key is None:
+            if len(line) > 2 and line[0] == '%' and line[-1] == '%':
+                key = line[1:-1].lower()
+                pkg[key] = [] if key in LIST_FIELDS else ''
+            continue
+        if key in LIST_FIELDS:
+            pkg[key].append(line)
+        elif pkg[key]:
+            pkg[key] += '\n' + line
+        else:
+            pkg[key] = line
+    return pkg
+
+
+def strip_depver(dep):
+    """Strip the version constraint from a depends/provides entry (foo>=1.0 -> foo)"""
+    for i, ch in enumerate(dep):
+        if ch in '<>=:':
+            return dep[:i]
+    return dep
+
+
+_DIGITS = frozenset('0123456789')
+_ALPHA = frozenset('abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ')
+_ALNUM = _DIGITS | _ALPHA
+
+
+def _rpmvercmp(a, b):
+    if a == b:
+        return 0
+    one = two = 0
+    len1, len2 = len(a), len(b)
+    while one < len1 and two < len2:
+        start1, start2 = one, two
+        while one < len1 and a[one] not in _ALNUM:
+            one += 1
+        while two < len2 and b[two] not in _ALNUM:
+            two += 1
+        if one >= len1 or two >= len2:
+            break
+        # Differing separator lengths decide the comparison on their own
+        if one - start1 != two - start2:
+            return -1 if one - start1 < two - start2 else 1
+
+        charset = _DIGITS if a[one] in _DIGITS else _ALPHA
+        end1, end2 = one, two
+        while end1 < len1 and a[end1] in charset:
+            end1 += 1
+        while end2 < len2 and b[end2] in charset:
+            end2 += 1
+        if end2 == two:
+            return 1 if charset is _DIGITS else -1
+
+        seg1, seg2 = a[one:end1], b[two:end2]
+        if charset is _DIGITS:
+            seg1 = seg1.lstrip('0')
+            seg2 = seg2.lstrip('0')
+            if len(seg1) != len(seg2):
+                return 1 if len(seg1) > len(seg2) else -1
+        if seg1 != seg2:
+            return -1 if seg1 < seg2 else 1
+        one, two = end1, end2
+
+    if one >= len1 and two >= len2:
+        return 0
+    # A remaining alpha segment never beats an empty string
+    if (one >= len1 and b[two] not in _ALPHA) or (one < len1 and a[one] in _ALPHA):
+        return -1
+    return 1
+
+
+def _parse_evr(evr):
+    i = 0
+    while i < len(evr) and evr[i] in _DIGITS:
+        i += 1
+    if i < len(evr) and evr[i] == ':':
+        epoch = evr[:i] or '0'
+        rest = evr[i + 1:]
+    else:
+        epoch = '0'
+        rest = evr
+    version, sep, release = rest.rpartition('-')
+    if not sep:
+        return epoch, rest, None
+    return epoch, version, release
+
+
+def vercmp(a, b):
+    """Compare two package versions like alpm_pkg_vercmp: -1, 0 or 1"""
+    if a == b:
+        return 0
+    epoch1, ver1, rel1 = _parse_evr(a)
+    epoch2, ver2, rel2 = _parse_evr(b)
+    ret = _rpmvercmp(epoch1, epoch2)
+    if ret == 0:
+        ret = _rpmvercmp(ver1, ver2)
+        if ret == 0 and rel1 is not None and rel2 is not None:
+            ret = _rpmvercmp(rel1, rel2)
+    return ret
+
+
+def read_pacman_conf(conf=DEFAULT_CONF):
+    """Parse pacman.conf into ({option: [values]}, {repo: [servers]}), following Include lines"""
+    options = {}
+    repos = {}
+    section = None
+
+    def parse(path):
+        nonlocal section
+        try:
+            with open(path, encoding='utf-8', errors='replace') as f:
+                lines = f.readlines()
+        except OSError:
+            return
+        for line in lines:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            if line.startswith('[') and line.endswith(']'):
+                section = line[1:-1]
+                if section != 'options':
+                    repos.setdefault(section, [])
+                continue
+            key, _, value = line.partition('=')
+            key, value = key.strip(), value.strip()
+            if key == 'Include':
+                for included in sorted(glob.glob(value)):
+                    parse(included)
+            elif section == 'options':
+                options.setdefault(key, []).extend(value.split() if value else [''])
+            elif section and key == 'Server':
+                repos[section].append(value)
+
+    parse(conf)
+    return options, repos
+
+
+def root_paths(root='/', dbpath=None, conf=None):
+    """(dbpath, conf) for an installation root, like pacman --root
+
+    The database defaults to the one inside the root. A chroot or container
+    root normally carries its own pacman.conf; the host's is used otherwise.
+    """
+    root = os.path.abspath(root)
+    if dbpath is None:
+        dbpath = os.path.join(root, DEFAULT_DBPATH.lstrip('/'))
+    if conf is None:
+        conf = os.path.join(root, DEFAULT_CONF.lstrip('/'))
+        if not os.path.exists(conf):
+            conf = DEFAULT_CONF
+    return dbpath, conf
+
+
+def read_repo_order(conf=DEFAULT_CONF):
+    """Return the repository names from pacman.conf in the order pacman uses them"""
+    return list(read_pacman_conf(conf)[1])
+
+
+class LocalDatabase:
+    """Reader for the pacman local database at <dbpath>/local
+
+    Entries are cached per package directory and only reparsed when the
+    directory's desc file changes, so a refresh after a transaction costs a
+    stat per package plus a parse of whatever the transaction touched.
+    """
+
+    def __init__(self, dbpath=DEFAULT_DBPATH):
+        self.dbpath = dbpath
+        self.path = os.path.join(dbpath, 'local')
+        self.packages = {}
+        self._installed = {}
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Sync the cache with the on-disk database, returning the set of changed names"""
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self):
+        changed = set()
+        seen = set()
+        try:
+            with os.scandir(self.path) as it:
+                for entry in it:
+                    if not entry.is_dir(follow_symlinks=False):
+                        continue
+                    seen.add(entry.name)
+                    desc_path = os.path.join(entry.path, 'desc')
+                    try:
+                        st = os.stat(desc_path)
+                    except OSError:
+                        continue
+                    stamp = (st.st_mtime_ns, st.st_size)
+                    cached = self._entries.get(entry.name)
+                    if cached and cached[0] == stamp:
+                        continue
+                    pkg = self._read_desc(desc_path)
+                    if pkg is None:
+                        continue
+                    if cached:
+                        changed.add(cached[1]['name'])
+                    self._entries[entry.name] = (stamp, pkg)
+                    changed.add(pkg['name'])
+        except OSError:
+            seen = set()
+
+        for dirname in set(self._entries) - seen:
+            changed.add(self._entries.pop(dirname)[1]['name'])
+
+        if changed:
+            self.packages = {pkg['name']: pkg for _, pkg in self._entries.values()}
+            self._installed = {name: pkg['version'] for name, pkg in self.packages.items()}
+        return changed
+
+    def _read_desc(self, desc_path):
+        try:
+            with open(desc_path, encoding='utf-8', errors='replace') as f:
+                pkg = parse_desc(f.read())
+        except OSError:
+            return None
+        if not pkg.get('name') or not pkg.get('version'):
+            return None
+        return pkg
+
+    def installed(self):
+        """Return a {name: version} mapping of installed packages"""
+        return self._installed
+
+    def get(self, name):
+        return self.packages.get(name)
+
+
+def local_versions(dbpath=DEFAULT_DBPATH):
+    """{name: version} from the entry directory names (name-pkgver-pkgrel) of the local database
+
+    Cheaper than LocalDatabase when only the installed set is needed, since
+    no desc file is read.
+    """
+    installed = {}
+    try:
+        with os.scandir(os.path.join(dbpath, 'local')) as it:
+            for entry in it:
+                parts = entry.name.rsplit('-', 2)
+                if len(parts) == 3 and entry.is_dir(follow_symlinks=False):
+                    installed[parts[0]] = f'{parts[1]}-{parts[2]}'
+    except OSError:
+        pass
+    return installed
+
+
+def read_sync_archive(path):
+    """Read every package entry from a sync database archive (gzip, xz or zstd tar)"""
+    with open(path, 'rb') as f:
+        magic = f.read(4)
+    if magic == ZSTD_MAGIC:
+        if zstandard is not None:
+            with open(path, 'rb') as f:
+                data = zstandard.ZstdDecompressor().stream_reader(f).read()
+        else:
+            data = subprocess.run(
+                ['zstd', '-dcq', path],
+                capture_output=True,
+                check=True
+            ).stdout
+        tar = tarfile.open(fileobj=io.BytesIO(data), mode='r:')
+    else:
+        tar = tarfile.open(path, mode='r:*')
+
+    entries = {}
+    with tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            dirname, _, filename = member.name.rpartition('/')
+            if filename not in ('desc', 'depends'):
+                continue
+            text = tar.extractfile(member).read().decode('utf-8', errors='replace')
+            entries.setdefault(dirname, {}).update(parse_desc(text))
+    return [pkg for pkg in entries.values() if pkg.get('name') and pkg.get('version')]
+
+
+_TOKEN_STRIP = '.,;:()[]{}"\'!?'
+
+
+def package_tokens(pkg):
+    """Yield the lowercase search tokens for a package: name, description words, provides and groups"""
+    yield pkg['name'].lower()
+    for word in pkg.get('desc', '').lower().split():
+        word = word.strip(_TOKEN_STRIP)
+        if word:
+            yield word
+    for provide in pkg.get('provides', ()):
+        yield strip_depver(provide).lower()
+    for group in pkg.get('groups', ()):
+        yield group.lower()
+
+
+class SyncRepo:
+    """One sync database loaded into memory with an inverted token index"""
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.stamp = None
+        self.packages = []
+        self.by_name = {}
+        self.index = {}
+
+    def load(self, stamp):
+        packages = sorted(read_sync_archive(self.path), key=lambda pkg: pkg['name'])
+        index = {}
+        for i, pkg in enumerate(packages):
+            pkg['repo'] = self.name
+            for token in set(package_tokens(pkg)):
+                index.setdefault(token, []).append(i)
+        self.packages = packages
+        self.by_name = {pkg['name']: pkg for pkg in packages}
+        self.index = index
+        self.stamp = stamp
+
+    def match(self, term):
+        """Return the ids of packages with a token containing term"""
+        ids = set()
+        for token, posting in self.index.items():
+            if term in token:
+                ids.update(posting)
+        return ids
+
+    def search(self, terms):
+        ids = None
+        for term in terms:
+            matched = self.match(term)
+            ids = matched if ids is None else ids & matched
+            if not ids:
+                return []
+        return [self.packages[i] for i in sorted(ids)]
+
+
+class SyncDatabase:
+    """In-process replacement for pacman -Ss over <dbpath>/sync/*.db
+
+    Each repository is reloaded only when its database file's mtime or size
+    changes, so repeated searches never touch the disk. A repository whose
+    file fails to load keeps its previous contents; it is dropped only once
+    the file is gone.
+    """
+
+    def __init__(self, dbpath=DEFAULT_DBPATH, conf=DEFAULT_CONF):
+        self.dbpath = dbpath
+        self.conf = conf
+        self.path = os.path.join(dbpath, 'sync')
+        self.repos = {}
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        """Reload changed databases, returning the names of the repos that were (re)loaded"""
+        with self._lock:
+            return self._refresh()
+
+    def _refresh(self):
+        found = {}
+        try:
+            with os.scandir(self.path) as it:
+                for entry in it:
+                    if entry.name.endswith('.db') and entry.is_file():
+                        st = entry.stat()
+                        found[entry.name[:-3]] = (entry.path, (st.st_mtime_ns, st.st_size))
+        except OSError:
+            pass
+
+        order = read_repo_order(self.conf)
+        names = [name for name in order if name in found]
+        names += sorted(name for name in found if name not in order)
+
+        reloaded = set()
+        repos = {}
+        for name in names:
+            path, stamp = found[name]
+            repo = self.repos.get(name) or SyncRepo(name, path)
+            if repo.stamp != stamp:
+                try:
+                    repo.load(stamp)
+                    reloaded.add(name)
+                except ARCHIVE_ERRORS:
+                    # Caught mid-write, say: keep serving the last good copy, retried next refresh
+                    if repo.stamp is None:
+                        continue
+            repos[name] = repo
+        self.repos = repos
+        return reloaded
+
+    def search(self, query):
+        """Return packages whose name, description, provides or groups contain every query term"""
+        terms = query.lower().split()
+        if not terms:
+            return []
+        results = []
+        for repo in self.repos.values():
+            results.extend(repo.search(terms))
+        return results
+
+    def get(self, name):
+        """Return the package from the first repo that carries name"""
+        for repo in self.repos.values():
+            pkg = repo.by_name.get(name)
+            if pkg:
+                return pkg
+        return None
+
+    def __contains__(self, name):
+        return self.get(name) is not None
@@ -0,0 +1,392 @@
+import json
+import os
+import select
+import shlex
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import deque
+from threading import Lock, Thread
+
+SUDO = ('sudo',)
+SAFE_PATH = '/usr/local/sbin:/usr/local/bin:/usr/sbin:/usr/bin:/sbin:/bin'
+HELPER_FLAG = '--privileged-helper'
+ASKPASS_FLAG = '--askpass'
+ASKPASS_SOCKET_ENV = 'ORACLE_ASKPASS_SOCKET'
+# Programs the helper agrees to run as root. AUR helpers are not among them:
+# they refuse to run as root and call sudo themselves (see AskpassServer).
+ALLOWED_COMMANDS = ('pacman',)
+PROTECTED_ENV = ('PATH', 'HOME', 'USER', 'PYTHONPATH', 'PYTHONHOME')
+
+
+def safe_env(extra=None):
+    env = {
+        'PATH': SAFE_PATH,
+        'HOME': os.environ.get('HOME', ''),
+        'USER': os.environ.get('USER', ''),
+        'LANG': os.environ.get('LANG', 'C.UTF-8'),
+        'DISPLAY': os.environ.get('DISPLAY', ''),
+        'XAUTHORITY': os.environ.get('XAUTHORITY', '')
+    }
+    if extra:
+        env.update(extra)
+    return env
+
+
+def helper_command():
+    """Command line that starts the helper side of a PrivilegedSession"""
+    if getattr(sys, 'frozen', False):
+        return [sys.executable, HELPER_FLAG]
+    return [sys.executable, '-u', os.path.abspath(__file__), HELPER_FLAG]
+
+
+def askpass_command():
+    """Command line of the SUDO_ASKPASS program that AskpassServer answers"""
+    if getattr(sys, 'frozen', False):
+        return [sys.executable, ASKPASS_FLAG]
+    return [sys.executable, os.path.abspath(__file__), ASKPASS_FLAG]
+
+
+def resolve_command(cmd, search_path=SAFE_PATH):
+    """Return the absolute path of a whitelisted program, or None"""
+    if not cmd or os.path.basename(cmd[0]) != cmd[0] or cmd[0] not in ALLOWED_COMMANDS:
+        return None
+    return shutil.which(cmd[0], path=search_path)
+
+
+def _pump(process, on_line):
+    """Forward each stdout/stderr line of process to on_line(stream, line) until both close"""
+    def read(stream, name):
+        for line in stream:
+            on_line(name, line.rstrip('\n'))
+
+    stderr_thread = Thread(target=read, args=(process.stderr, 'stderr'), daemon=True)
+    stderr_thread.start()
+    read(process.stdout, 'stdout')
+    stderr_thread.join()
+
+
+class AuthenticationError(Exception):
+    pass
+
+
+class PrivilegedSession:
+    """Long-lived root helper, authenticated once and reused for every privileged command
+
+    The helper is started through ``sudo -k -S`` and then reads JSON
+    requests from its stdin, one per line, running only whitelisted
+    programs. ``-k`` makes sudo read the password line even when it holds a
+    cached timestamp; under a NOPASSWD rule the line reaches the helper,
+    which drops anything that is not a request. Output lines are streamed
+    back as they are produced, followed by the exit status. Both sides give
+    up after ``idle_timeout`` seconds without a request, so the session
+    expires like a sudo timestamp would. ``sudo`` can point at any wrapper
+    that reads a password line and execs its arguments and ``search_path``
+    at stand-in programs, which lets the protocol run without root (see
+    test_oracle.py).
+    """
+
+    def __init__(self, sudo=SUDO, idle_timeout=300, search_path=SAFE_PATH, command=None):
+        self.sudo = tuple(sudo)
+        self.idle_timeout = idle_timeout
+        self.search_path = search_path
+        self.command = command or helper_command()
+        self._process = None
+        self._stderr = deque(maxlen=50)
+        self._lock = Lock()
+        self._last_used = 0
+        self._next_id = 0
+
+    def is_alive(self):
+        return (self._process is not None and self._process.poll() is None and
+                time.monotonic() - self._last_used < self.idle_timeout)
+
+    def start(self, password):
+        """Start the helper; raises AuthenticationError if sudo rejects the password"""
+        with self._lock:
+            self._close()
+            self._stderr.clear()
+            process = subprocess.Popen(
+                [*self.sudo, '-k', '-S', '-p', '', *self.command,
+                 '--idle-timeout', str(self.idle_timeout + 30), '--search-path', self.search_path],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                bufsize=1
+            )
+            Thread(target=self._read_stderr, args=(process,), daemon=True).start()
+            try:
+                process.stdin.write(password + '\n')
+                process.stdin.flush()
+            except OSError:
+                pass
+
+            for line in process.stdout:
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                if message.get('event') == 'ready':
+                    self._process = process
+                    self._last_used = time.monotonic()
+                    return
+            process.wait()
+            raise AuthenticationError('\n'.join(self._stderr) or "Privileged helper failed to start")
+
+    def _read_stderr(self, process):
+        for line in process.stderr:
+            self._stderr.append(line.rstrip('\n'))
+            # sudo would otherwise sit waiting for another password attempt
+            if 'try again' in line.lower() or 'incorrect password' in line.lower():
+                process.kill()
+
+    def run(self, cmd, on_output, env=None):
+        """Run cmd in the helper, passing each output line to on_output as it arrives
+
+        Returns the collected stdout; raises CalledProcessError on a non-zero exit.
+        """
+        with self._lock:
+            if not self.is_alive():
+                raise subprocess.CalledProcessError(1, cmd, "Privileged session is not running")
+            self._next_id += 1
+            request_id = self._next_id
+            try:
+                self._process.stdin.write(json.dumps({'id': request_id, 'cmd': cmd, 'env': env or {}}) + '\n')
+                self._process.stdin.flush()
+            except OSError as e:
+                self._close()
+                raise subprocess.CalledProcessError(1, cmd, f"Privileged helper is gone: {e}")
+
+            lines = {'stdout': [], 'stderr': []}
+            result = None
+            for line in self._process.stdout:
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                if message.get('id') != request_id:
+                    continue
+                if 'exit' in message:
+                    result = message
+                    break
+                lines[message['stream']].append(message['line'])
+                on_output(message['line'])
+            self._last_used = time.monotonic()
+
+            if result is None:
+                self._close()
+                raise subprocess.CalledProcessError(1, cmd, "Privileged helper exited unexpectedly")
+            stdout = '\n'.join(lines['stdout'])
+            if result['exit'] != 0:
+                stderr = '\n'.join(lines['stderr'])
+                error_msg = result.get('error') or stderr or stdout or "Unknown error occurred"
+                raise subprocess.CalledProcessError(result['exit'], cmd, error_msg)
+            return stdout
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        process, self._process = self._process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            process.kill()
+
+
+class AskpassServer:
+    """Supplies sudo passwords to an unprivileged program (an AUR helper) through SUDO_ASKPASS
+
+    While the context is open a private directory holds an askpass script
+    and a UNIX socket. The program is run with env() added to its
+    environment and without a controlling terminal, so each sudo it starts
+    runs the script, which asks the socket, which answers with
+    ``get_password()``. Without a terminal sudo only turns to SUDO_ASKPASS
+    by itself when DISPLAY is set, so env() also puts a ``sudo`` first on
+    PATH that adds ``-A``; it resolves to the real sudo on ``search_path``.
+
+    The askpass tells the socket which sudo process it runs for. sudo asks
+    again only after a wrong answer, so a second request from the same sudo
+    calls ``on_rejected()`` before asking again; requests from further sudo
+    invocations (--sudoloop, several escalations) are answered as usual.
+    Answering None makes the askpass fail and sudo give up.
+    """
+
+    def __init__(self, get_password, on_rejected=None, command=None, search_path=None):
+        self.get_password = get_password
+        self.on_rejected = on_rejected or (lambda: None)
+        self.command = command or askpass_command()
+        self.search_path = search_path or os.environ.get('PATH', os.defpath)
+        self._dir = None
+        self._socket = None
+        self._thread = None
+        self._callers = set()
+
+    def __enter__(self):
+        self._dir = tempfile.mkdtemp(prefix='oracle-askpass-')
+        self.script = os.path.join(self._dir, 'askpass')
+        with open(self.script, 'w') as f:
+            f.write(f"#!/bin/sh\nexec {shlex.join(self.command)} \"$@\"\n")
+        os.chmod(self.script, 0o700)
+        self.bin_dir = os.path.join(self._dir, 'bin')
+        os.mkdir(self.bin_dir)
+        sudo = shutil.which('sudo', path=self.search_path)
+        if sudo:
+            shim = os.path.join(self.bin_dir, 'sudo')
+            with open(shim, 'w') as f:
+                f.write(f"#!/bin/sh\nexec {shlex.quote(sudo)} -A \"$@\"\n")
+            os.chmod(shim, 0o700)
+        self.socket_path = os.path.join(self._dir, 'socket')
+        self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._socket.bind(self.socket_path)
+        self._socket.listen()
+        self._thread = Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        return self
+
+    def env(self):
+        return {
+            'SUDO_ASKPASS': self.script,
+            ASKPASS_SOCKET_ENV: self.socket_path,
+            'PATH': f'{self.bin_dir}{os.pathsep}{self.search_path}'
+        }
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._socket.accept()
+            except OSError:
+                return
+            with conn:
+                conn.settimeout(5)
+                try:
+                    caller = _recv_line(conn)
+                except OSError:
+                    continue
+                if caller is None:
+                    continue
+                if caller in self._callers:
+                    self.on_rejected()
+                self._callers.add(caller)
+                password = self.get_password()
+                if password is not None:
+                    try:
+                        conn.sendall((password + '\n').encode())
+                    except OSError:
+                        pass
+
+    def __exit__(self, *exc):
+        # shutdown wakes the accept() in _serve; close alone does not on Linux
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._socket.close()
+        self._thread.join(timeout=5)
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+
+def askpass(argv=None):
+    """SUDO_ASKPASS side of AskpassServer: print the password it hands out"""
+    path = os.environ.get(ASKPASS_SOCKET_ENV)
+    if not path:
+        return 1
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+            conn.connect(path)
+            # The parent is the sudo asking; it asks again only after a wrong password
+            conn.sendall(f'{os.getppid()}\n'.encode())
+            data = _recv_line(conn)
+    except OSError:
+        return 1
+    if data is None:
+        return 1
+    sys.stdout.write(data + '\n')
+    return 0
+
+
+def _recv_line(conn):
+    """Read one newline-terminated line from a socket; None if it closes first"""
+    data = b''
+    while not data.endswith(b'\n'):
+        chunk = conn.recv(4096)
+        if not chunk:
+            return None
+        data += chunk
+    return data[:-1].decode()
+
+
+def _execute(request, send, search_path=SAFE_PATH):
+    request_id = request.get('id')
+    cmd = request.get('cmd') or []
+    executable = resolve_command(cmd, search_path)
+    if executable is None:
+        return {'id': request_id, 'exit': 126, 'error': f"Command not allowed: {' '.join(map(str, cmd))}"}
+
+    extra = {
+        key: str(value) for key, value in (request.get('env') or {}).items()
+        if key not in PROTECTED_ENV and not key.startswith('LD_')
+    }
+    try:
+        process = subprocess.Popen(
+            [executable, *map(str, cmd[1:])],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            bufsize=1,
+            env=safe_env(extra)
+        )
+    except OSError as e:
+        return {'id': request_id, 'exit': 127, 'error': str(e)}
+    _pump(process, lambda stream, line: send({'id': request_id, 'stream': stream, 'line': line}))
+    return {'id': request_id, 'exit': process.wait()}
+
+
+def serve(argv=None):
+    """Helper side of PrivilegedSession: execute requests from stdin until EOF or idle timeout"""
+    argv = sys.argv[1:] if argv is None else argv
+    options = dict(zip(argv[1::2], argv[2::2])) if argv[:1] == [HELPER_FLAG] else {}
+    idle_timeout = float(options.get('--idle-timeout', 330))
+    search_path = options.get('--search-path', SAFE_PATH)
+    write_lock = Lock()
+
+    def send(message):
+        with write_lock:
+            sys.stdout.write(json.dumps(message) + '\n')
+            sys.stdout.flush()
+
+    send({'event': 'ready', 'pid': os.getpid()})
+    fd = sys.stdin.fileno()
+    buffer = b''
+    while True:
+        readable, _, _ = select.select([fd], [], [], idle_timeout)
+        if not readable:
+            return 0
+        data = os.read(fd, 65536)
+        if not data:
+            return 0
+        buffer += data
+        while b'\n' in buffer:
+            line, buffer = buffer.split(b'\n', 1)
+            try:
+                request = json.loads(line)
+            except ValueError:
+                continue
+            # A stray line (the password under NOPASSWD, say) must not bring the helper down
+            if not (isinstance(request, dict) and isinstance(request.get('cmd'), list)
+                    and isinstance(request.get('env') or {}, dict)):
+                continue
+            send(_execute(request, send, search_path))
+
+
+if __name__ == '__main__':
+    sys.exit(askpass() if sys.argv[1:2] == [ASKPASS_FLAG] else serve())
@@ -0,0 +1,6 @@
+from collections import namedtuple
+
+# Field order matches the columns of the search and updates views
+PackageRecord = namedtuple('PackageRecord', 'status name version source description')
+UpdateRecord = namedtuple('UpdateRecord', 'name current_version new_version source')
+RootRecord = namedtuple('RootRecord', 'root installed updates orphans status')
@@ -0,0 +1,177 @@
+import threading
+from collections import namedtuple
+from functools import lru_cache
+
+from pacman_db import strip_depver, vercmp
+
+Resolution = namedtuple(
+    'Resolution',
+    'targets dependencies upgrades missing foreign conflicts download_size installed_size_delta'
+)
+
+_OPERATORS = ('>=', '<=', '=', '<', '>')
+
+
+@lru_cache(maxsize=65536)
+def split_depver(dep):
+    """Split 'foo>=1.0' into ('foo', '>=', '1.0'); operator and version are None without a constraint"""
+    name = strip_depver(dep)
+    rest = dep[len(name):]
+    for op in _OPERATORS:
+        if rest.startswith(op):
+            return name, op, rest[len(op):]
+    return name, None, None
+
+
+def dep_name(dep):
+    return split_depver(dep)[0]
+
+
+def _version_matches(version, op, wanted):
+    if op is None:
+        return True
+    if version is None:
+        return False
+    cmp = vercmp(version, wanted)
+    return {
+        '=': cmp == 0, '>=': cmp >= 0, '<=': cmp <= 0, '>': cmp > 0, '<': cmp < 0
+    }[op]
+
+
+def satisfies(pkg, dep):
+    """Whether pkg (a desc dict) satisfies a depends/conflicts entry, by name or provides"""
+    name, op, wanted = split_depver(dep)
+    if pkg['name'] == name and _version_matches(pkg['version'], op, wanted):
+        return True
+    for provide in pkg.get('provides', ()):
+        provided, _, version = split_depver(provide)
+        if provided == name and _version_matches(version, op, wanted):
+            return True
+    return False
+
+
+class InstallResolver:
+    """Works out what pacman -S would pull in, entirely from the in-memory databases
+
+    The provides index over the sync databases is rebuilt only when one of
+    the repos has been reloaded, so a preview after the first is a walk over
+    the dependency tree of the selection.
+    """
+
+    def __init__(self, sync_db, local_db):
+        self.sync_db = sync_db
+        self.local_db = local_db
+        self._stamps = None
+        self._providers = {}
+        self._local_providers = {}
+        self._local_seen = None
+        self._lock = threading.Lock()
+
+    def _index(self):
+        stamps = tuple((name, repo.stamp) for name, repo in self.sync_db.repos.items())
+        if stamps != self._stamps:
+            providers = {}
+            for repo in self.sync_db.repos.values():
+                for pkg in repo.packages:
+                    providers.setdefault(pkg['name'], []).append(pkg)
+                    for provide in pkg.get('provides', ()):
+                        providers.setdefault(dep_name(provide), []).append(pkg)
+            self._providers = providers
+            self._stamps = stamps
+
+        packages = self.local_db.packages
+        if packages is not self._local_seen:
+            local = {}
+            for pkg in packages.values():
+                local.setdefault(pkg['name'], []).append(pkg)
+                for provide in pkg.get('provides', ()):
+                    local.setdefault(dep_name(provide), []).append(pkg)
+            self._local_providers = local
+            self._local_seen = packages
+
+    def _installed_provider(self, dep):
+        for pkg in self._local_providers.get(dep_name(dep), ()):
+            if satisfies(pkg, dep):
+                return pkg
+        return None
+
+    def _sync_provider(self, dep):
+        name = dep_name(dep)
+        candidates = [pkg for pkg in self._providers.get(name, ()) if satisfies(pkg, dep)]
+        # Like pacman: a package with the exact name wins, otherwise the first repo's provider
+        for pkg in candidates:
+            if pkg['name'] == name:
+                return pkg
+        return candidates[0] if candidates else None
+
+    def resolve(self, names):
+        """Resolve the install of names into a Resolution"""
+        with self._lock:
+            self._index()
+            installed = self.local_db.packages
+            selected = {}
+            selected_providers = {}
+
+            def select(pkg):
+                selected[pkg['name']] = pkg
+                for token in (pkg['name'], *(dep_name(p) for p in pkg.get('provides', ()))):
+                    selected_providers.setdefault(token, []).append(pkg)
+
+            targets, dependencies, upgrades, missing, foreign = [], [], [], [], []
+
+            queue = []
+            for name in dict.fromkeys(names):
+                pkg = self._sync_provider(name)
+                if pkg is None:
+                    foreign.append(name)
+                    continue
+                select(pkg)
+                targets.append(pkg['name'])
+                queue.append(pkg)
+
+            while queue:
+                pkg = queue.pop()
+                for dep in pkg.get('depends', ()):
+                    if self._installed_provider(dep) or any(
+                            satisfies(p, dep) for p in selected_providers.get(dep_name(dep), ())):
+                        continue
+                    provider = self._sync_provider(dep)
+                    if provider is None:
+                        missing.append((pkg['name'], dep))
+                        continue
+                    select(provider)
+                    dependencies.append(provider['name'])
+                    queue.append(provider)
+
+            download = 0
+            delta = 0
+            for name, pkg in selected.items():
+                current = installed.get(name)
+                if current and current['version'] == pkg['version']:
+                    continue
+                if current:
+                    upgrades.append(name)
+                download += int(pkg.get('csize') or 0)
+                delta += int(pkg.get('isize') or 0) - int((current or {}).get('size') or 0)
+
+            conflicts = []
+            for name, pkg in selected.items():
+                for conflict in pkg.get('conflicts', ()):
+                    for other in self._local_providers.get(dep_name(conflict), ()):
+                        if other['name'] != name and satisfies(other, conflict):
+                            conflicts.append((name, other['name']))
+                    for other in selected_providers.get(dep_name(conflict), ()):
+                        if other['name'] != name and satisfies(other, conflict):
+                            conflicts.append(tuple(sorted((name, other['name']))))
+            for other in installed.values():
+                if other['name'] in selected:
+                    continue
+                for conflict in other.get('conflicts', ()):
+                    for pkg in selected_providers.get(dep_name(conflict), ()):
+                        if pkg['name'] != other['name'] and satisfies(pkg, conflict):
+                            conflicts.append((pkg['name'], other['name']))
+
+            return Resolution(
+                targets, sorted(dependencies), sorted(upgrades), missing, foreign,
+                sorted(set(conflicts)), download, delta
+            )
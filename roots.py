@@ -0,0 +1,84 @@
+"""Inspection of other installation roots: chroots, container roots, mounted systems
+
+Each root is inspected in its own worker process: reading a local database
+and diffing it against the sync databases is CPU bound, so threads would
+serialise on the GIL while processes let a dozen roots take about as long as
+the slowest of them. Every root gets its own private sync DB copy (see
+updates.default_private_dbpath), and inspection keeps its copies apart from
+the update checker's, so concurrent refreshes never share a directory.
+"""
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from depgraph import DependencyGraph
+from pacman_db import LocalDatabase, root_paths
+from updates import UpdateEngine, default_private_dbpath
+
+Target = namedtuple('Target', 'root dbpath conf')
+
+# installed is {name: version}, updates are UpdateEngine.repo_updates() tuples,
+# failures are {repo: error} from the refresh and error is set when the root
+# could not be read at all
+RootReport = namedtuple('RootReport', 'target installed foreign updates orphans failures error')
+
+
+def make_target(root='/', dbpath=None, conf=None):
+    return Target(os.path.abspath(root), *root_paths(root, dbpath, conf))
+
+
+def inspect_root(target, sync=True):
+    """Installed set, pending repository updates and orphans of one root"""
+    if not os.path.isdir(os.path.join(target.dbpath, 'local')):
+        return RootReport(target, {}, [], [], [], {}, f"no pacman database in {target.dbpath}")
+    try:
+        local_db = LocalDatabase(target.dbpath)
+        engine = UpdateEngine(local_db, target.dbpath, target.conf,
+                              default_private_dbpath(target.dbpath, 'roots-db'))
+        failures = engine.refresh(sync)
+        graph = DependencyGraph(local_db)
+        graph.sync()
+        return RootReport(
+            target, dict(local_db.installed()), sorted(engine.foreign_packages()),
+            engine.repo_updates(), sorted(graph.orphans()), failures, None
+        )
+    except OSError as e:
+        return RootReport(target, {}, [], [], [], {}, str(e))
+
+
+class RootInspector:
+    """Inspects many roots concurrently on a pool of worker processes
+
+    Reports are handed to ``on_report`` as each root finishes and returned
+    in target order once all are done. A single root is inspected in-process.
+    """
+
+    def __init__(self, max_workers=None, sync=True):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.sync = sync
+
+    def inspect(self, targets, on_report=None):
+        targets = list(dict.fromkeys(targets))
+        on_report = on_report or (lambda report: None)
+        workers = min(len(targets), self.max_workers)
+        if workers <= 1:
+            reports = []
+            for target in targets:
+                reports.append(inspect_root(target, self.sync))
+                on_report(reports[-1])
+            return reports
+
+        reports = {}
+        # spawn rather than fork: the GUI calls this from a thread of a Qt process
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            futures = {pool.submit(inspect_root, target, self.sync): target for target in targets}
+            for future in as_completed(futures):
+                target = futures[future]
+                try:
+                    report = future.result()
+                except Exception as e:  # a worker process died
+                    report = RootReport(target, {}, [], [], [], {}, str(e) or type(e).__name__)
+                reports[target] = report
+                on_report(report)
+        return [reports[target] for target in targets]
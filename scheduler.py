@@ -0,0 +1,140 @@
+import os
+from collections import deque
+
+from PyQt6.QtCore import QObject, QFileSystemWatcher, QTimer, pyqtSignal
+
+from pacman_db import DEFAULT_DBPATH
+
+
+class JobScheduler(QObject):
+    """Queue for PackageWorkers
+
+    Read-only jobs (searches, update checks, metadata refreshes) run
+    concurrently, at most ``max_concurrent`` at a time. Long read-only work
+    submitted with ``background=True`` (downloads, snapshot refreshes, root
+    inspection) has its own lane of ``max_background`` slots, so it never
+    keeps interactive jobs waiting. A cancelled job stops counting against
+    its lane straight away, even while its thread is still winding down
+    (say, waiting for an HTTP response it will throw away), but every live
+    read-only thread, cancelled or not, counts against ``max_threads``, so
+    fast typing cannot pile up threads without bound. Mutating jobs run one
+    after another and only once pacman's database lock is gone, so a
+    transaction started elsewhere makes them wait instead of fail. The lock is
+    noticed through a watch on the database directory, backed by a slow poll
+    for filesystems without change notifications.
+    """
+    waiting_for_lock = pyqtSignal(bool)
+
+    def __init__(self, max_concurrent=4, max_background=2, max_threads=12, dbpath=DEFAULT_DBPATH,
+                 poll_interval=2000, parent=None):
+        super().__init__(parent)
+        self.max_concurrent = max_concurrent
+        self.max_background = max_background
+        self.max_threads = max(max_threads, max_concurrent + max_background)
+        self.lock_path = os.path.join(dbpath, 'db.lck')
+        self._reads = deque()
+        self._background = deque()
+        self._writes = deque()
+        self._running_reads = set()
+        self._running_background = set()
+        self._running_write = None
+        self._waiting = False
+        self._closed = False
+
+        self._watcher = QFileSystemWatcher(self)
+        if os.path.isdir(dbpath):
+            self._watcher.addPath(dbpath)
+        self._watcher.directoryChanged.connect(self._dispatch)
+        self._poll = QTimer(self)
+        self._poll.setInterval(poll_interval)
+        self._poll.timeout.connect(self._dispatch)
+
+    def submit(self, worker, mutating=False, background=False):
+        """Queue a worker; it is started as soon as its slot (and for mutating jobs the DB lock) is free
+
+        The scheduler owns the worker from here on and deletes it once it has finished.
+        Jobs submitted after shutdown are dropped.
+        """
+        if self._closed:
+            worker.deleteLater()
+            return
+        worker.finished.connect(lambda w=worker: self._finished(w))
+        if mutating:
+            self._writes.append(worker)
+        elif background:
+            self._background.append(worker)
+        else:
+            self._reads.append(worker)
+        self._dispatch()
+
+    def is_locked(self):
+        return os.path.exists(self.lock_path)
+
+    def pending(self, mutating=None):
+        """Number of queued jobs, optionally only mutating (True) or read-only (False) ones"""
+        reads = len(self._reads) + len(self._background)
+        if mutating is None:
+            return reads + len(self._writes)
+        return len(self._writes) if mutating else reads
+
+    def running(self):
+        workers = [*self._running_reads, *self._running_background]
+        if self._running_write:
+            workers.append(self._running_write)
+        return workers
+
+    @staticmethod
+    def _busy(workers):
+        return sum(1 for worker in workers if not worker._cancelled)
+
+    def _live(self):
+        return len(self._running_reads) + len(self._running_background)
+
+    def _dispatch(self):
+        for queue, running, limit in ((self._reads, self._running_reads, self.max_concurrent),
+                                      (self._background, self._running_background, self.max_background)):
+            while queue and self._busy(running) < limit and self._live() < self.max_threads:
+                worker = queue.popleft()
+                running.add(worker)
+                worker.start()
+
+        if self._running_write or not self._writes:
+            self._set_waiting(False)
+            return
+        if self.is_locked():
+            self._set_waiting(True)
+            return
+        self._set_waiting(False)
+        self._running_write = self._writes.popleft()
+        self._running_write.start()
+
+    def _set_waiting(self, waiting):
+        if waiting == self._waiting:
+            return
+        self._waiting = waiting
+        if waiting:
+            self._poll.start()
+        else:
+            self._poll.stop()
+        self.waiting_for_lock.emit(waiting)
+
+    def _finished(self, worker):
+        # finished is emitted at the very end of run(), so this only waits for the thread to return
+        worker.wait()
+        self._running_reads.discard(worker)
+        self._running_background.discard(worker)
+        if worker is self._running_write:
+            self._running_write = None
+        worker.deleteLater()
+        self._dispatch()
+
+    def shutdown(self):
+        """Drop queued jobs and stop the running ones, waiting for their threads"""
+        self._closed = True
+        self._reads.clear()
+        self._background.clear()
+        self._writes.clear()
+        self._set_waiting(False)
+        for worker in self.running():
+            worker.stop()
+            worker.wait()
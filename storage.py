@@ -0,0 +1,45 @@
+import os
+import uuid
+from contextlib import contextmanager
+
+
+def cache_dir(*parts):
+    """Path under Oracle's directory in the user cache ($XDG_CACHE_HOME/oracle, ~/.cache/oracle)"""
+    base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(base, 'oracle', *parts)
+
+
+def sibling_temp(path, suffix='.tmp'):
+    """Create an empty, uniquely named file next to path and return its name
+
+    Unique per call rather than per process, so threads writing the same
+    target never clobber each other's partial files.
+    """
+    directory, name = os.path.split(path)
+    while True:
+        tmp = os.path.join(directory, f'.{name}.{uuid.uuid4().hex[:12]}{suffix}')
+        try:
+            # Unlike mkstemp this honours the umask, like the file it will replace
+            os.close(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666))
+            return tmp
+        except FileExistsError:
+            continue
+
+
+@contextmanager
+def atomic_write(path, mode='w', mtime=None):
+    """Open a temporary sibling of path for writing; it replaces path only if the block succeeds
+
+    ``mtime`` is applied to the new file before it becomes visible.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = sibling_temp(path)
+    try:
+        with open(tmp, mode, encoding=None if 'b' in mode else 'utf-8') as f:
+            yield f
+        if mtime is not None:
+            os.utime(tmp, (mtime, mtime))
+        os.replace(tmp, path)
+    finally:
+        if os.path.lexists(tmp):
+            os.unlink(tmp)
@@ -0,0 +1,120 @@
+import io
+import json
+import os
+import stat
+import subprocess
+from types import SimpleNamespace
+
+import pytest
+
+from aur_snapshot import iter_json_array
+from depgraph import DependencyGraph
+from privileged import AuthenticationError, PrivilegedSession
+
+BIN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'bin')
+
+# Skips the prompt like sudo with a cached timestamp or a NOPASSWD rule
+SUDO_WITHOUT_PROMPT = """#!/bin/sh
+while [ "${1#-}" != "$1" ]; do [ "$1" = -p ] && shift; shift; done
+exec "$@"
+"""
+
+
+@pytest.fixture
+def sudo_without_prompt(tmp_path):
+    path = tmp_path / 'sudo'
+    path.write_text(SUDO_WITHOUT_PROMPT)
+    path.chmod(path.stat().st_mode | stat.S_IXUSR)
+    return str(path)
+
+
+def run_session(sudo, password):
+    session = PrivilegedSession(sudo=[sudo], search_path=BIN_DIR)
+    session.start(password)
+    try:
+        lines = []
+        session.run(['pacman', '-V'], lines.append)
+        return lines
+    finally:
+        session.close()
+
+
+@pytest.mark.parametrize('password', ['bench', '123456', '{"cmd": 1}'])
+def test_session_with_prompting_sudo(monkeypatch, password):
+    monkeypatch.setenv('ORACLE_BENCH_PASSWORD', password)
+    assert 'Pacman v' in run_session(os.path.join(BIN_DIR, 'sudo'), password)[0]
+
+
+def test_session_rejects_wrong_password(monkeypatch):
+    monkeypatch.setenv('ORACLE_BENCH_PASSWORD', 'bench')
+    with pytest.raises(AuthenticationError):
+        run_session(os.path.join(BIN_DIR, 'sudo'), 'wrong')
+
+
+@pytest.mark.parametrize('password', ['bench', '123456', 'null', '["pacman"]', '{"cmd": 1}'])
+def test_session_with_sudo_that_skips_the_prompt(sudo_without_prompt, password):
+    # The unread password line reaches the helper, which must drop it
+    assert 'Pacman v' in run_session(sudo_without_prompt, password)[0]
+
+
+def test_session_refuses_commands_outside_the_whitelist(sudo_without_prompt):
+    session = PrivilegedSession(sudo=[sudo_without_prompt], search_path=BIN_DIR)
+    session.start('bench')
+    try:
+        with pytest.raises(subprocess.CalledProcessError) as refused:
+            session.run(['yay', '-Syu'], lambda line: None)
+        assert refused.value.returncode == 126 and 'not allowed' in refused.value.output
+        assert session.is_alive()
+    finally:
+        session.close()
+
+
+def graph(**packages):
+    local_db = SimpleNamespace(packages={name: {'name': name, **pkg} for name, pkg in packages.items()})
+    result = DependencyGraph(local_db)
+    result.sync()
+    return result
+
+
+def test_removal_closure_follows_dependents():
+    deps = graph(lib={}, app={'depends': ['lib>=1']}, plugin={'depends': ['app']}, other={})
+    assert deps.removal_closure({'lib'}) == {'lib', 'app', 'plugin'}
+
+
+def test_removal_closure_keeps_dependents_with_another_provider():
+    deps = graph(
+        openssl={'provides': ['libssl']},
+        libressl={'provides': ['libssl']},
+        app={'depends': ['libssl']}
+    )
+    assert deps.removal_closure({'openssl'}) == {'openssl'}
+    assert deps.removal_closure({'openssl', 'libressl'}) == {'openssl', 'libressl', 'app'}
+
+
+def test_removal_closure_ignores_dependencies_that_were_already_broken():
+    deps = graph(
+        lib={'provides': ['libx']},
+        lib2={'provides': ['libx']},
+        app={'depends': ['libx', 'missing']}
+    )
+    assert deps.removal_closure({'lib'}) == {'lib'}
+
+
+ITEMS = [{'Name': f'pkg{i}', 'Keywords': ['a', 'b]', '{c}'], 'Desc': 'quote " and , comma'} for i in range(50)]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 1 << 16])
+def test_iter_json_array(chunk_size):
+    text = json.dumps(ITEMS, indent=1)
+    assert list(iter_json_array(io.StringIO(text), chunk_size)) == ITEMS
+
+
+def test_iter_json_array_handles_empty_and_scalar_arrays():
+    assert list(iter_json_array(io.StringIO(' [ ] '))) == []
+    assert list(iter_json_array(io.StringIO('[1,2.5,"x",null]'), 1)) == [1, 2.5, 'x', None]
+
+
+@pytest.mark.parametrize('text', ['{"a": 1}', '[{"a": 1}, {"b"', '[1, 2'])
+def test_iter_json_array_rejects_broken_input(text):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(text), 3))
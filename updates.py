@@ -0,0 +1,328 @@
+import hashlib
+import os
+import platform
+import shutil
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from pacman_db import (
+    DEFAULT_CONF, DEFAULT_DBPATH, LocalDatabase, SyncDatabase, read_pacman_conf, vercmp
+)
+from storage import atomic_write, cache_dir
+
+DEFAULT_CACHEDIR = '/var/cache/pacman/pkg'
+# Bandwidth the background prefetch may use, in bytes per second
+DEFAULT_PREFETCH_RATE = 2 * 1024 * 1024
+
+
+class DownloadCancelled(OSError):
+    pass
+
+
+def default_private_dbpath(dbpath=DEFAULT_DBPATH, name='checkup-db'):
+    """Private sync DB location; every root other than the live one gets its own copy"""
+    path = cache_dir(name)
+    dbpath = os.path.abspath(dbpath)
+    if dbpath != DEFAULT_DBPATH:
+        path = f'{path}-{hashlib.sha1(dbpath.encode()).hexdigest()[:12]}'
+    return path
+
+
+def default_package_cache():
+    return cache_dir('pkg')
+
+
+def lower_thread_priority(niceness=19):
+    """Make the calling thread nice; on Linux its I/O priority follows the nice value"""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), niceness)
+    except (AttributeError, OSError):
+        pass
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def mirror_url(server, repo, arch):
+    return server.replace('$repo', repo).replace('$arch', arch).rstrip('/')
+
+
+def _write_chunks(chunks, f, rate_limit=None, cancelled=None):
+    """Write chunks to f, pausing to stay under rate_limit bytes/s; raises DownloadCancelled once cancelled()"""
+    start = time.monotonic()
+    written = 0
+    for chunk in chunks:
+        if cancelled and cancelled():
+            raise DownloadCancelled("download cancelled")
+        f.write(chunk)
+        written += len(chunk)
+        if rate_limit:
+            ahead = written / rate_limit - (time.monotonic() - start)
+            if ahead > 0:
+                time.sleep(ahead)
+
+
+def download(url, dest, session=None, timeout=30, newer_than=None, rate_limit=None, cancelled=None):
+    """Download url to dest atomically; returns False if the remote copy is not newer than newer_than
+
+    file:// URLs are copied directly so a local mirror works without a web server.
+    ``rate_limit`` caps the transfer in bytes per second and ``cancelled``
+    is polled between chunks.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == 'file':
+        src = url2pathname(parsed.path)
+        mtime = os.stat(src).st_mtime
+        if newer_than is not None and mtime <= newer_than:
+            return False
+        with open(src, 'rb') as f, atomic_write(dest, 'wb', mtime) as out:
+            _write_chunks(iter(lambda: f.read(1 << 16), b''), out, rate_limit, cancelled)
+        return True
+
+    headers = {}
+    if newer_than is not None:
+        headers['If-Modified-Since'] = formatdate(newer_than, usegmt=True)
+    http = session
+    if http is None:
+        # Imported here so file:// mirrors and the headless CLI's start-up do not pay for it
+        import requests as http
+    with http.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        if response.status_code == 304:
+            return False
+        response.raise_for_status()
+        try:
+            mtime = parsedate_to_datetime(response.headers.get('Last-Modified')).timestamp()
+        except (TypeError, ValueError):
+            mtime = time.time()
+        with atomic_write(dest, 'wb', mtime) as out:
+            _write_chunks(response.iter_content(1 << 16), out, rate_limit, cancelled)
+    return True
+
+
+class PrivateSyncDB:
+    """User-owned copy of the sync databases, refreshed without root like checkupdates
+
+    The copy lives in its own dbpath whose local/ is a symlink to the real
+    local database, so it can also be handed to pacman with --dbpath.
+    """
+
+    def __init__(self, dbpath=DEFAULT_DBPATH, conf=DEFAULT_CONF, path=None, session=None):
+        self.system_dbpath = dbpath
+        self.conf = conf
+        self.dbpath = path or default_private_dbpath(dbpath)
+        self.sync_path = os.path.join(self.dbpath, 'sync')
+        self.session = session
+
+    def _prepare(self):
+        os.makedirs(self.sync_path, exist_ok=True)
+        local = os.path.join(self.dbpath, 'local')
+        try:
+            os.symlink(os.path.join(self.system_dbpath, 'local'), local)
+        except FileExistsError:
+            pass
+
+    def refresh(self):
+        """Download changed databases from the configured mirrors; returns {repo: error} for failures"""
+        self._prepare()
+        options, repos = read_pacman_conf(self.conf)
+        arch = (options.get('Architecture') or ['auto'])[0]
+        if arch == 'auto':
+            arch = platform.machine()
+
+        failures = {}
+        for repo, servers in repos.items():
+            dest = os.path.join(self.sync_path, f'{repo}.db')
+            self._seed(repo, dest)
+            try:
+                newer_than = os.stat(dest).st_mtime
+            except OSError:
+                newer_than = None
+
+            error = "no Server configured"
+            for server in servers:
+                try:
+                    download(f'{mirror_url(server, repo, arch)}/{repo}.db', dest,
+                             session=self.session, newer_than=newer_than)
+                    error = None
+                    break
+                except OSError as e:  # requests.RequestException is an OSError
+                    error = str(e)
+            if error:
+                failures[repo] = error
+        return failures
+
+    def seed(self):
+        """Bring the copy up to the system's sync databases without touching the network"""
+        self._prepare()
+        _, repos = read_pacman_conf(self.conf)
+        for repo in repos:
+            self._seed(repo, os.path.join(self.sync_path, f'{repo}.db'))
+
+    def _seed(self, repo, dest):
+        """Start from the system copy when it is newer, so unchanged repos never hit the network"""
+        src = os.path.join(self.system_dbpath, 'sync', f'{repo}.db')
+        try:
+            src_mtime = os.stat(src).st_mtime
+        except OSError:
+            return
+        try:
+            if os.stat(dest).st_mtime >= src_mtime:
+                return
+        except OSError:
+            pass
+        with open(src, 'rb') as f, atomic_write(dest, 'wb', src_mtime) as out:
+            shutil.copyfileobj(f, out)
+
+
+class UpdateEngine:
+    """Computes pending updates in-process by diffing the local DB against a private sync DB copy"""
+
+    def __init__(self, local_db=None, dbpath=DEFAULT_DBPATH, conf=DEFAULT_CONF,
+                 private_path=None, session=None):
+        self.local_db = local_db or LocalDatabase(dbpath)
+        self.private = PrivateSyncDB(dbpath, conf, private_path, session)
+        self.sync_db = SyncDatabase(self.private.dbpath, conf)
+
+    def refresh(self, sync=True):
+        """Refresh the private databases and reload whatever changed
+
+        With sync False nothing is downloaded; the copy only catches up with
+        the system's own sync databases.
+        """
+        if sync:
+            failures = self.private.refresh()
+        else:
+            failures = {}
+            self.private.seed()
+        self.local_db.refresh()
+        self.sync_db.refresh()
+        return failures
+
+    def repo_updates(self):
+        """Return (name, installed, available, repo) for every installed package with a newer sync version"""
+        updates = []
+        for name, pkg in sorted(self.local_db.packages.items()):
+            sync_pkg = self.sync_db.get(name)
+            if sync_pkg and vercmp(sync_pkg['version'], pkg['version']) > 0:
+                updates.append((name, pkg['version'], sync_pkg['version'], sync_pkg['repo']))
+        return updates
+
+    def foreign_packages(self):
+        """Return the set of installed packages that no sync database provides (pacman -Qm)"""
+        return {name for name in self.local_db.packages if name not in self.sync_db}
+
+
+class PackagePrefetcher:
+    """Background pacman -Swu into a user-owned staging cache
+
+    Package files for pending updates are fetched one at a time from the
+    configured mirrors on a nice'd thread, checked against the size and
+    SHA-256 in the sync database, and kept in ``cache_dir``. The upgrade then
+    passes that directory to pacman as an extra --cachedir so it only has to
+    install. Files that no longer belong to a pending update are pruned.
+    Downloads are capped at ``rate_limit`` bytes per second (None for no
+    cap) so the prefetch leaves the connection to everything else.
+    """
+
+    def __init__(self, sync_db, conf=DEFAULT_CONF, cache_dir=None, session=None,
+                 rate_limit=DEFAULT_PREFETCH_RATE):
+        self.sync_db = sync_db
+        self.conf = conf
+        self.cache_dir = cache_dir or default_package_cache()
+        self.session = session
+        self.rate_limit = rate_limit
+
+    def system_cachedirs(self):
+        options, _ = read_pacman_conf(self.conf)
+        return options.get('CacheDir') or [DEFAULT_CACHEDIR]
+
+    def pacman_args(self):
+        """--cachedir options that keep pacman's own cache first and add the staging cache"""
+        try:
+            staged = any(name.endswith(('.pkg.tar.zst', '.pkg.tar.xz', '.pkg.tar.gz'))
+                         for name in os.listdir(self.cache_dir))
+        except OSError:
+            staged = False
+        if not staged:
+            return []
+        args = []
+        for cachedir in self.system_cachedirs():
+            args += ['--cachedir', cachedir]
+        return args + ['--cachedir', self.cache_dir]
+
+    def _cached(self, pkg, dirs):
+        for cachedir in dirs:
+            path = os.path.join(cachedir, pkg['filename'])
+            try:
+                if os.path.getsize(path) == int(pkg.get('csize') or -1):
+                    return path
+            except OSError:
+                continue
+        return None
+
+    def prefetch(self, names, on_output=None, cancelled=None, low_priority=True):
+        """Download the sync packages for names; returns (fetched, cached, failed) lists"""
+        if low_priority:
+            lower_thread_priority()
+        on_output = on_output or (lambda line: None)
+        options, repos = read_pacman_conf(self.conf)
+        arch = (options.get('Architecture') or ['auto'])[0]
+        if arch == 'auto':
+            arch = platform.machine()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        packages = [pkg for pkg in map(self.sync_db.get, names) if pkg and pkg.get('filename')]
+        self._prune({pkg['filename'] for pkg in packages})
+        dirs = [*self.system_cachedirs(), self.cache_dir]
+
+        fetched, cached, failed = [], [], []
+        for pkg in packages:
+            if cancelled and cancelled():
+                break
+            if self._cached(pkg, dirs):
+                cached.append(pkg['name'])
+                continue
+            dest = os.path.join(self.cache_dir, pkg['filename'])
+            error = "no Server configured"
+            for server in repos.get(pkg['repo'], ()):
+                try:
+                    download(f"{mirror_url(server, pkg['repo'], arch)}/{pkg['filename']}", dest,
+                             session=self.session, rate_limit=self.rate_limit, cancelled=cancelled)
+                except DownloadCancelled:
+                    return fetched, cached, failed
+                except OSError as e:  # requests.RequestException is an OSError
+                    error = str(e)
+                    continue
+                if pkg.get('sha256sum') and sha256_file(dest) != pkg['sha256sum']:
+                    os.unlink(dest)
+                    error = "checksum mismatch"
+                    continue
+                error = None
+                break
+            if error:
+                failed.append(pkg['name'])
+                on_output(f"Could not prefetch {pkg['filename']}: {error}")
+            else:
+                fetched.append(pkg['name'])
+                on_output(f"Prefetched {pkg['filename']}")
+        return fetched, cached, failed
+
+    def _prune(self, keep):
+        try:
+            entries = os.listdir(self.cache_dir)
+        except OSError:
+            return
+        for name in entries:
+            if name not in keep:
+                try:
+                    os.unlink(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass